@@ -15,6 +15,14 @@ AV2VBroadcast::AV2VBroadcast(const FObjectInitializer& ObjectInitializer)
     Sphere->SetHiddenInGame(false);
     Sphere->SetCollisionProfileName(FName("OverlapAll"));
     BroadcastRadius = 1000.0f; // Default broadcast radius
+    bDeltaUpdates = true;
+    RefreshTTL = 5.0f;
+    BroadcastPeriod = 1.0f;
+    bAdaptiveBroadcast = false;
+    MinBroadcastPeriod = 0.2f;
+    MaxBroadcastPeriod = 2.0f;
+    AdaptiveDistance = 2000.0f;
+    AdaptiveSpeed = 300.0f;
 }
 
 void AV2VBroadcast::BeginPlay()
@@ -26,7 +34,8 @@ void AV2VBroadcast::BeginPlay()
     } else {
         UE_LOG(LogCarla, Warning, TEXT("No parent actor found!"));
     }
-    GetWorldTimerManager().SetTimer(BroadcastTimerHandle, this, &AV2VBroadcast::PeriodicBroadcast, 1.0f, true);
+    // In adaptive mode the timer is one-shot and every broadcast schedules the next one
+    GetWorldTimerManager().SetTimer(BroadcastTimerHandle, this, &AV2VBroadcast::PeriodicBroadcast, BroadcastPeriod, !bAdaptiveBroadcast);
 }
 
 void AV2VBroadcast::EndPlay(const EEndPlayReason::Type EndPlayReason)
@@ -49,7 +58,56 @@ FActorDefinition AV2VBroadcast::GetSensorDefinition()
     Radius.Type = EActorAttributeType::Float;
     Radius.RecommendedValues = {TEXT("1000.0")};
     Radius.bRestrictToRecommended = false;
-    Definition.Variations.Append({Radius});
+
+    FActorVariation DeltaUpdates;
+    DeltaUpdates.Id = TEXT("delta_updates");
+    DeltaUpdates.Type = EActorAttributeType::Bool;
+    DeltaUpdates.RecommendedValues = {TEXT("true")};
+    DeltaUpdates.bRestrictToRecommended = false;
+
+    FActorVariation Refresh;
+    Refresh.Id = TEXT("refresh_ttl");
+    Refresh.Type = EActorAttributeType::Float;
+    Refresh.RecommendedValues = {TEXT("5.0")};
+    Refresh.bRestrictToRecommended = false;
+
+    FActorVariation Period;
+    Period.Id = TEXT("broadcast_period");
+    Period.Type = EActorAttributeType::Float;
+    Period.RecommendedValues = {TEXT("1.0")};
+    Period.bRestrictToRecommended = false;
+
+    FActorVariation Adaptive;
+    Adaptive.Id = TEXT("adaptive_broadcast");
+    Adaptive.Type = EActorAttributeType::Bool;
+    Adaptive.RecommendedValues = {TEXT("false")};
+    Adaptive.bRestrictToRecommended = false;
+
+    FActorVariation MinPeriod;
+    MinPeriod.Id = TEXT("min_broadcast_period");
+    MinPeriod.Type = EActorAttributeType::Float;
+    MinPeriod.RecommendedValues = {TEXT("0.2")};
+    MinPeriod.bRestrictToRecommended = false;
+
+    FActorVariation MaxPeriod;
+    MaxPeriod.Id = TEXT("max_broadcast_period");
+    MaxPeriod.Type = EActorAttributeType::Float;
+    MaxPeriod.RecommendedValues = {TEXT("2.0")};
+    MaxPeriod.bRestrictToRecommended = false;
+
+    FActorVariation Distance;
+    Distance.Id = TEXT("adaptive_distance");
+    Distance.Type = EActorAttributeType::Float;
+    Distance.RecommendedValues = {TEXT("2000.0")};
+    Distance.bRestrictToRecommended = false;
+
+    FActorVariation Speed;
+    Speed.Id = TEXT("adaptive_speed");
+    Speed.Type = EActorAttributeType::Float;
+    Speed.RecommendedValues = {TEXT("300.0")};
+    Speed.bRestrictToRecommended = false;
+
+    Definition.Variations.Append({Radius, DeltaUpdates, Refresh, Period, Adaptive, MinPeriod, MaxPeriod, Distance, Speed});
 
     return Definition;
 }
@@ -59,6 +117,14 @@ void AV2VBroadcast::Set(const FActorDescription& Description)
     Super::Set(Description);
     BroadcastRadius = UActorBlueprintFunctionLibrary::RetrieveActorAttributeToFloat("broadcast_radius", Description.Variations, 1000.0f);
     Sphere->SetSphereRadius(BroadcastRadius);
+    bDeltaUpdates = UActorBlueprintFunctionLibrary::RetrieveActorAttributeToBool("delta_updates", Description.Variations, true);
+    RefreshTTL = UActorBlueprintFunctionLibrary::RetrieveActorAttributeToFloat("refresh_ttl", Description.Variations, 5.0f);
+    BroadcastPeriod = FMath::Max(0.01f, UActorBlueprintFunctionLibrary::RetrieveActorAttributeToFloat("broadcast_period", Description.Variations, 1.0f));
+    bAdaptiveBroadcast = UActorBlueprintFunctionLibrary::RetrieveActorAttributeToBool("adaptive_broadcast", Description.Variations, false);
+    MinBroadcastPeriod = FMath::Max(0.01f, UActorBlueprintFunctionLibrary::RetrieveActorAttributeToFloat("min_broadcast_period", Description.Variations, 0.2f));
+    MaxBroadcastPeriod = FMath::Max(MinBroadcastPeriod, UActorBlueprintFunctionLibrary::RetrieveActorAttributeToFloat("max_broadcast_period", Description.Variations, 2.0f));
+    AdaptiveDistance = UActorBlueprintFunctionLibrary::RetrieveActorAttributeToFloat("adaptive_distance", Description.Variations, 2000.0f);
+    AdaptiveSpeed = UActorBlueprintFunctionLibrary::RetrieveActorAttributeToFloat("adaptive_speed", Description.Variations, 300.0f);
 }
 
 void AV2VBroadcast::SetOwner(AActor* NewOwner)
@@ -99,12 +165,21 @@ void AV2VBroadcast::SetWalkerDetectionSensor(AWalkerDetectionSensor* Sensor)
 }
 
 void AV2VBroadcast::PeriodicBroadcast()
+{
+    const float NextPeriod = Broadcast();
+    if (bAdaptiveBroadcast)
+    {
+        GetWorldTimerManager().SetTimer(BroadcastTimerHandle, this, &AV2VBroadcast::PeriodicBroadcast, NextPeriod, false);
+    }
+}
+
+float AV2VBroadcast::Broadcast()
 {
     UE_LOG(LogCarla, Log, TEXT("Periodic broadcast"));
     if (!WalkerDetectionSensor) 
     {
         UE_LOG(LogCarla, Warning, TEXT("WalkerDetectionSensor is not set"));
-        return;
+        return bAdaptiveBroadcast ? MaxBroadcastPeriod : BroadcastPeriod;
     }
 
     FScopeLock Lock(&WalkerDetectionSensor->GetDataLock());
@@ -113,33 +188,116 @@ void AV2VBroadcast::PeriodicBroadcast()
 
     const TMap<int32, FSharedWalkerDatas>& TrackedWalkers = WalkerDetectionSensor->GetTrackedWalkers();
     UE_LOG(LogCarla, Log, TEXT("Number of tracked walkers: %d"), TrackedWalkers.Num());
-    if (TrackedWalkers.Num() == 0) return;
-    
-    UE_LOG(LogCarla, Log, TEXT("Sharing walker data with %d vehicles"), TrackedWalkers.Num());
+
+    // Entries the detection sensor dropped are forgotten, so they count as new if they come back
+    for (auto It = SentVersions.CreateIterator(); It; ++It)
+    {
+        if (!TrackedWalkers.Contains(It.Key()))
+        {
+            SentTimes.Remove(It.Key());
+            It.RemoveCurrent();
+        }
+    }
+    const float NextPeriod = bAdaptiveBroadcast ? ComputeAdaptivePeriod(TrackedWalkers) : BroadcastPeriod;
+    if (TrackedWalkers.Num() == 0) return NextPeriod;
+
+    TArray<const FSharedWalkerDatas*> Delta;
+    CollectDelta(TrackedWalkers, GetWorld()->GetTimeSeconds(), Delta);
+
+    TArray<const FSharedWalkerDatas*> FullMap;
+    FullMap.Reserve(TrackedWalkers.Num());
+    for (const auto& Entry : TrackedWalkers)
+    {
+        FullMap.Add(&Entry.Value);
+    }
 
     TSet<AActor*> NearbyVehicles;
     Sphere->GetOverlappingActors(NearbyVehicles, ACarlaWheeledVehicle::StaticClass());
     NearbyVehicles.Remove(GetOwner());
-    UE_LOG(LogCarla, Log, TEXT("Found %d nearby vehicles"), NearbyVehicles.Num());
+    UE_LOG(LogCarla, Log, TEXT("Found %d nearby vehicles, %d of %d entries changed"), NearbyVehicles.Num(), Delta.Num(), TrackedWalkers.Num());
 
+    TSet<TWeakObjectPtr<AActor>> CurrentNeighbours;
     for (AActor* Vehicle : NearbyVehicles)
     {
-        // Get all attached actors of type AV2VBroadcast
-        TArray<AActor*> AttachedActors;
-        Vehicle->GetAttachedActors(AttachedActors);
+        CurrentNeighbours.Add(Vehicle);
+        const bool bNewNeighbour = !KnownNeighbours.Contains(Vehicle);
+        ShareWith(Vehicle, (!bDeltaUpdates || bNewNeighbour) ? FullMap : Delta);
+    }
+    KnownNeighbours = MoveTemp(CurrentNeighbours);
+    return NextPeriod;
+}
+
+float AV2VBroadcast::ComputeAdaptivePeriod(const TMap<int32, FSharedWalkerDatas>& TrackedWalkers)
+{
+    // Urgency is 1 for a walker at the vehicle or at AdaptiveSpeed, 0 for walkers far and slow
+    const FVector OwnerLocation = GetOwner() ? GetOwner()->GetActorLocation() : GetActorLocation();
+    float Urgency = 0.0f;
+    for (const auto& Entry : TrackedWalkers)
+    {
+        const FSharedWalkerDatas& Data = Entry.Value;
+        if (AdaptiveDistance > 0.0f)
+        {
+            Urgency = FMath::Max(Urgency, 1.0f - FVector::Dist(Data.Location, OwnerLocation) / AdaptiveDistance);
+        }
+        const FVector* PreviousLocation = PreviousLocations.Find(Entry.Key);
+        const float* PreviousTimestamp = PreviousTimestamps.Find(Entry.Key);
+        if (AdaptiveSpeed > 0.0f && PreviousLocation && PreviousTimestamp && Data.Timestamp > *PreviousTimestamp)
+        {
+            const float Speed = FVector::Dist(Data.Location, *PreviousLocation) / (Data.Timestamp - *PreviousTimestamp);
+            Urgency = FMath::Max(Urgency, Speed / AdaptiveSpeed);
+        }
+        PreviousLocations.Add(Entry.Key, Data.Location);
+        PreviousTimestamps.Add(Entry.Key, Data.Timestamp);
+    }
+    for (auto It = PreviousLocations.CreateIterator(); It; ++It)
+    {
+        if (!TrackedWalkers.Contains(It.Key()))
+        {
+            PreviousTimestamps.Remove(It.Key());
+            It.RemoveCurrent();
+        }
+    }
+    Urgency = FMath::Clamp(Urgency, 0.0f, 1.0f);
+    return FMath::Lerp(MaxBroadcastPeriod, MinBroadcastPeriod, Urgency);
+}
+
+void AV2VBroadcast::CollectDelta(const TMap<int32, FSharedWalkerDatas>& TrackedWalkers, float Now, TArray<const FSharedWalkerDatas*>& OutDelta)
+{
+    // New or changed entries, plus unchanged ones not sent for RefreshTTL seconds
+    for (const auto& Entry : TrackedWalkers)
+    {
+        const int32* SentVersion = SentVersions.Find(Entry.Key);
+        const float* SentTime = SentTimes.Find(Entry.Key);
+        const bool bChanged = !SentVersion || *SentVersion != Entry.Value.Version;
+        const bool bExpired = !SentTime || Now - *SentTime >= RefreshTTL;
+        if (!bDeltaUpdates || bChanged || bExpired)
+        {
+            OutDelta.Add(&Entry.Value);
+            SentVersions.Add(Entry.Key, Entry.Value.Version);
+            SentTimes.Add(Entry.Key, Now);
+        }
+    }
+}
 
-        for (AActor* AttachedActor : AttachedActors)
+void AV2VBroadcast::ShareWith(AActor* Vehicle, const TArray<const FSharedWalkerDatas*>& Entries)
+{
+    if (Entries.Num() == 0) return;
+
+    // Get all attached actors of type AV2VBroadcast
+    TArray<AActor*> AttachedActors;
+    Vehicle->GetAttachedActors(AttachedActors);
+
+    for (AActor* AttachedActor : AttachedActors)
+    {
+        AV2VBroadcast* VehicleBroadcastActor = Cast<AV2VBroadcast>(AttachedActor);
+        if (VehicleBroadcastActor && VehicleBroadcastActor->WalkerDetectionSensor)
         {
-            AV2VBroadcast* VehicleBroadcastActor = Cast<AV2VBroadcast>(AttachedActor);
-            if (VehicleBroadcastActor)
+            // Share walker data with the nearby vehicle; it keeps only what is newer than its own
+            for (const FSharedWalkerDatas* Entry : Entries)
             {
-                // Share walker data with the nearby vehicle
-                for (const auto& Entry : TrackedWalkers)
-                {
-                    VehicleBroadcastActor->WalkerDetectionSensor->UpdateWalkerData(Entry.Key, Entry.Value.Location, Entry.Value.Timestamp, false);
-                    UE_LOG(LogCarla, Log, TEXT("Shared walker data with vehicle: %s"), *Vehicle->GetName());
-                }
+                VehicleBroadcastActor->WalkerDetectionSensor->UpdateWalkerData(Entry->WalkerID, Entry->Location, Entry->Timestamp, false);
             }
+            UE_LOG(LogCarla, Log, TEXT("Shared %d walker entries with vehicle: %s"), Entries.Num(), *Vehicle->GetName());
         }
     }
 }
\ No newline at end of file
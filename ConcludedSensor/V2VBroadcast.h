@@ -29,6 +29,10 @@ protected:
 
 private:
     void PeriodicBroadcast();
+    float Broadcast();
+    float ComputeAdaptivePeriod(const TMap<int32, FSharedWalkerDatas>& TrackedWalkers);
+    void CollectDelta(const TMap<int32, FSharedWalkerDatas>& TrackedWalkers, float Now, TArray<const FSharedWalkerDatas*>& OutDelta);
+    void ShareWith(AActor* Vehicle, const TArray<const FSharedWalkerDatas*>& Entries);
 
     UPROPERTY()
     USphereComponent* Sphere = nullptr;
@@ -39,4 +43,25 @@ private:
     FTimerHandle BroadcastTimerHandle;
 
     float BroadcastRadius; // Radius of the broadcast sphere
+
+    float BroadcastPeriod; // Seconds between broadcasts, or the first one in adaptive mode
+    bool bAdaptiveBroadcast; // Shorten the period when walkers are close or fast, lengthen it otherwise
+    float MinBroadcastPeriod;
+    float MaxBroadcastPeriod;
+    float AdaptiveDistance; // Walkers closer than this (cm) shorten the period
+    float AdaptiveSpeed; // Walkers faster than this (cm/s) shorten the period
+
+    // Last known location and time of every walker, to estimate its speed between broadcasts
+    TMap<int32, FVector> PreviousLocations;
+    TMap<int32, float> PreviousTimestamps;
+
+    bool bDeltaUpdates; // Only send new or changed entries to vehicles that were already in range
+    float RefreshTTL; // Seconds after which an unchanged entry is sent again
+
+    // Version and time of the last broadcast of every walker entry
+    TMap<int32, int32> SentVersions;
+    TMap<int32, float> SentTimes;
+
+    // Vehicles in range at the last broadcast; vehicles entering the range get the full map
+    TSet<TWeakObjectPtr<AActor>> KnownNeighbours;
 };
\ No newline at end of file
@@ -113,14 +113,17 @@ void AWalkerDetectionSensor::PerformLineTrace(float DeltaSeconds)
     DrawDebugLine(GetWorld(), StartLocation, EndLocation, FColor::Green, false, 0.1f, 0, 1.0f);
 }
 
-void AWalkerDetectionSensor::UpdateWalkerData(int32 WalkerID, const FVector& Location, float Timestamp, bool bDetectedByOwnVehicle)
+bool AWalkerDetectionSensor::UpdateWalkerData(int32 WalkerID, const FVector& Location, float Timestamp, bool bDetectedByOwnVehicle)
 {
     FScopeLock Lock(&DataLock);
     auto* ExistingData = TrackedWalkers.Find(WalkerID);
     if (!ExistingData || Timestamp > ExistingData->Timestamp)
     {
-        TrackedWalkers.Add(WalkerID, FSharedWalkerDatas(WalkerID, Location, Timestamp, bDetectedByOwnVehicle));
+        const int32 Version = ExistingData ? ExistingData->Version + 1 : 1;
+        TrackedWalkers.Add(WalkerID, FSharedWalkerDatas(WalkerID, Location, Timestamp, bDetectedByOwnVehicle, Version));
+        return true;
     }
+    return false;
 }
 
 const TMap<int32, FSharedWalkerDatas>& AWalkerDetectionSensor::GetTrackedWalkers() const
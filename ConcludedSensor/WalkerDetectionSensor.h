@@ -16,10 +16,11 @@ struct FSharedWalkerDatas
     FVector Location;
     float Timestamp;
     bool bDetectedByOwnVehicle;
+    int32 Version; // Bumped every time this sensor accepts newer data for the walker
 
-    FSharedWalkerDatas() : WalkerID(-1), Location(FVector::ZeroVector), Timestamp(0.0f), bDetectedByOwnVehicle(false) {}
-    FSharedWalkerDatas(int32 InWalkerID, FVector InLocation, float InTimestamp, bool InDetectedByOwnVehicle = false)
-        : WalkerID(InWalkerID), Location(InLocation), Timestamp(InTimestamp), bDetectedByOwnVehicle(InDetectedByOwnVehicle) {}
+    FSharedWalkerDatas() : WalkerID(-1), Location(FVector::ZeroVector), Timestamp(0.0f), bDetectedByOwnVehicle(false), Version(0) {}
+    FSharedWalkerDatas(int32 InWalkerID, FVector InLocation, float InTimestamp, bool InDetectedByOwnVehicle = false, int32 InVersion = 1)
+        : WalkerID(InWalkerID), Location(InLocation), Timestamp(InTimestamp), bDetectedByOwnVehicle(InDetectedByOwnVehicle), Version(InVersion) {}
 };
 
 UCLASS()
@@ -38,7 +39,8 @@ public:
     // Getter for tracked walkers
     const TMap<int32, FSharedWalkerDatas>& GetTrackedWalkers() const;
     
-    void UpdateWalkerData(int32 WalkerID, const FVector& Location, float Timestamp, bool bDetectedByOwnVehicle);
+    // Returns true if the data was newer than the tracked entry and replaced it
+    bool UpdateWalkerData(int32 WalkerID, const FVector& Location, float Timestamp, bool bDetectedByOwnVehicle);
 
     FCriticalSection& GetDataLock() { return DataLock; }
 
@@ -0,0 +1,126 @@
+import carla
+from collections import namedtuple
+
+from DemonstrationLevelUtils import spawn_vehicle, attach_sensors_to_vehicle, spawn_walker_near_car
+
+# Town02 spans x 0..190 and y 105..307, parked actors wait far outside it and above ground
+VEHICLE_PARKING = carla.Location(x=-500.0, y=-500.0, z=50.0)
+WALKER_PARKING = carla.Location(x=-500.0, y=-1500.0, z=50.0)
+PARKING_SPACING = 10.0
+
+PooledVehicle = namedtuple("PooledVehicle", ["vehicle", "walker_detection_sensor", "v2v_broadcast_sensor", "slot"])
+PooledWalker = namedtuple("PooledWalker", ["walker", "slot"])
+
+class ActorPool:
+    """
+    Vehicles with both sensors and walkers spawned once and reused by the trigger zones.
+
+    Spawning and destroying actors is the most expensive work the server does, so the
+    actors are spawned up front and parked out of view with physics disabled. acquire_*
+    teleports a parked actor into place and release_* parks it again. When every actor
+    of a kind is in use, a new one is spawned and joins the pool.
+    """
+
+    def __init__(self, world, blueprint_library, walker_detection_sensor_bp, v2v_broadcast_sensor_bp,
+                 vehicles=2, walkers=3):
+        self.world = world
+        self.blueprint_library = blueprint_library
+        self.walker_detection_sensor_bp = walker_detection_sensor_bp
+        self.v2v_broadcast_sensor_bp = v2v_broadcast_sensor_bp
+        self._vehicles = []
+        self._walkers = []
+        self._free_vehicles = []
+        self._free_walkers = []
+        for _ in range(vehicles):
+            pooled = self._spawn_vehicle()
+            if pooled:
+                self._free_vehicles.append(pooled)
+        for _ in range(walkers):
+            pooled = self._spawn_walker()
+            if pooled:
+                self._free_walkers.append(pooled)
+        print(f"Actor pool ready: {len(self._vehicles)} vehicles, {len(self._walkers)} walkers.")
+
+    def acquire_vehicle(self, transform):
+        """Moves a pooled vehicle with its sensors to transform and returns it, or None if none could be spawned."""
+        pooled = self._free_vehicles.pop() if self._free_vehicles else self._spawn_vehicle()
+        if not pooled:
+            return None
+        vehicle = pooled.vehicle
+        vehicle.set_transform(transform)
+        vehicle.set_target_velocity(carla.Vector3D())
+        vehicle.apply_control(carla.VehicleControl())
+        vehicle.set_simulate_physics(True)
+        return pooled
+
+    def release_vehicle(self, pooled):
+        """Parks a vehicle returned by acquire_vehicle."""
+        if not pooled:
+            return
+        vehicle = pooled.vehicle
+        vehicle.apply_control(carla.VehicleControl(brake=1.0))
+        vehicle.set_target_velocity(carla.Vector3D())
+        vehicle.set_simulate_physics(False)
+        vehicle.set_transform(self._parking_transform(VEHICLE_PARKING, pooled.slot))
+        self._free_vehicles.append(pooled)
+
+    def acquire_walker(self, transform):
+        """Moves a pooled walker to transform and returns it, or None if none could be spawned."""
+        pooled = self._free_walkers.pop() if self._free_walkers else self._spawn_walker()
+        if not pooled:
+            return None
+        pooled.walker.set_transform(transform)
+        pooled.walker.set_simulate_physics(True)
+        return pooled
+
+    def release_walker(self, pooled):
+        """Parks a walker returned by acquire_walker."""
+        if not pooled:
+            return
+        walker = pooled.walker
+        walker.apply_control(carla.WalkerControl())
+        walker.set_simulate_physics(False)
+        walker.set_transform(self._parking_transform(WALKER_PARKING, pooled.slot))
+        self._free_walkers.append(pooled)
+
+    def destroy(self):
+        """Stops the sensors and destroys every pooled actor."""
+        for pooled in self._vehicles:
+            for sensor in (pooled.walker_detection_sensor, pooled.v2v_broadcast_sensor):
+                if sensor:
+                    sensor.stop()
+                    sensor.destroy()
+            pooled.vehicle.destroy()
+        for pooled in self._walkers:
+            pooled.walker.destroy()
+        print(f"Destroyed actor pool: {len(self._vehicles)} vehicles, {len(self._walkers)} walkers.")
+        self._vehicles, self._walkers, self._free_vehicles, self._free_walkers = [], [], [], []
+
+    def _parking_transform(self, origin, slot):
+        return carla.Transform(carla.Location(x=origin.x + slot * PARKING_SPACING, y=origin.y, z=origin.z))
+
+    def _spawn_vehicle(self):
+        slot = len(self._vehicles)
+        parking = self._parking_transform(VEHICLE_PARKING, slot)
+        vehicle = spawn_vehicle(self.world, self.blueprint_library, parking.location.x, parking.location.y,
+                                parking.location.z, 0.0)
+        if not vehicle:
+            return None
+        vehicle.set_simulate_physics(False)
+        walker_detection_sensor, v2v_broadcast_sensor = attach_sensors_to_vehicle(
+            self.world, self.walker_detection_sensor_bp, self.v2v_broadcast_sensor_bp, vehicle
+        )
+        pooled = PooledVehicle(vehicle, walker_detection_sensor, v2v_broadcast_sensor, slot)
+        self._vehicles.append(pooled)
+        return pooled
+
+    def _spawn_walker(self):
+        slot = len(self._walkers)
+        walker = spawn_walker_near_car(self.world, self.blueprint_library,
+                                       self._parking_transform(WALKER_PARKING, slot), 0.0, 0.0, 0.0)
+        if not walker:
+            return None
+        walker.set_simulate_physics(False)
+        pooled = PooledWalker(walker, slot)
+        self._walkers.append(pooled)
+        return pooled
@@ -14,7 +14,7 @@ import carla
 import random
 
 def spawn_vehicle(world, blueprint_library, x1, y1, z1, rotation):
-    """Spawns a vehicle at the specified location."""
+    """Spawns a vehicle at the specified location. Pass a BlueprintCache to avoid scanning the library on every call."""
     vehicle_bp = random.choice(blueprint_library.filter('vehicle.*'))
     vehicle_transform = carla.Transform(
         carla.Location(x=x1, y=y1, z=z1),
@@ -58,13 +58,18 @@ def attach_sensors_to_vehicle(world, walker_detection_sensor_bp, v2v_broadcast_s
     return walker_detection_sensor, v2v_broadcast_sensor
 
 
+def offset_transform(transform, x1, y1, z1):
+    """Returns transform moved by (x1, y1, z1) in world coordinates, keeping its rotation."""
+    return carla.Transform(
+        transform.location + carla.Location(x=x1, y=y1, z=z1),
+        transform.rotation
+    )
+
+
 def spawn_walker_near_car(world, blueprint_library, vehicle_transform, x1, y1, z1):
-    """Spawns a walker near the given vehicle transform."""
+    """Spawns a walker near the given vehicle transform. Pass a BlueprintCache to avoid scanning the library on every call."""
     walker_bp = random.choice(blueprint_library.filter('walker.*'))
-    walker_transform = carla.Transform(
-        vehicle_transform.location + carla.Location(x=x1, y=y1, z=z1),
-        vehicle_transform.rotation
-    )
+    walker_transform = offset_transform(vehicle_transform, x1, y1, z1)
     walker = world.spawn_actor(walker_bp, walker_transform)
     if walker:
         print(f"Spawned walker: {walker.type_id} at {walker_transform.location}")
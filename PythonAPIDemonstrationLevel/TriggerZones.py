@@ -0,0 +1,128 @@
+import json
+import math
+from collections import namedtuple
+
+import carla
+from DemonstrationLevelUtils import offset_transform
+
+# Zones are looked up in a uniform grid once there are more than this many
+GRID_THRESHOLD = 16
+
+TriggerZone = namedtuple("TriggerZone", ["name", "x_min", "x_max", "y_min", "y_max", "duration", "actors"])
+ActiveZone = namedtuple("ActiveZone", ["zone", "ends_at", "vehicles", "walkers"])
+
+
+def load_trigger_zones(path):
+    """Loads the trigger zones and the grid cell size from a JSON config file."""
+    with open(path, "r") as f:
+        config = json.load(f)
+
+    zones = []
+    for index, zone_cfg in enumerate(config.get("zones", [])):
+        name = zone_cfg.get("name", f"zone {index + 1}")
+        (x_min, x_max), (y_min, y_max) = sorted(zone_cfg["x"]), sorted(zone_cfg["y"])
+        actors = tuple(zone_cfg.get("actors", []))
+        for actor_cfg in actors:
+            if actor_cfg.get("type") not in ("vehicle", "walker"):
+                raise ValueError(f"{name}: actor type must be 'vehicle' or 'walker', got {actor_cfg.get('type')!r}")
+        zones.append(TriggerZone(name, x_min, x_max, y_min, y_max, float(zone_cfg.get("duration", 8.0)), actors))
+    return zones, float(config.get("grid_cell_size", 50.0))
+
+
+class TriggerZoneEngine:
+    """
+    Checks the spectator against trigger zones once per tick and runs their actions.
+
+    A zone fires while the spectator is inside it and it is not already active. Its
+    actors come from the ActorPool and are returned when the zone's duration has passed
+    in simulation time, so zones never block each other and overlapping zones fire on
+    the same tick. With many zones, only those whose grid cells hold the spectator are
+    tested.
+    """
+
+    def __init__(self, world, actor_pool, zones, spectator=None, grid_cell_size=50.0):
+        self.world = world
+        self.actor_pool = actor_pool
+        self.zones = list(zones)
+        self.spectator = spectator if spectator is not None else world.get_spectator()
+        self.active = {}  # Zone name -> ActiveZone
+        self.grid_cell_size = grid_cell_size
+        self._grid = self._build_grid() if len(self.zones) > GRID_THRESHOLD else None
+
+    def update(self, snapshot):
+        """Releases the zones whose time is up and fires the zones the spectator is in."""
+        now = snapshot.timestamp.elapsed_seconds
+        for name, active in list(self.active.items()):
+            if now >= active.ends_at:
+                self._release(active)
+                del self.active[name]
+
+        spectator_snapshot = snapshot.find(self.spectator.id)
+        spectator_transform = (spectator_snapshot.get_transform() if spectator_snapshot is not None
+                               else self.spectator.get_transform())
+        location = spectator_transform.location
+        for zone in self._candidates(location.x, location.y):
+            if zone.name in self.active:
+                continue
+            if zone.x_min <= location.x <= zone.x_max and zone.y_min <= location.y <= zone.y_max:
+                print(f"Spectator is within {zone.name}: {location}")
+                self.active[zone.name] = self._fire(zone, spectator_transform, now)
+
+    def release_all(self):
+        """Returns the actors of every active zone to the pool."""
+        for active in self.active.values():
+            self._release(active)
+        self.active = {}
+
+    def _fire(self, zone, spectator_transform, now):
+        placed = {"spectator": spectator_transform}
+        vehicles, walkers = [], []
+        for actor_cfg in zone.actors:
+            if "relative_to" in actor_cfg:
+                anchor = placed.get(actor_cfg["relative_to"])
+                if anchor is None:
+                    print(f"{zone.name}: '{actor_cfg['relative_to']}' was not placed, skipping {actor_cfg.get('id')}.")
+                    continue
+                transform = offset_transform(anchor, *actor_cfg.get("offset", (0.0, 0.0, 0.0)))
+            else:
+                x, y, z = actor_cfg["location"]
+                transform = carla.Transform(carla.Location(x=x, y=y, z=z), carla.Rotation(yaw=actor_cfg.get("yaw", 0.0)))
+
+            if actor_cfg["type"] == "vehicle":
+                pooled = self.actor_pool.acquire_vehicle(transform)
+                if not pooled:
+                    continue
+                if actor_cfg.get("throttle"):
+                    pooled.vehicle.apply_control(carla.VehicleControl(throttle=actor_cfg["throttle"], steer=0.0))
+                vehicles.append(pooled)
+            else:
+                pooled = self.actor_pool.acquire_walker(transform)
+                if not pooled:
+                    continue
+                walkers.append(pooled)
+            placed[actor_cfg.get("id", actor_cfg["type"])] = transform
+        return ActiveZone(zone, now + zone.duration, vehicles, walkers)
+
+    def _release(self, active):
+        for pooled in active.walkers:
+            self.actor_pool.release_walker(pooled)
+        for pooled in active.vehicles:
+            self.actor_pool.release_vehicle(pooled)
+        print(f"Released the actors of {active.zone.name}.")
+
+    def _cell(self, x, y):
+        return math.floor(x / self.grid_cell_size), math.floor(y / self.grid_cell_size)
+
+    def _build_grid(self):
+        grid = {}
+        for zone in self.zones:
+            (cx_min, cy_min), (cx_max, cy_max) = self._cell(zone.x_min, zone.y_min), self._cell(zone.x_max, zone.y_max)
+            for cx in range(cx_min, cx_max + 1):
+                for cy in range(cy_min, cy_max + 1):
+                    grid.setdefault((cx, cy), []).append(zone)
+        return grid
+
+    def _candidates(self, x, y):
+        if self._grid is None:
+            return self.zones
+        return self._grid.get(self._cell(x, y), ())
@@ -10,9 +10,17 @@ try:
 except IndexError:
     pass
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ScenarioTown02Maker'))
+
+import asyncio
+
 import carla
-import time
-from DemonstrationLevelUtils import spawn_vehicle, attach_sensors_to_vehicle, spawn_walker_near_car
+from utils.async_client import AsyncCarlaClient
+from utils.blueprint_cache import BlueprintCache
+from ActorPool import ActorPool
+from TriggerZones import TriggerZoneEngine, load_trigger_zones
+
+TRIGGER_ZONES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trigger_zones.json')
 
 # min x coordinates = 0
 # max x coordinates = 190
@@ -21,177 +29,91 @@ from DemonstrationLevelUtils import spawn_vehicle, attach_sensors_to_vehicle, sp
 
 def main():
     try:
-        # Connect to the CARLA server
-        client = carla.Client('localhost', 2000)
-        client.set_timeout(10.0)
-        
-        # Get the world
-        world = client.get_world()
-
-        # Get the blueprint library
-        blueprint_library = world.get_blueprint_library()
-
-        # Find the sensor blueprints
-        walker_detection_sensor_bp = blueprint_library.find('sensor.other.walker_detection')
-        v2v_broadcast_sensor_bp = blueprint_library.find('sensor.other.v2v_broadcast')
-
-        if not walker_detection_sensor_bp or not v2v_broadcast_sensor_bp:
-            print("Required sensors not found. Ensure they are added and recompiled.")
-            return
-
-        # Find the spectator (camera) actor
-        spectator = world.get_spectator()
-        spectator_transform = carla.Transform(
-            carla.Location(x=-7.5, y=205.0, z=1.0),  # Set the desired location (x, y, z)
-            carla.Rotation(pitch= 0.0, yaw=90.0, roll=0.0)  # Set the desired rotation (pitch, yaw, roll)
-        )
-        spectator.set_transform(spectator_transform)
-        print(f"Moved spectator to: {spectator_transform.location}")
-        if spectator:
-            # Attach the Walker Detection Sensor to the spectator's vehicle
-            vehicle_transform = spectator.get_transform()
-            print("Spectator vehicle transform:", vehicle_transform)
-
-            sensor_transform = carla.Transform(carla.Location(z=1))  # Place it above the vehicle
-
-            walker_detection_sensor = world.spawn_actor(
-                walker_detection_sensor_bp, 
-                sensor_transform, 
-                attach_to=spectator
-            )
-            print("Walker Detection Sensor attached to the spectator vehicle.")
-
-            time.sleep(0.5)
-
-            v2v_broadcast_sensor = world.spawn_actor(
-                v2v_broadcast_sensor_bp,
-                sensor_transform,
-                attach_to=spectator
-            )
-            print("V2V Broadcast Sensor attached to the spectator vehicle.")
-
-            walker_detection_sensor.listen(lambda _: None)
-            v2v_broadcast_sensor.listen(lambda _: None)
-
-        # Wait for 5 seconds before spawning the walker
-        time.sleep(0.5)
-
-        # Spawn extra vehicles with sensors in a loop
-
-        while True:
-            spectator_location = spectator.get_transform().location
-
-            if  200 <= spectator_location.y <= 210 and -8 <= spectator_location.x <= -3:
-                print(f"Spectator is within the target range 1: {spectator_location}")
-
-                # Spawn a vehicle
-                vehicle1 = spawn_vehicle(world, blueprint_library, -3.5, 225, 1.0, -90.0)
-                walker_detection_sensor = None
-                v2v_broadcast_sensor = None
-
-                if vehicle1:
-                    # Attach sensors to the vehicle
-                    walker_detection_sensor, v2v_broadcast_sensor = attach_sensors_to_vehicle(
-                        world, walker_detection_sensor_bp, v2v_broadcast_sensor_bp, vehicle1
-                    )
-
-                time.sleep(0.5)
-
-                # Wait for 8 seconds
-                time.sleep(8)
-
-                # Cleanup: Destroy sensors and vehicle
-                if walker_detection_sensor:
-                    walker_detection_sensor.stop()
-                    walker_detection_sensor.destroy()
-                    print("Destroyed Walker Detection Sensor.")
-
-                if v2v_broadcast_sensor:
-                    v2v_broadcast_sensor.stop()
-                    v2v_broadcast_sensor.destroy()
-                    print("Destroyed V2V Broadcast Sensor.")
-
-                if vehicle1:
-                    vehicle1.destroy()
-                    print("Destroyed vehicle.")
-
-            else:
-                print(f"Spectator is outside the target range 1: {spectator_location}")
-                time.sleep(1)
-            
-            if 240 <= spectator_location.y <= 280 and -8 <= spectator_location.x <= -3:
-                print(f"Spectator is within the target range 2: {spectator_location}")
-
-                walker = spawn_walker_near_car(world, blueprint_library, spectator.get_transform(), 7, 6, 0.5)
-                walker2 = spawn_walker_near_car(world, blueprint_library, spectator.get_transform(), -4, 6, 0.5)
-
-                # Wait for 8 seconds
-                time.sleep(8)
-
-                if walker:
-                    walker.destroy()
-                    print("Destroyed walker.")
-                if walker2:
-                    walker2.destroy()
-                    print("Destroyed walker2.")
-                time.sleep(0.5)
-            else:
-                print(f"Spectator is outside the target range 2: {spectator_location}")
-                time.sleep(1)
-
-            # Check if the spectator's location is within the specified range
-            if 300 <= spectator_location.y <= 310 and 70 <= spectator_location.x <= 80:
-                print(f"Spectator is within the target range 3: {spectator_location}")
-                # Spawn a vehicle
-                vehicle = spawn_vehicle(world, blueprint_library, 174.5, 302.22, 1.0, 180.0)
-                walker_detection_sensor = None
-                v2v_broadcast_sensor = None
-
-                if vehicle:
-                    # Attach sensors to the vehicle
-                    walker_detection_sensor, v2v_broadcast_sensor = attach_sensors_to_vehicle(
-                        world, walker_detection_sensor_bp, v2v_broadcast_sensor_bp, vehicle
-                    )
-
-                time.sleep(0.5)
-
-                # Spawn a walker
-                walker = spawn_walker_near_car(world, blueprint_library, vehicle.get_transform(), -2, -3, 0.5)
-
-                # Make the vehicle move forward
-                vehicle.apply_control(carla.VehicleControl(throttle=1.0, steer=0.0))
-
-                # Wait for 8 seconds
-                time.sleep(8)
-
-                # Cleanup: Destroy sensors and vehicle
-                if walker_detection_sensor:
-                    walker_detection_sensor.stop()
-                    walker_detection_sensor.destroy()
-                    print("Destroyed Walker Detection Sensor.")
-
-                if v2v_broadcast_sensor:
-                    v2v_broadcast_sensor.stop()
-                    v2v_broadcast_sensor.destroy()
-                    print("Destroyed V2V Broadcast Sensor.")
-
-                if walker:
-                    walker.destroy()
-                    print("Destroyed walker.")
-
-                if vehicle:
-                    vehicle.destroy()
-                    print("Destroyed vehicle.")
-            else:
-                print(f"Spectator is outside the target range 2: {spectator_location}")
-                time.sleep(1)
-
+        asyncio.run(run_level())
     except KeyboardInterrupt:
-        print("\nKeyboardInterrupt detected. Cleaning up...")
-    except Exception as e:
-        print(f"An error occurred: {e}")
-    finally:
-        print("Cleaned up and exiting.")
+        print("\nKeyboardInterrupt detected, cleaned up and exiting.")
+
+async def run_level():
+    # Connect to the CARLA server
+    client = carla.Client('localhost', 2000)
+    client.set_timeout(10.0)
+
+    # Blocking calls run on the façade's thread pool, the level itself runs on the event loop
+    async with AsyncCarlaClient(client) as carla_async:
+        actor_pool = None  # Ensure actor_pool is defined for cleanup in finally block
+        trigger_engine = None
+        try:
+            # Get the world
+            world = carla_async.world
+
+            # Get the blueprint library, with the blueprints used by the triggers resolved once
+            blueprint_library = BlueprintCache(world.get_blueprint_library())
+            await carla_async.run(blueprint_library.preload, patterns=('vehicle.*', 'walker.*'))
+
+            # Find the sensor blueprints
+            walker_detection_sensor_bp = blueprint_library.find('sensor.other.walker_detection')
+            v2v_broadcast_sensor_bp = blueprint_library.find('sensor.other.v2v_broadcast')
+
+            if not walker_detection_sensor_bp or not v2v_broadcast_sensor_bp:
+                print("Required sensors not found. Ensure they are added and recompiled.")
+                return
+
+            # Find the spectator (camera) actor
+            spectator = world.get_spectator()
+            spectator_transform = carla.Transform(
+                carla.Location(x=-7.5, y=205.0, z=1.0),  # Set the desired location (x, y, z)
+                carla.Rotation(pitch= 0.0, yaw=90.0, roll=0.0)  # Set the desired rotation (pitch, yaw, roll)
+            )
+            await carla_async.run(spectator.set_transform, spectator_transform)
+            print(f"Moved spectator to: {spectator_transform.location}")
+            if spectator:
+                # Attach the Walker Detection Sensor to the spectator's vehicle
+                vehicle_transform = spectator.get_transform()
+                print("Spectator vehicle transform:", vehicle_transform)
+
+                sensor_transform = carla.Transform(carla.Location(z=1))  # Place it above the vehicle
+
+                walker_detection_sensor = await carla_async.spawn_actor(
+                    walker_detection_sensor_bp,
+                    sensor_transform,
+                    attach_to=spectator
+                )
+                print("Walker Detection Sensor attached to the spectator vehicle.")
+
+                await asyncio.sleep(0.5)
+
+                v2v_broadcast_sensor = await carla_async.spawn_actor(
+                    v2v_broadcast_sensor_bp,
+                    sensor_transform,
+                    attach_to=spectator
+                )
+                print("V2V Broadcast Sensor attached to the spectator vehicle.")
+
+                walker_detection_sensor.listen(lambda _: None)
+                v2v_broadcast_sensor.listen(lambda _: None)
+
+            # Wait for 5 seconds before spawning the walker
+            await asyncio.sleep(0.5)
+
+            # Vehicles with sensors and walkers used by the triggers are spawned once and parked out of view
+            actor_pool = await carla_async.run(ActorPool, world, blueprint_library, walker_detection_sensor_bp,
+                                               v2v_broadcast_sensor_bp, vehicles=2, walkers=3)
+
+            # Trigger zones are checked against every tick's snapshot, their actors return to the pool on their own timers
+            zones, grid_cell_size = load_trigger_zones(TRIGGER_ZONES_FILE)
+            trigger_engine = TriggerZoneEngine(world, actor_pool, zones, spectator=spectator, grid_cell_size=grid_cell_size)
+
+            while True:
+                trigger_engine.update(await carla_async.next_tick())
+
+        except Exception as e:
+            print(f"An error occurred: {e}")
+        finally:
+            if trigger_engine:
+                trigger_engine.release_all()
+            if actor_pool:
+                actor_pool.destroy()
+            print("Cleaned up and exiting.")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
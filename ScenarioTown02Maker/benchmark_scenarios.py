@@ -0,0 +1,74 @@
+# benchmark_scenarios.py
+import argparse
+import glob
+import importlib
+import os
+import sys
+
+try:
+    sys.path.append(glob.glob('../PythonAPI/carla/dist/carla-*%d.%d-%s.egg' % (
+        sys.version_info.major,
+        sys.version_info.minor,
+        'win-amd64' if os.name == 'nt' else 'linux-x86_64'))[0])
+except IndexError:
+    pass
+
+from scenario.scenario_benchmark import (
+    benchmark_cases, write_scenarios, run_benchmarks, write_baseline, load_baseline, compare_baseline, DEFAULT_TICKS,
+)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure scenario setup and per-tick cost on synthetic scenarios of growing size.")
+    parser.add_argument("--vehicles", type=int, nargs="+", default=[10, 50, 100], help="Vehicle counts to generate")
+    parser.add_argument("--walkers", type=int, nargs="+", default=[10, 50], help="Walker counts to generate")
+    parser.add_argument("--route-length", type=int, nargs="+", default=[3], dest="route_lengths",
+                        help="Spawn points per vehicle route and walker go_to_point list")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="Ticks to run per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated scenarios")
+    parser.add_argument("--no-sensors", action="store_true", help="Do not attach walker detection and V2V sensors")
+    parser.add_argument("--map", default="Town02", help="Map whose spawn point dump the scenarios are generated for")
+    parser.add_argument("--scenario-dir", default="benchmarks/scenarios", help="Where the generated scenarios are written")
+    parser.add_argument("--server", default="localhost:2000:8000", metavar="HOST:PORT[:TM_PORT]",
+                        help="CARLA server endpoint")
+    parser.add_argument("--carla-module", default="carla",
+                        help="Module to use as carla, e.g. carla_standin to benchmark the client side alone")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also record the peak of Python allocations, at the cost of slower timings")
+    parser.add_argument("--output", default="benchmarks/baseline.json", help="Where to write the results")
+    parser.add_argument("--compare", metavar="BASELINE", help="Baseline to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Relative increase over the baseline reported as a regression")
+    parser.add_argument("--generate-only", action="store_true", help="Write the scenarios and exit")
+    args = parser.parse_args()
+
+    # The walker spawn table is read from the map's spawn point dump, no server needed
+    sys.modules["carla"] = importlib.import_module(args.carla_module)
+    from utils.walker_utils import WalkerSpawnTable
+
+    cases = benchmark_cases(args.vehicles, args.walkers, args.route_lengths)
+    walker_table = WalkerSpawnTable.from_file(map_name=args.map)
+    scenarios = write_scenarios(cases, args.scenario_dir, walker_table, args.ticks, args.seed, not args.no_sensors)
+    print(f"Generated {len(scenarios)} scenarios in {args.scenario_dir}")
+    if args.generate_only:
+        return
+
+    document = run_benchmarks(scenarios, args.server, carla_module=args.carla_module, max_ticks=args.ticks,
+                              trace_memory=args.trace_memory)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    write_baseline(document, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        if baseline.get("trace_memory") != document["trace_memory"]:
+            print("Warning: only one of the runs traced memory, its timings are not comparable")
+        regressions = compare_baseline(document, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression over {args.compare}")
+
+if __name__ == "__main__":
+    main()
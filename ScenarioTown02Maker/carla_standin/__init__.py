@@ -0,0 +1,618 @@
+# carla_standin
+"""
+In-process stand-in for the subset of the carla module used by the scenario tools.
+
+It lets the scenario runner and its scheduling be exercised without a CARLA server:
+every Client owns its own World with the Town02 spawn points from
+Town02SpawnPoints/SpawnPointLocation.txt. Vehicles and walkers move kinematically and
+the ConcludedSensor sensors are faked, see simulation.py.
+
+Every call that would be a round trip to the server counts in World.rpc_calls and
+sleeps for the configured latency, so tick cost and scaling can be measured with a
+realistic network cost. Read-only getters on actors are served locally, like the real
+client serves them from its episode cache. The environment variables
+CARLA_STANDIN_LATENCY (seconds per RPC), CARLA_STANDIN_KINEMATICS and
+CARLA_STANDIN_SENSORS (0 to disable) set the defaults; configure() changes them.
+"""
+import fnmatch
+import itertools
+import math
+import os
+import time
+from pathlib import Path
+
+from carla_standin import command, simulation
+
+SPAWN_POINTS_FILE = Path(__file__).resolve().parent.parent / "Town02SpawnPoints" / "SpawnPointLocation.txt"
+
+_options = {
+    "rpc_latency": float(os.environ.get("CARLA_STANDIN_LATENCY", "0")),
+    "kinematics": os.environ.get("CARLA_STANDIN_KINEMATICS", "1") != "0",
+    "sensors": os.environ.get("CARLA_STANDIN_SENSORS", "1") != "0",
+}
+
+def configure(rpc_latency=None, kinematics=None, sensors=None):
+    """
+    Changes the defaults of the worlds created afterwards.
+
+    Args:
+        rpc_latency (float): Seconds every server round trip sleeps.
+        kinematics (bool): Whether actors move when the world steps.
+        sensors (bool): Whether the fake sensors fire when the world steps.
+    """
+    for key, value in (("rpc_latency", rpc_latency), ("kinematics", kinematics), ("sensors", sensors)):
+        if value is not None:
+            _options[key] = value
+
+class Vector3D:
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def __add__(self, other):
+        return type(self)(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return type(self)(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def make_unit_vector(self):
+        length = self.length()
+        if length == 0.0:
+            raise ValueError("Cannot normalize a zero-length vector.")
+        return type(self)(self.x / length, self.y / length, self.z / length)
+
+    def distance(self, other):
+        return (self - other).length()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(x={self.x:.6f}, y={self.y:.6f}, z={self.z:.6f})"
+
+class Location(Vector3D):
+    pass
+
+class Rotation:
+    def __init__(self, pitch=0.0, yaw=0.0, roll=0.0):
+        self.pitch = float(pitch)
+        self.yaw = float(yaw)
+        self.roll = float(roll)
+
+    def get_forward_vector(self):
+        pitch = math.radians(self.pitch)
+        yaw = math.radians(self.yaw)
+        return Vector3D(math.cos(pitch) * math.cos(yaw), math.cos(pitch) * math.sin(yaw), math.sin(pitch))
+
+    def __repr__(self):
+        return f"Rotation(pitch={self.pitch:.6f}, yaw={self.yaw:.6f}, roll={self.roll:.6f})"
+
+class Transform:
+    def __init__(self, location=None, rotation=None):
+        self.location = location if location is not None else Location()
+        self.rotation = rotation if rotation is not None else Rotation()
+
+    def get_forward_vector(self):
+        return self.rotation.get_forward_vector()
+
+    def __repr__(self):
+        return f"Transform({self.location}, {self.rotation})"
+
+def _copy_transform(transform):
+    location, rotation = transform.location, transform.rotation
+    return Transform(Location(location.x, location.y, location.z), Rotation(rotation.pitch, rotation.yaw, rotation.roll))
+
+class VehicleControl:
+    def __init__(self, throttle=0.0, steer=0.0, brake=0.0, hand_brake=False, reverse=False):
+        self.throttle = throttle
+        self.steer = steer
+        self.brake = brake
+        self.hand_brake = hand_brake
+        self.reverse = reverse
+
+class WalkerControl:
+    def __init__(self, direction=None, speed=0.0, jump=False):
+        self.direction = direction if direction is not None else Vector3D(1.0, 0.0, 0.0)
+        self.speed = speed
+        self.jump = jump
+
+class LaneType:
+    Driving = 2
+    Sidewalk = 32
+    Any = -2
+
+class WorldSettings:
+    def __init__(self):
+        self.synchronous_mode = False
+        self.fixed_delta_seconds = None
+        self.no_rendering_mode = False
+
+class ActorAttribute:
+    def __init__(self, id, value):
+        self.id = id
+        self.value = value
+
+    def as_float(self):
+        return float(self.value)
+
+    def as_str(self):
+        return str(self.value)
+
+class ActorBlueprint:
+    def __init__(self, id, attributes=None):
+        self.id = id
+        self._attributes = dict(attributes or {})
+
+    def has_attribute(self, key):
+        return key in self._attributes
+
+    def set_attribute(self, key, value):
+        if key not in self._attributes:
+            raise IndexError(f"Blueprint '{self.id}' has no attribute '{key}'.")
+        self._attributes[key] = str(value)
+
+    def get_attribute(self, key):
+        return ActorAttribute(key, self._attributes[key])
+
+    def __iter__(self):
+        return (ActorAttribute(key, value) for key, value in self._attributes.items())
+
+class BlueprintLibrary:
+    def __init__(self, blueprints):
+        self._blueprints = list(blueprints)
+
+    def find(self, id):
+        for bp in self._blueprints:
+            if bp.id == id:
+                return ActorBlueprint(bp.id, bp._attributes)
+        raise IndexError(f"Blueprint '{id}' not found.")
+
+    def filter(self, pattern):
+        return BlueprintLibrary(bp for bp in self._blueprints if fnmatch.fnmatchcase(bp.id, pattern))
+
+    def __iter__(self):
+        return iter(self._blueprints)
+
+    def __len__(self):
+        return len(self._blueprints)
+
+    def __getitem__(self, index):
+        return self._blueprints[index]
+
+BLUEPRINTS = (
+    [ActorBlueprint(id, {"role_name": "autopilot"}) for id in (
+        "vehicle.tesla.model3", "vehicle.mercedes.mercedesvr", "vehicle.audi.tt", "vehicle.lincoln.mkz_2017")]
+    + [ActorBlueprint("walker.pedestrian.%04d" % i, {"is_invincible": "true", "speed": "1.4"}) for i in range(1, 15)]
+    + [
+        ActorBlueprint("sensor.other.walker_detection", {"trace_range": "1000.0"}),
+        ActorBlueprint("sensor.other.v2v_broadcast",
+                       {"broadcast_radius": "1000.0", "delta_updates": "true", "refresh_ttl": "5.0",
+                        "broadcast_period": "1.0", "adaptive_broadcast": "false", "min_broadcast_period": "0.2",
+                        "max_broadcast_period": "2.0", "adaptive_distance": "2000.0", "adaptive_speed": "300.0"}),
+        ActorBlueprint("sensor.other.safe_distance", {"safe_distance_front": "1.0"}),
+        ActorBlueprint("controller.ai.walker"),
+    ]
+)
+
+def load_spawn_points(path=SPAWN_POINTS_FILE):
+    """
+    Reads spawn points dumped in the SpawnPointLocation.txt format.
+
+    Args:
+        path (str or Path): The spawn point dump.
+
+    Returns:
+        list: carla.Transform-like spawn points, in file order.
+    """
+    # Imported here because walker_utils imports carla, which may be this module still loading
+    from utils.walker_utils import read_spawn_point_poses
+
+    return [
+        Transform(Location(x, y, z), Rotation(pitch, yaw, roll))
+        for x, y, z, pitch, yaw, roll in read_spawn_point_poses(path)
+    ]
+
+class Waypoint:
+    def __init__(self, id, transform, road_id, section_id, lane_id):
+        self.id = id
+        self.transform = transform
+        self.road_id = road_id
+        self.section_id = section_id
+        self.lane_id = lane_id
+        self.lane_type = LaneType.Driving
+
+class Map:
+    """Map whose only waypoints are the spawn points, one lane per driving direction."""
+
+    def __init__(self, name, spawn_points):
+        self.name = name
+        self._spawn_points = spawn_points
+        self._waypoints = [
+            Waypoint(i, transform, i // 2, 0, -1 if -45.0 < transform.rotation.yaw <= 135.0 else 1)
+            for i, transform in enumerate(spawn_points)
+        ]
+
+    def get_spawn_points(self):
+        return [_copy_transform(transform) for transform in self._spawn_points]
+
+    def generate_waypoints(self, distance):
+        return list(self._waypoints)
+
+    def get_waypoint(self, location, project_to_road=True, lane_type=LaneType.Driving):
+        return min(self._waypoints, key=lambda waypoint: waypoint.transform.location.distance(location))
+
+class Timestamp:
+    def __init__(self, frame, elapsed_seconds, delta_seconds):
+        self.frame = frame
+        self.elapsed_seconds = elapsed_seconds
+        self.delta_seconds = delta_seconds
+
+class ActorSnapshot:
+    def __init__(self, actor):
+        self.id = actor.id
+        self._transform = actor.get_transform()
+        self._velocity = Vector3D(actor._velocity.x, actor._velocity.y, actor._velocity.z)
+
+    def get_transform(self):
+        return self._transform
+
+    def get_velocity(self):
+        return self._velocity
+
+class WorldSnapshot:
+    def __init__(self, world):
+        self.id = world.id
+        self.frame = world._frame
+        self.timestamp = Timestamp(world._frame, world._elapsed_seconds, world._delta_seconds())
+        self._actors = {actor.id: ActorSnapshot(actor) for actor in world._actors.values()}
+
+    def find(self, actor_id):
+        return self._actors.get(actor_id)
+
+    def has_actor(self, actor_id):
+        return actor_id in self._actors
+
+    def __iter__(self):
+        return iter(self._actors.values())
+
+    def __len__(self):
+        return len(self._actors)
+
+class ActorList:
+    def __init__(self, actors):
+        self._actors = list(actors)
+
+    def filter(self, pattern):
+        return ActorList(actor for actor in self._actors if fnmatch.fnmatchcase(actor.type_id, pattern))
+
+    def find(self, actor_id):
+        return next((actor for actor in self._actors if actor.id == actor_id), None)
+
+    def __iter__(self):
+        return iter(self._actors)
+
+    def __len__(self):
+        return len(self._actors)
+
+    def __getitem__(self, index):
+        return self._actors[index]
+
+class Actor:
+    def __init__(self, world, actor_id, blueprint, transform, parent=None):
+        self._world = world
+        self.id = actor_id
+        self.type_id = blueprint.id
+        self.attributes = dict(blueprint._attributes)
+        self.parent = parent
+        self.is_alive = True
+        self._transform = _copy_transform(transform)
+        self._velocity = Vector3D()
+        self._autopilot = False
+        self._control = None
+        self._simulate_physics = True
+        self._callback = None
+        self._tm_port = None
+        self._roam_target = None  # Spawn point location roamed toward once the path is done
+        self._roam_index = actor_id
+        self._tracked = {}  # Walker detection sensors: walker id -> last detection
+        self._reported = {}  # Walker detection sensors: walker id -> version last sent to the client
+        self._broadcast_elapsed = 0.0  # V2V broadcast sensors: seconds since the last broadcast
+        self._sent = {}  # V2V broadcast sensors: walker id -> (version, time) of its last broadcast
+        self._neighbours = set()  # V2V broadcast sensors: vehicles in range at the last broadcast
+        self._next_broadcast = None  # V2V broadcast sensors: period until the next broadcast, None before the first
+        self._walker_history = {}  # Adaptive V2V broadcast sensors: walker id -> (location, timestamp) last seen
+
+    def get_transform(self):
+        if self.parent is not None:
+            parent_transform = self.parent.get_transform()
+            return Transform(parent_transform.location + self._transform.location, parent_transform.rotation)
+        return _copy_transform(self._transform)
+
+    def get_location(self):
+        return self.get_transform().location
+
+    def get_velocity(self):
+        return Vector3D(self._velocity.x, self._velocity.y, self._velocity.z)
+
+    def set_transform(self, transform):
+        self._world._rpc()
+        self._transform = _copy_transform(transform)
+
+    def set_location(self, location):
+        self._world._rpc()
+        self._transform = Transform(Location(location.x, location.y, location.z), self._transform.rotation)
+
+    def set_simulate_physics(self, enabled=True):
+        self._world._rpc()
+        self._simulate_physics = enabled
+        if not enabled:
+            self._velocity = Vector3D()
+
+    def set_target_velocity(self, velocity):
+        self._world._rpc()
+        self._velocity = Vector3D(velocity.x, velocity.y, velocity.z)
+
+    def apply_control(self, control):
+        self._world._rpc()
+        self._control = control
+
+    def set_autopilot(self, enabled=True, tm_port=8000):
+        self._world._rpc()
+        self._autopilot = enabled
+        self._tm_port = tm_port
+        self._world._traffic_manager(tm_port)._registered[self.id] = enabled
+
+    def listen(self, callback):
+        self._world._rpc()
+        self._callback = callback
+
+    def stop(self):
+        self._world._rpc()
+        self._callback = None
+
+    @property
+    def is_listening(self):
+        return self._callback is not None
+
+    def destroy(self):
+        self._world._rpc()
+        return self._world._destroy(self.id)
+
+class TrafficManager:
+    def __init__(self, world, port):
+        self._world = world
+        self._port = port
+        self._registered = {}
+        self.global_settings = {}
+        self.vehicle_settings = {}
+        self.paths = {}
+
+    def get_port(self):
+        return self._port
+
+    def _set(self, actor, key, value):
+        self._world._rpc()
+        self.vehicle_settings.setdefault(actor.id, {})[key] = value
+
+    def _set_global(self, key, value):
+        self._world._rpc()
+        self.global_settings[key] = value
+
+    def set_synchronous_mode(self, mode=True):
+        self._set_global("synchronous_mode", mode)
+
+    def set_random_device_seed(self, seed):
+        self._set_global("seed", seed)
+
+    def set_global_distance_to_leading_vehicle(self, distance):
+        self._set_global("distance_to_leading_vehicle", distance)
+
+    def global_percentage_speed_difference(self, percentage):
+        self._set_global("percentage_speed_difference", percentage)
+
+    def distance_to_leading_vehicle(self, actor, distance):
+        self._set(actor, "distance_to_leading_vehicle", distance)
+
+    def random_left_lanechange_percentage(self, actor, percentage):
+        self._set(actor, "random_left_lanechange_percentage", percentage)
+
+    def random_right_lanechange_percentage(self, actor, percentage):
+        self._set(actor, "random_right_lanechange_percentage", percentage)
+
+    def auto_lane_change(self, actor, enabled):
+        self._set(actor, "auto_lane_change", enabled)
+
+    def vehicle_percentage_speed_difference(self, actor, percentage):
+        self._set(actor, "percentage_speed_difference", percentage)
+
+    def ignore_lights_percentage(self, actor, percentage):
+        self._set(actor, "ignore_lights_percentage", percentage)
+
+    def set_path(self, actor, path):
+        self._world._rpc()
+        self.paths[actor.id] = list(path)
+
+    def get_vehicle_percentage_speed_difference(self, actor):
+        self._world._rpc()
+        return self.vehicle_settings.get(actor.id, {}).get("percentage_speed_difference", 0.0)
+
+class World:
+    _episode_ids = itertools.count(1)
+
+    def __init__(self, map_name="Carla/Maps/Town02", spawn_points_file=SPAWN_POINTS_FILE):
+        self.id = next(self._episode_ids)
+        self._map = Map(map_name, load_spawn_points(spawn_points_file))
+        self._settings = WorldSettings()
+        self._actors = {}
+        self._actor_ids = itertools.count(1)
+        self._traffic_managers = {}
+        self._frame = 0
+        self._elapsed_seconds = 0.0
+        self._spectator = self._add(ActorBlueprint("spectator"), Transform())
+        self.rpc_latency = _options["rpc_latency"]
+        self.kinematics = _options["kinematics"]
+        self.sensors = _options["sensors"]
+        self.rpc_calls = 0  # Server round trips, batches counting once
+        self._in_batch = False
+
+    def _rpc(self):
+        if self._in_batch:
+            return
+        self.rpc_calls += 1
+        if self.rpc_latency > 0.0:
+            time.sleep(self.rpc_latency)
+
+    def _add(self, blueprint, transform, parent=None):
+        actor = Actor(self, next(self._actor_ids), blueprint, transform, parent)
+        self._actors[actor.id] = actor
+        return actor
+
+    def _destroy(self, actor_id):
+        actor = self._actors.pop(actor_id, None)
+        if actor is None:
+            return False
+        actor.is_alive = False
+        return True
+
+    def _traffic_manager(self, port):
+        if port not in self._traffic_managers:
+            self._traffic_managers[port] = TrafficManager(self, port)
+        return self._traffic_managers[port]
+
+    def _delta_seconds(self):
+        return self._settings.fixed_delta_seconds or 0.05
+
+    def get_map(self):
+        self._rpc()
+        return Map(self._map.name, self._map._spawn_points)
+
+    def get_blueprint_library(self):
+        self._rpc()
+        return BlueprintLibrary(BLUEPRINTS)
+
+    def get_settings(self):
+        self._rpc()
+        settings = WorldSettings()
+        settings.__dict__.update(self._settings.__dict__)
+        return settings
+
+    def apply_settings(self, settings):
+        self._rpc()
+        self._settings.__dict__.update(settings.__dict__)
+        return self._frame
+
+    def get_spectator(self):
+        return self._spectator
+
+    def try_spawn_actor(self, blueprint, transform, attach_to=None):
+        self._rpc()
+        return self._spawn(blueprint, transform, attach_to)
+
+    def _spawn(self, blueprint, transform, attach_to=None):
+        # Mimic the server's collision check for actors spawned on top of each other
+        if attach_to is None and blueprint.id.startswith(("vehicle.", "walker.")):
+            for actor in self._actors.values():
+                if (actor.parent is None and actor.type_id.startswith(("vehicle.", "walker."))
+                        and actor._transform.location.distance(transform.location) < 1.0):
+                    return None
+        return self._add(blueprint, transform, attach_to)
+
+    def spawn_actor(self, blueprint, transform, attach_to=None):
+        actor = self.try_spawn_actor(blueprint, transform, attach_to)
+        if actor is None:
+            raise RuntimeError("Spawn failed because of collision at spawn position")
+        return actor
+
+    def get_actor(self, actor_id):
+        self._rpc()
+        return self._actors.get(actor_id)
+
+    def get_actors(self, actor_ids=None):
+        self._rpc()
+        if actor_ids is None:
+            return ActorList(self._actors.values())
+        return ActorList(self._actors[actor_id] for actor_id in actor_ids if actor_id in self._actors)
+
+    def get_snapshot(self):
+        return WorldSnapshot(self)
+
+    def set_pedestrians_cross_factor(self, percentage):
+        self._rpc()
+
+    def _step(self):
+        delta_seconds = self._delta_seconds()
+        self._frame += 1
+        self._elapsed_seconds += delta_seconds
+        simulation.step(self, delta_seconds)
+        return self._frame
+
+    def tick(self, seconds=10.0):
+        self._rpc()
+        return self._step()
+
+    def wait_for_tick(self, seconds=10.0):
+        self._rpc()
+        self._step()
+        return WorldSnapshot(self)
+
+    def _execute_batch(self, commands, due_tick_cue=False):
+        self._rpc()
+        self._in_batch = True
+        try:
+            responses = [self._execute(cmd) for cmd in commands]
+            if due_tick_cue:
+                self._step()
+        finally:
+            self._in_batch = False
+        return responses
+
+    def _execute(self, cmd, future_actor_id=None):
+        if isinstance(cmd, command.SpawnActor):
+            parent = self._actors.get(cmd.parent_id) if cmd.parent_id else None
+            actor = self._spawn(cmd.blueprint, cmd.transform, parent)
+            if actor is None:
+                return command.Response(0, "Spawn failed because of collision at spawn position")
+            for followup in cmd.followups:
+                response = self._execute(followup, actor.id)
+                if response.error:
+                    return command.Response(actor.id, response.error)
+            return command.Response(actor.id)
+
+        actor_id = future_actor_id if cmd.actor_id is command.FutureActor else cmd.actor_id
+        actor = self._actors.get(actor_id)
+        if actor is None:
+            return command.Response(0, f"Actor {actor_id} not found")
+        if isinstance(cmd, command.DestroyActor):
+            actor.destroy()
+        elif isinstance(cmd, command.SetAutopilot):
+            actor.set_autopilot(cmd.enabled, cmd.tm_port)
+        elif isinstance(cmd, command.ApplyVehicleControl):
+            actor.apply_control(cmd.control)
+        elif isinstance(cmd, command.ApplyTransform):
+            actor.set_transform(cmd.transform)
+        elif isinstance(cmd, command.SetSimulatePhysics):
+            actor.set_simulate_physics(cmd.enabled)
+        return command.Response(actor.id)
+
+class Client:
+    def __init__(self, host="localhost", port=2000, worker_threads=0):
+        self.host = host
+        self.port = port
+        self._world = World()
+
+    def set_timeout(self, seconds):
+        pass
+
+    def get_world(self):
+        self._world._rpc()
+        return self._world
+
+    def get_trafficmanager(self, port=8000):
+        return self._world._traffic_manager(port)
+
+    def apply_batch_sync(self, commands, due_tick_cue=False):
+        return self._world._execute_batch(commands, due_tick_cue)
+
+    def apply_batch(self, commands):
+        self._world._execute_batch(commands)
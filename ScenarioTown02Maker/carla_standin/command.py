@@ -0,0 +1,56 @@
+# command.py
+"""Batch commands of the stand-in server, mirroring carla.command."""
+
+class FutureActor:
+    """Placeholder for the id of the actor spawned by the enclosing SpawnActor."""
+
+class Response:
+    def __init__(self, actor_id=0, error=""):
+        self.actor_id = actor_id
+        self.error = error
+
+    def has_error(self):
+        return bool(self.error)
+
+class _Command:
+    def __init__(self, actor_id=None):
+        self.actor_id = actor_id
+        self.followups = []
+
+    def then(self, command):
+        self.followups.append(command)
+        return self
+
+class SpawnActor(_Command):
+    def __init__(self, blueprint, transform, parent_id=None):
+        super().__init__()
+        self.blueprint = blueprint
+        self.transform = transform
+        self.parent_id = parent_id
+
+class DestroyActor(_Command):
+    pass
+
+class SetAutopilot(_Command):
+    def __init__(self, actor_id, enabled, tm_port=8000):
+        super().__init__(actor_id)
+        self.enabled = enabled
+        self.tm_port = tm_port
+
+class ApplyVehicleControl(_Command):
+    def __init__(self, actor_id, control):
+        super().__init__(actor_id)
+        self.control = control
+
+class ApplyWalkerControl(ApplyVehicleControl):
+    pass
+
+class ApplyTransform(_Command):
+    def __init__(self, actor_id, transform):
+        super().__init__(actor_id)
+        self.transform = transform
+
+class SetSimulatePhysics(_Command):
+    def __init__(self, actor_id, enabled):
+        super().__init__(actor_id)
+        self.enabled = enabled
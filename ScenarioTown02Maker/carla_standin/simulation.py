@@ -0,0 +1,336 @@
+# simulation.py
+"""
+Kinematics and fake sensors of the stand-in server, advanced once per world step.
+
+Vehicles under a Traffic Manager drive at the Traffic Manager speed toward the points
+of their set_path, then roam between spawn points. Other vehicles follow their last
+VehicleControl and walkers their last WalkerControl. There is no collision, only
+straight-line motion, which is enough to give the client code realistic workloads.
+
+Sensors mimic the ConcludedSensor plugins: walker detection sensors track walkers
+within trace_range of their parent, V2V broadcast sensors share their vehicle's tracked
+walkers with every vehicle within broadcast_radius once per broadcast period, and safe
+distance sensors report vehicles right in front of their parent. Like the plugin, V2V
+broadcasts only carry the entries that changed since the last broadcast, or were not
+sent for refresh_ttl seconds, except to vehicles that just came in range. With
+adaptive_broadcast, the period shrinks toward min_broadcast_period as tracked walkers
+get closer or faster and grows toward max_broadcast_period otherwise. Walker
+detection sensors report deltas too: the entries whose version changed since their last
+event, and {"Removed": True} for the walkers they stopped tracking. Actors are
+looked up in a uniform grid rebuilt every step, so the cost grows with the number of
+sensors and their neighbours rather than with the square of the actor count.
+"""
+import math
+
+import numpy as np
+
+import carla_standin
+
+TM_DEFAULT_SPEED = 30.0 / 3.6  # Traffic Manager default target speed, m/s
+ACCELERATION = 3.0  # m/s²
+BRAKING = 8.0  # m/s²
+MAX_MANUAL_SPEED = 15.0  # m/s
+MAX_STEER_RATE = 70.0  # deg/s at full steer
+PATH_TOLERANCE = 1.0  # m to consider a path point reached
+WALKER_DETECTION_RANGE = 50.0  # m, caps the default trace_range of 1000 m
+V2V_BROADCAST_PERIOD = 1.0  # s, AV2VBroadcast's timer
+V2V_REFRESH_TTL = 5.0  # s, AV2VBroadcast resends unchanged entries after this
+V2V_MIN_BROADCAST_PERIOD = 0.2  # s, adaptive broadcast period bounds
+V2V_MAX_BROADCAST_PERIOD = 2.0
+V2V_ADAPTIVE_DISTANCE = 2000.0  # cm, walkers closer than this shorten the adaptive period
+V2V_ADAPTIVE_SPEED = 300.0  # cm/s, walkers faster than this shorten the adaptive period
+STALE_SECONDS = 20.0  # s, AWalkerDetectionSensor drops entries older than this
+SAFE_DISTANCE_CONE = 0.9  # Minimum cosine between heading and direction to the other vehicle
+GRID_CELL_SIZE = 50.0  # m, cell of the uniform grid the sensors look up actors in
+
+WALKER_DETECTION = "sensor.other.walker_detection"
+V2V_BROADCAST = "sensor.other.v2v_broadcast"
+SAFE_DISTANCE = "sensor.other.safe_distance"
+
+def step(world, delta_seconds):
+    """
+    Advances every moving actor and fires the sensors for one world step.
+    """
+    if world.kinematics:
+        _step_actors(world, delta_seconds)
+    if world.sensors:
+        _step_sensors(world, delta_seconds)
+
+def _step_actors(world, dt):
+    for actor in list(world._actors.values()):
+        if actor.parent is not None or not actor._simulate_physics:
+            continue
+        type_id = actor.type_id
+        if type_id.startswith("vehicle."):
+            _step_vehicle(world, actor, dt)
+        elif type_id.startswith("walker."):
+            _step_walker(actor, dt)
+
+def _step_vehicle(world, vehicle, dt):
+    transform = vehicle._transform
+    speed = math.hypot(vehicle._velocity.x, vehicle._velocity.y)
+
+    if vehicle._autopilot:
+        traffic_manager = world._traffic_managers.get(vehicle._tm_port)
+        target = _next_path_point(world, traffic_manager, vehicle)
+        target_speed = TM_DEFAULT_SPEED
+        if traffic_manager is not None:
+            difference = traffic_manager.vehicle_settings.get(vehicle.id, {}).get(
+                "percentage_speed_difference", traffic_manager.global_settings.get("percentage_speed_difference", 0.0))
+            target_speed *= max(0.0, 1.0 - difference / 100.0)
+        dx, dy = target.x - transform.location.x, target.y - transform.location.y
+        if dx or dy:
+            transform.rotation.yaw = math.degrees(math.atan2(dy, dx))
+        speed = min(target_speed, speed + ACCELERATION * dt) if speed <= target_speed else max(target_speed, speed - BRAKING * dt)
+    elif vehicle._control is not None:
+        control = vehicle._control
+        if control.brake > 0.0 or control.hand_brake:
+            speed = max(0.0, speed - BRAKING * max(control.brake, 1.0 if control.hand_brake else 0.0) * dt)
+        elif control.throttle > 0.0:
+            speed = min(MAX_MANUAL_SPEED, speed + ACCELERATION * control.throttle * dt)
+        transform.rotation.yaw += MAX_STEER_RATE * control.steer * dt * min(1.0, speed / 5.0)
+    elif speed == 0.0:
+        return
+
+    yaw = math.radians(transform.rotation.yaw)
+    vehicle._velocity.x, vehicle._velocity.y = speed * math.cos(yaw), speed * math.sin(yaw)
+    transform.location.x += vehicle._velocity.x * dt
+    transform.location.y += vehicle._velocity.y * dt
+
+def _next_path_point(world, traffic_manager, vehicle):
+    location = vehicle._transform.location
+    path = traffic_manager.paths.get(vehicle.id) if traffic_manager is not None else None
+    while path:
+        target = path[0]
+        if math.hypot(target.x - location.x, target.y - location.y) > PATH_TOLERANCE:
+            return target
+        path.pop(0)
+
+    # Without a path, roam between spawn points like the Traffic Manager roams the map
+    spawn_points = world._map._spawn_points
+    target = vehicle._roam_target
+    if target is None or math.hypot(target.x - location.x, target.y - location.y) <= PATH_TOLERANCE:
+        vehicle._roam_index = (vehicle._roam_index * 31 + vehicle.id) % len(spawn_points)
+        target = vehicle._roam_target = spawn_points[vehicle._roam_index].location
+    return target
+
+def _step_walker(walker, dt):
+    control = walker._control
+    if control is None or not control.speed:
+        return
+    direction = control.direction
+    walker._velocity.x = direction.x * control.speed
+    walker._velocity.y = direction.y * control.speed
+    walker._transform.location.x += walker._velocity.x * dt
+    walker._transform.location.y += walker._velocity.y * dt
+    if direction.x or direction.y:
+        walker._transform.rotation.yaw = math.degrees(math.atan2(direction.y, direction.x))
+
+def _step_sensors(world, dt):
+    sensors = [actor for actor in world._actors.values()
+               if actor._callback is not None and actor.parent is not None and actor.type_id in _SENSOR_STEPS]
+    if not sensors:
+        return
+
+    walkers = [actor for actor in world._actors.values() if actor.type_id.startswith("walker.")]
+    vehicles = [actor for actor in world._actors.values() if actor.type_id.startswith("vehicle.")]
+    context = {
+        "walkers": walkers,
+        "walker_ids": {walker.id for walker in walkers},
+        "walker_grid": _Grid(_positions(walkers)),
+        "vehicles": vehicles,
+        "vehicle_grid": _Grid(_positions(vehicles)),
+        "timestamp": world._elapsed_seconds,
+        "delta_seconds": dt,
+        "detectors": {},  # Parent id -> walker detection sensor
+    }
+    for sensor in sensors:
+        if sensor.type_id == WALKER_DETECTION:
+            context["detectors"][sensor.parent.id] = sensor
+
+    # Detection first so V2V shares this tick's detections, as the sensors tick before the broadcast timer
+    for sensor_type in (WALKER_DETECTION, V2V_BROADCAST, SAFE_DISTANCE):
+        for sensor in sensors:
+            if sensor.type_id == sensor_type:
+                _SENSOR_STEPS[sensor_type](world, sensor, context)
+
+def _positions(actors):
+    positions = np.empty((len(actors), 3))
+    for i, actor in enumerate(actors):
+        location = actor.get_transform().location
+        positions[i] = (location.x, location.y, location.z)
+    return positions
+
+class _Grid:
+    """
+    Uniform grid over actor positions, answering "which actors are within radius".
+    """
+
+    def __init__(self, positions, cell_size=GRID_CELL_SIZE):
+        self.positions = positions
+        self.cell_size = cell_size
+        self._cells = {}
+        for index, cell in enumerate(map(tuple, np.floor(positions[:, :2] / cell_size).astype(np.int64))):
+            self._cells.setdefault(cell, []).append(index)
+
+    def query(self, location, radius):
+        """
+        Returns the indices of the actors within radius of location and their offsets from it.
+        """
+        reach = math.ceil(radius / self.cell_size)
+        cx, cy = math.floor(location.x / self.cell_size), math.floor(location.y / self.cell_size)
+        candidates = [index for x in range(cx - reach, cx + reach + 1) for y in range(cy - reach, cy + reach + 1)
+                      for index in self._cells.get((x, y), ())]
+        if not candidates:
+            return np.empty(0, dtype=np.int64), np.empty((0, 3))
+        candidates = np.asarray(candidates)
+        offsets = self.positions[candidates] - (location.x, location.y, location.z)
+        inside = np.linalg.norm(offsets, axis=1) <= radius
+        return candidates[inside], offsets[inside]
+
+def _float_attribute(sensor, key, default):
+    try:
+        return float(sensor.attributes.get(key, default))
+    except ValueError:
+        return default
+
+def _bool_attribute(sensor, key, default):
+    value = sensor.attributes.get(key)
+    if value is None:
+        return default
+    return str(value).lower() not in ("false", "0")
+
+def _step_walker_detection(world, sensor, context):
+    tracked = sensor._tracked
+    walkers = context["walkers"]
+    now = context["timestamp"]
+    if walkers:
+        origin = sensor.parent.get_transform().location
+        detection_range = min(_float_attribute(sensor, "trace_range", WALKER_DETECTION_RANGE), WALKER_DETECTION_RANGE)
+        grid = context["walker_grid"]
+        for i in grid.query(origin, detection_range)[0]:
+            _update_walker_data(tracked, walkers[i].id, carla_standin.Location(*grid.positions[i]), now, True)
+    alive = context["walker_ids"]
+    for walker_id in [walker_id for walker_id, entry in tracked.items()
+                      if walker_id not in alive or now - entry["Timestamp"] > STALE_SECONDS]:
+        del tracked[walker_id]
+
+    reported = sensor._reported
+    delta = {walker_id: dict(entry) for walker_id, entry in tracked.items() if reported.get(walker_id) != entry["Version"]}
+    for walker_id in [walker_id for walker_id in reported if walker_id not in tracked]:
+        del reported[walker_id]
+        delta[walker_id] = {"Removed": True}
+    for walker_id, entry in delta.items():
+        if "Version" in entry:
+            reported[walker_id] = entry["Version"]
+    if delta:
+        sensor._callback(delta)
+
+def _update_walker_data(tracked, walker_id, location, timestamp, detected_by_own_vehicle):
+    # AWalkerDetectionSensor::UpdateWalkerData: newer data wins and bumps the entry's version
+    known = tracked.get(walker_id)
+    if known is not None and timestamp <= known["Timestamp"]:
+        return False
+    tracked[walker_id] = {
+        "Location": location,
+        "Timestamp": timestamp,
+        "DetectedByOwnVehicle": detected_by_own_vehicle,
+        "Version": known["Version"] + 1 if known is not None else 1,
+    }
+    return True
+
+def _step_v2v_broadcast(world, sensor, context):
+    adaptive = _bool_attribute(sensor, "adaptive_broadcast", False)
+    if sensor._next_broadcast is None:
+        sensor._next_broadcast = max(0.01, _float_attribute(sensor, "broadcast_period", V2V_BROADCAST_PERIOD))
+    sensor._broadcast_elapsed += context["delta_seconds"]
+    if sensor._broadcast_elapsed < sensor._next_broadcast:
+        return
+    sensor._broadcast_elapsed = 0.0
+
+    own_detector = context["detectors"].get(sensor.parent.id)
+    origin = sensor.parent.get_transform().location
+    tracked = own_detector._tracked if own_detector is not None else {}
+    if adaptive:
+        sensor._next_broadcast = _adaptive_period(sensor, tracked, origin)
+    vehicles = context["vehicles"]
+    if not vehicles:
+        return
+    radius = _float_attribute(sensor, "broadcast_radius", 1000.0) / 100.0  # The plugin's radius is in centimeters
+    delta = _collect_delta(sensor, tracked, context["timestamp"])
+    delta_updates = _bool_attribute(sensor, "delta_updates", True)
+
+    neighbours = {}
+    for i in context["vehicle_grid"].query(origin, radius)[0]:
+        vehicle = vehicles[i]
+        if vehicle.id == sensor.parent.id:
+            continue
+        neighbours[vehicle.id] = {"Location": carla_standin.Location(*context["vehicle_grid"].positions[i])}
+        detector = context["detectors"].get(vehicle.id)
+        if detector is None:
+            continue
+        entries = delta if delta_updates and vehicle.id in sensor._neighbours else tracked
+        for walker_id, entry in entries.items():
+            _update_walker_data(detector._tracked, walker_id, entry["Location"], entry["Timestamp"], False)
+    if tracked:
+        # The plugin returns early without walkers, keeping its previous neighbours
+        sensor._neighbours = set(neighbours)
+    if neighbours:
+        sensor._callback(neighbours)
+
+def _adaptive_period(sensor, tracked, origin):
+    # AV2VBroadcast::ComputeAdaptivePeriod, the plugin works in centimeters
+    distance_scale = _float_attribute(sensor, "adaptive_distance", V2V_ADAPTIVE_DISTANCE) / 100.0
+    speed_scale = _float_attribute(sensor, "adaptive_speed", V2V_ADAPTIVE_SPEED) / 100.0
+    minimum = max(0.01, _float_attribute(sensor, "min_broadcast_period", V2V_MIN_BROADCAST_PERIOD))
+    maximum = max(minimum, _float_attribute(sensor, "max_broadcast_period", V2V_MAX_BROADCAST_PERIOD))
+    history = sensor._walker_history
+    urgency = 0.0
+    for walker_id, entry in tracked.items():
+        location, timestamp = entry["Location"], entry["Timestamp"]
+        if distance_scale > 0.0:
+            urgency = max(urgency, 1.0 - location.distance(origin) / distance_scale)
+        previous = history.get(walker_id)
+        if speed_scale > 0.0 and previous is not None and timestamp > previous[1]:
+            speed = location.distance(previous[0]) / (timestamp - previous[1])
+            urgency = max(urgency, speed / speed_scale)
+        history[walker_id] = (location, timestamp)
+    for walker_id in [walker_id for walker_id in history if walker_id not in tracked]:
+        del history[walker_id]
+    urgency = min(max(urgency, 0.0), 1.0)
+    return maximum - (maximum - minimum) * urgency
+
+def _collect_delta(sensor, tracked, now):
+    # AV2VBroadcast::CollectDelta: new or changed entries, and unchanged ones not sent for refresh_ttl seconds
+    sent = sensor._sent
+    for walker_id in [walker_id for walker_id in sent if walker_id not in tracked]:
+        del sent[walker_id]
+    refresh_ttl = _float_attribute(sensor, "refresh_ttl", V2V_REFRESH_TTL)
+    delta = {}
+    for walker_id, entry in tracked.items():
+        version, sent_at = sent.get(walker_id, (None, None))
+        if version != entry["Version"] or now - sent_at >= refresh_ttl:
+            delta[walker_id] = entry
+            sent[walker_id] = (entry["Version"], now)
+    return delta
+
+def _step_safe_distance(world, sensor, context):
+    vehicles = context["vehicles"]
+    if not vehicles:
+        return
+    transform = sensor.parent.get_transform()
+    origin = transform.location
+    forward = transform.rotation.get_forward_vector()
+    safe_distance = _float_attribute(sensor, "safe_distance_front", 1.0) + 5.0  # Measured from the bumper
+    candidates, offsets = context["vehicle_grid"].query(origin, safe_distance)
+    distance = np.linalg.norm(offsets, axis=1)
+    ahead = (offsets @ (forward.x, forward.y, forward.z) > SAFE_DISTANCE_CONE * distance) & (distance > 0.0)
+    too_close = [vehicles[i].id for i in candidates[ahead]]
+    if too_close:
+        sensor._callback(too_close)
+
+_SENSOR_STEPS = {
+    WALKER_DETECTION: _step_walker_detection,
+    V2V_BROADCAST: _step_v2v_broadcast,
+    SAFE_DISTANCE: _step_safe_distance,
+}
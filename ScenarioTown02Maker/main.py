@@ -1,4 +1,5 @@
 # main.py
+import argparse
 import glob
 import os
 import sys
@@ -13,14 +14,43 @@ except IndexError:
 
 import carla
 import time
-from scenario.scenario_parser import load_scenario_from_json
+from scenario.scenario_parser import load_scenario
 from scenario.scenario_executor import ScenarioExecutor
 from utils.walker_route_manager import WalkerManager
-from utils.scenario_utils import control_vehicles_near_spectator
+from scenario.tick_scheduler import (
+    TickScheduler, apply_simulation_settings, STAGE_ACTORS, STAGE_WALKERS, STAGE_SPECTATOR, STAGE_SENSORS,
+)
+from utils.spectator_controller import SpectatorController
+from utils.sensor_pipeline import SensorEventPipeline, WalkerViews, print_summary
+from utils.actor_registry import ActorRegistry
+from utils.event_recorder import EventRecorder
+from utils.map_context import MapContext
+from utils.tick_profiler import TickProfiler, RpcCounter
+from utils.v2v_model import V2VPropagationModel, parse_model_spec
 
-def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run one scenario on a CARLA server.")
+    parser.add_argument("--scenario", default="config/sample_scenario.json", help="Scenario file to run")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Record per-tick stage timings, RPC and actor counts and print them at shutdown")
+    parser.add_argument("--profile-stats", metavar="FILE",
+                        help="Also append every tick's measurements to this JSON Lines file (implies --instrument)")
+    parser.add_argument("--profile", metavar="STAGE",
+                        help="Run one stage (tick, actors, walkers, spectator, sensors) under cProfile (implies --instrument)")
+    parser.add_argument("--profile-output", metavar="FILE", default="tick_profile.prof",
+                        help="Where --profile dumps its statistics")
+    parser.add_argument("--v2v-model", action="append", default=[], metavar="RADIUS:PERIOD[:LATENCY]",
+                        help="Run the Python V2V propagation model with this broadcast radius (m), period and "
+                             "latency (s) alongside the scenario and print its statistics; repeat to compare")
+    return parser.parse_args()
+
+def main(args):
     executor = None  # Ensure executor is defined for cleanup in finally block
+    profiler = None
     try:
+        # Built first, so an invalid --v2v-model fails before anything is spawned
+        v2v_models = {spec: V2VPropagationModel(**parse_model_spec(spec)) for spec in args.v2v_model}
+
         # Initialize CARLA client
         client = carla.Client("localhost", 2000) # type: ignore
         client.set_timeout(10.0)
@@ -31,42 +61,75 @@ def main():
 
         # Load traffic manager
         traffic_manager = client.get_trafficmanager()
-        
-        # Set asynchronous mode
-        settings = world.get_settings()
-        settings.synchronous_mode = False
-        world.apply_settings(settings)
 
-        # Get spawn points
-        spawn_points = world.get_map().get_spawn_points()
-        
+        if args.instrument or args.profile_stats or args.profile:
+            # Calls made through the client, world and traffic manager are counted per tick
+            rpc_counts = {}
+            client = RpcCounter(client, rpc_counts)
+            world = RpcCounter(world, rpc_counts)
+            traffic_manager = RpcCounter(traffic_manager, rpc_counts)
+            profiler = TickProfiler(rpc_counts=rpc_counts, stream_path=args.profile_stats, profile_stage=args.profile)
+
+        # Map, spawn points and blueprint library are fetched once and shared by every helper
+        map_context = MapContext(world)
+        spawn_points = map_context.spawn_points
+        map_name = map_context.map_name
+
+        # Load scenario, validated against the spawn points before anything is spawned
+        scenario = load_scenario(args.scenario, spawn_points, map_name=map_name)
+        scenario_settings = scenario.settings
+
+        # Set synchronous or asynchronous mode as requested by the scenario
+        synchronous = apply_simulation_settings(world, traffic_manager, scenario_settings)
+
+        # Actor metadata is loaded once and kept up to date from the world snapshots
+        actor_registry = ActorRegistry(world)
+
         # Initialize walker manager
-        if not spawn_points:
-            raise RuntimeError("No spawn points available in the map.")
-        walker_manager = WalkerManager(world, spawn_points)
+        walker_manager = WalkerManager(world, spawn_points, client=client, actor_registry=actor_registry,
+                                       map_name=map_name)
         
-        # Initialize executor
-        bp_lib = world.get_blueprint_library()
+        # Sensor events are queued by the callbacks and drained once per tick
+        sensor_pipeline = SensorEventPipeline(world, actor_registry=actor_registry)
+        sensor_pipeline.add_sink(print_summary)
+        walker_views = WalkerViews(actor_registry)
+        sensor_pipeline.add_sink(walker_views)
+        if scenario_settings.record_events:
+            recorder = EventRecorder(scenario_settings.record_events)
+            sensor_pipeline.add_sink(recorder)
 
-        executor = ScenarioExecutor(world, traffic_manager, bp_lib, spawn_points, walker_manager)
-        
-        # Load and execute scenario
-        config = load_scenario_from_json("config/sample_scenario.json")
+        # Initialize executor
+        executor = ScenarioExecutor(world, traffic_manager, map_context.blueprints, spawn_points, walker_manager,
+                                    client=client, synchronous=synchronous, sensor_pipeline=sensor_pipeline,
+                                    actor_registry=actor_registry, map_name=map_name)
 
         # Extract safe distance from scenario_config
-        safe_distance = config.get("scenario_config", {}).get("safe_distance_to_spectator", 10.0)
+        safe_distance = scenario_settings.safe_distance_to_spectator
 
-        executor.execute(config)
+        executor.execute(scenario)
+
+        # Control vehicles near the spectator
+        spectator = world.get_spectator()
+        spectator_controller = SpectatorController(world, traffic_manager, client=client, safe_distance=safe_distance,
+                                                   carla_map=map_context.map, lane_index=map_context.lane_index,
+                                                   actor_registry=actor_registry,
+                                                   managed=executor.traffic_profiles.applied)
+
+        # Per-tick hooks run in a fixed order: actor registry, walkers, spectator control, then sensor draining
+        if profiler is not None:
+            profiler.actor_count = actor_registry.__len__
+        scheduler = TickScheduler(world, synchronous=synchronous, profiler=profiler)
+        scheduler.add_hook("actors", actor_registry.sync, STAGE_ACTORS)
+        scheduler.add_hook("walkers", walker_manager.update_walkers, STAGE_WALKERS)
+        scheduler.add_hook("spectator", lambda: spectator_controller.update(spectator), STAGE_SPECTATOR)
+        scheduler.add_hook("sensors", lambda: sensor_pipeline.drain(scheduler.frame), STAGE_SENSORS)
+        for spec, model in v2v_models.items():
+            scheduler.add_hook(f"v2v {spec}", lambda model=model: model.update(world.get_snapshot(), actor_registry),
+                               STAGE_SENSORS)
         
         # Main simulation loop
         try:
-            while True:
-                world.wait_for_tick() # Allow the simulation to run asynchronously
-                walker_manager.update_walkers()
-
-                # Control vehicles near the spectator
-                spectator = world.get_spectator()
-                control_vehicles_near_spectator(world, traffic_manager, spectator, safe_distance=safe_distance)
+            scheduler.run(max_ticks=scenario_settings.max_ticks)
 
         except KeyboardInterrupt:
             print("\nScenario interrupted by user")
@@ -77,12 +140,28 @@ def main():
         # Cleanup
         if executor:
             executor.cleanup()
+        if 'sensor_pipeline' in locals():
+            print(f"Sensor event counters: {sensor_pipeline.stats()}")
+        if 'walker_views' in locals():
+            print(f"Walker views: {walker_views.stats()}")
+        for spec, model in locals().get('v2v_models', {}).items():
+            print(f"V2V model {spec}: {model.stats()}")
+        if profiler is not None:
+            profiler.print_summary()
+            profile_report = profiler.close(args.profile_output)
+            if profile_report:
+                print(f"cProfile of stage '{args.profile}', written to {args.profile_output}:\n{profile_report}")
+        if 'recorder' in locals():
+            recorder.close()
+            print(f"Recorded {recorder.rows} sensor events to {recorder.path}")
+        if 'traffic_manager' in locals():
+            traffic_manager.set_synchronous_mode(False)
         if 'world' in locals():
             world.apply_settings(original_settings)
         print("Scenario cleanup complete")
 
 if __name__ == "__main__":
     try:
-        main()
+        main(parse_args())
     except KeyboardInterrupt:
         print("\nScript interrupted by user. Exiting...")
\ No newline at end of file
@@ -0,0 +1,44 @@
+# run_scenarios.py
+import argparse
+import glob
+import os
+import sys
+
+try:
+    sys.path.append(glob.glob('../PythonAPI/carla/dist/carla-*%d.%d-%s.egg' % (
+        sys.version_info.major,
+        sys.version_info.minor,
+        'win-amd64' if os.name == 'nt' else 'linux-x86_64'))[0])
+except IndexError:
+    pass
+
+from scenario.scenario_runner import collect_scenarios, run_scenarios, write_summary, DEFAULT_MAX_TICKS
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many scenario files across several CARLA servers.")
+    parser.add_argument("scenarios", nargs="+", help="Scenario files, directories or glob patterns")
+    parser.add_argument("--server", action="append", dest="servers", metavar="HOST:PORT[:TM_PORT]",
+                        help="CARLA server endpoint, repeat once per server (default localhost:2000:8000)")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS,
+                        help="Ticks per scenario when the scenario does not set max_ticks")
+    parser.add_argument("--summary", default="scenario_summary.json", help="Where to write the JSON summary")
+    parser.add_argument("--carla-module", default="carla",
+                        help="Module to use as carla, e.g. carla_standin to test scheduling without a server")
+    args = parser.parse_args()
+
+    scenario_paths = collect_scenarios(args.scenarios)
+    servers = args.servers or ["localhost:2000:8000"]
+    print(f"Running {len(scenario_paths)} scenarios on {len(servers)} servers")
+
+    summary = run_scenarios(scenario_paths, servers, carla_module=args.carla_module, max_ticks=args.max_ticks)
+    write_summary(summary, args.summary)
+
+    for result in summary["results"]:
+        timing = f"{result.get('total_seconds', 0.0):.2f}s"
+        print(f"{result['status']:>6} {timing:>8} {result.get('endpoint', '-'):<22} {result['scenario']}"
+              + (f" ({result['error']})" if result.get("error") else ""))
+    print(f"{summary['total'] - summary['failed']}/{summary['total']} scenarios succeeded "
+          f"in {summary['wall_seconds']:.2f}s, summary written to {args.summary}")
+
+if __name__ == "__main__":
+    main()
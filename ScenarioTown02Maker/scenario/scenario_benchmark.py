@@ -0,0 +1,278 @@
+# scenario_benchmark.py
+import importlib
+import itertools
+import json
+import multiprocessing
+import platform
+import queue
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from scenario.scenario_runner import parse_endpoint
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_TICKS = 200
+VEHICLE_MODELS = ("vehicle.tesla.model3", "vehicle.mercedes.mercedesvr", "vehicle.audi.tt", "vehicle.lincoln.mkz_2017")
+
+# Measurements compared against a baseline, all of them lower is better
+REGRESSION_METRICS = ("setup_seconds", "setup_rpcs", "loop_mean_ms", "rpcs_per_tick", "max_rss_mb", "peak_traced_mb")
+
+def generate_scenario(walker_table, vehicles, walkers, route_length, ticks=DEFAULT_TICKS, seed=0, sensors=True):
+    """
+    Builds a synthetic scenario dict with the given actor counts.
+
+    Vehicles and walkers cycle through the spawn points in a seeded random order, so the
+    same arguments always give the same file. Once every spawn point is used, further
+    actors reuse them and fail to spawn like they would on the server; the benchmark
+    reports how many actors were actually spawned.
+
+    Args:
+        walker_table (WalkerSpawnTable): Spawn points of the map and where walkers may spawn.
+        vehicles (int): Number of vehicles.
+        walkers (int): Number of walkers.
+        route_length (int): Spawn points in every vehicle route and walker go_to_point list.
+        ticks (int): Value of scenario_config.max_ticks.
+        seed (int): Seed of the spawn point order and of the simulation.
+        sensors (bool): Whether vehicles and the spectator carry walker detection and V2V sensors.
+
+    Returns:
+        dict: The scenario, ready to be written as JSON.
+    """
+    rng = np.random.default_rng(seed)
+    spawn_count = len(walker_table)
+    walker_points = np.flatnonzero(walker_table.available)
+    vehicle_order = rng.permutation(spawn_count)
+    walker_order = rng.permutation(walker_points)
+
+    def route():
+        return rng.integers(0, spawn_count, route_length).tolist()
+
+    return {
+        "scenario_config": {
+            "safe_distance_to_spectator": 10.0,
+            "safe_distance_between_vehicles": 5.0,
+            "batch_spawn": True,
+            "spawn_batch_size": 500,
+            "synchronous_mode": True,
+            "fixed_delta_seconds": 0.05,
+            "seed": seed,
+            "max_ticks": ticks,
+            "record_events": None,
+        },
+        "spectator": {"spawn_point": int(vehicle_order[0]), "spawn_walkersensor_v2v": sensors},
+        "vehicles": [
+            {
+                "model": VEHICLE_MODELS[index % len(VEHICLE_MODELS)],
+                "spawn_point": int(vehicle_order[(index + 1) % spawn_count]),
+                "route": route(),
+                "stop_at_end": False,
+                "spawn_walkersensor_v2v": sensors,
+            }
+            for index in range(vehicles)
+        ],
+        "walkers": [
+            {
+                "spawn_point": int(walker_order[index % len(walker_order)]),
+                "go_to_point": route(),
+                "speed": 1.4,
+            }
+            for index in range(walkers)
+        ],
+    }
+
+def benchmark_cases(vehicle_counts, walker_counts, route_lengths):
+    """
+    Returns the (vehicles, walkers, route_length) combinations to run, smallest first.
+    """
+    return sorted(itertools.product(vehicle_counts, walker_counts, route_lengths))
+
+def case_name(vehicles, walkers, route_length):
+    return f"v{vehicles}_w{walkers}_r{route_length}"
+
+def write_scenarios(cases, output_dir, walker_table, ticks=DEFAULT_TICKS, seed=0, sensors=True):
+    """
+    Writes one generated scenario per case.
+
+    Returns:
+        list: (case name, scenario path) pairs, in case order.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for vehicles, walkers, route_length in cases:
+        name = case_name(vehicles, walkers, route_length)
+        path = output_dir / f"{name}.json"
+        with open(path, "w") as f:
+            json.dump(generate_scenario(walker_table, vehicles, walkers, route_length, ticks, seed, sensors), f, indent=4)
+        paths.append((name, str(path)))
+    return paths
+
+def measure_scenario(client, scenario_path, tm_port=8000, max_ticks=DEFAULT_TICKS, trace_memory=False):
+    """
+    Runs one scenario with the tick profiler on and returns its benchmark measurements.
+
+    Args:
+        client (carla.Client): Connected client.
+        scenario_path (str): Scenario file to run.
+        tm_port (int): Port of the Traffic Manager.
+        max_ticks (int): Ticks to run when the scenario does not set max_ticks.
+        trace_memory (bool): Also measure the peak of Python allocations with tracemalloc,
+            which slows the run down, so timings of such runs are not comparable.
+
+    Returns:
+        dict: Status, setup time, per-stage tick percentiles, RPC counts and peak memory.
+    """
+    from scenario.scenario_runner import run_scenario
+    from utils.tick_profiler import TickProfiler, TICK_STAGE
+
+    profiler = TickProfiler(capacity=max(max_ticks, 1))
+    peak_traced = None
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        result = run_scenario(client, scenario_path, tm_port=tm_port, max_ticks=max_ticks, profiler=profiler)
+        if trace_memory:
+            peak_traced = tracemalloc.get_traced_memory()[1] / 1024.0 ** 2
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    summary = profiler.summary()
+    tick_stats = summary["stages_ms"].get(TICK_STAGE, {})
+    max_rss = None
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024.0 ** 2 if sys.platform == "darwin" else 1024.0)
+    return {
+        "status": result["status"],
+        "error": result["error"],
+        "actors": result.get("actors", 0),
+        "spawn_failures": len(result["spawn_failures"]),
+        "ticks": result["ticks"],
+        "setup_seconds": result["setup_seconds"],
+        "setup_rpcs": result.get("setup_rpcs", 0),
+        "run_seconds": result["run_seconds"],
+        "tick_p50_ms": tick_stats.get("p50", 0.0),
+        "tick_p90_ms": tick_stats.get("p90", 0.0),
+        "tick_p99_ms": tick_stats.get("p99", 0.0),
+        "loop_mean_ms": sum(stats["mean"] for stats in summary["stages_ms"].values()),
+        "stages_ms": {name: {key: stats[key] for key in ("mean", "p50", "p90", "p99", "max")}
+                      for name, stats in summary["stages_ms"].items()},
+        "rpcs_per_tick": summary["rpcs_per_tick"]["mean"],
+        "rpc_calls": summary["rpc_calls"],
+        "peak_traced_mb": peak_traced,
+        "max_rss_mb": max_rss,
+    }
+
+def _benchmark_worker(endpoint, carla_module, scenario_path, max_ticks, trace_memory, results):
+    # A fresh process per case, so peak memory and the carla module state do not leak between cases
+    carla = importlib.import_module(carla_module)
+    sys.modules["carla"] = carla
+
+    host, port, tm_port = parse_endpoint(endpoint)
+    client = carla.Client(host, port)
+    client.set_timeout(60.0)
+    try:
+        results.put(measure_scenario(client, scenario_path, tm_port=tm_port, max_ticks=max_ticks,
+                                     trace_memory=trace_memory))
+    except Exception as e:
+        results.put({"status": "failed", "error": str(e)})
+
+def run_benchmarks(scenarios, endpoint="localhost:2000:8000", carla_module="carla", max_ticks=DEFAULT_TICKS,
+                   trace_memory=False):
+    """
+    Measures every scenario in its own process, one after the other on one server.
+
+    Args:
+        scenarios (list): (case name, scenario path) pairs.
+        endpoint (str): Server endpoint as "host:port[:tm_port]".
+        carla_module (str): Module imported as carla, e.g. "carla_standin".
+        max_ticks (int): Ticks per scenario when the scenario does not set max_ticks.
+        trace_memory (bool): Measure the peak of Python allocations with tracemalloc.
+
+    Returns:
+        dict: Baseline document with the environment and one entry per case.
+    """
+    parse_endpoint(endpoint)
+    context = multiprocessing.get_context("spawn")
+    cases = {}
+    for name, scenario_path in scenarios:
+        results = context.Queue()
+        worker = context.Process(target=_benchmark_worker,
+                                 args=(endpoint, carla_module, scenario_path, max_ticks, trace_memory, results))
+        worker.start()
+        measurement = None
+        while measurement is None:
+            try:
+                measurement = results.get(timeout=1.0)
+            except queue.Empty:
+                if not worker.is_alive():
+                    measurement = {"status": "failed", "error": f"Benchmark worker exited with code {worker.exitcode}"}
+        worker.join()
+        cases[name] = dict(measurement, scenario=scenario_path)
+        print(f"{name:<24} {_format_case(cases[name])}")
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "endpoint": endpoint,
+        "carla_module": carla_module,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "trace_memory": trace_memory,
+        "cases": cases,
+    }
+
+def compare_baseline(current, baseline, tolerance=0.2):
+    """
+    Lists the measurements that got worse than the baseline by more than tolerance.
+
+    Besides REGRESSION_METRICS, the p90 of every tick stage is compared, so a slower
+    walker or spectator update is reported even when the tick itself hides it.
+
+    Args:
+        current (dict): Document returned by run_benchmarks.
+        baseline (dict): A previously saved document.
+        tolerance (float): Allowed relative increase, 0.2 for 20 %.
+
+    Returns:
+        list: One message per regression, empty if there is none.
+    """
+    regressions = []
+    for name, case in current["cases"].items():
+        reference = baseline.get("cases", {}).get(name)
+        if reference is None or case.get("status") != "ok" or reference.get("status") != "ok":
+            continue
+        pairs = [(metric, reference.get(metric), case.get(metric)) for metric in REGRESSION_METRICS]
+        for stage, stats in case.get("stages_ms", {}).items():
+            pairs.append((f"{stage} p90 ms", reference.get("stages_ms", {}).get(stage, {}).get("p90"), stats["p90"]))
+        for metric, before, after in pairs:
+            if before is None or after is None:
+                continue
+            # The absolute margin keeps near-zero measurements from flagging noise
+            if after > before * (1.0 + tolerance) and after - before > 1e-3:
+                regressions.append(f"{name}: {metric} went from {before:.3f} to {after:.3f}")
+    return regressions
+
+def write_baseline(document, path):
+    with open(path, "w") as f:
+        json.dump(document, f, indent=4)
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+def _format_case(case):
+    if case.get("status") != "ok":
+        return f"failed ({case.get('error')})"
+    return (f"{case['actors']:>6} actors  setup {case['setup_seconds']:7.3f}s  "
+            f"tick p50 {case['tick_p50_ms']:8.3f}  p90 {case['tick_p90_ms']:8.3f}  p99 {case['tick_p99_ms']:8.3f} ms  "
+            f"loop {case['loop_mean_ms']:8.3f} ms  {case['rpcs_per_tick']:7.1f} RPCs/tick"
+            + (f"  max RSS {case['max_rss_mb']:7.1f} MB" if case["max_rss_mb"] is not None else ""))
@@ -1,111 +1,369 @@
 # scenario_executor.py
-from utils.scenario_utils import spawn_vehicle, set_autopilot, vehicle_route, attach_sensors_to_vehicle
-from utils.walker_utils import spawn_walker
-import carla
+from utils.scenario_utils import (
+    spawn_vehicle, set_autopilot, attach_sensors_to_vehicle,
+    apply_batch_in_chunks, build_vehicle_spawn_command, build_sensor_spawn_commands, listen_to_sensors,
+)
+from utils.walker_utils import spawn_walker, build_walker_spawn_command, get_walker_spawn_table
+from utils.actor_registry import ActorRegistry
+from utils.blueprint_cache import BlueprintCache
+from utils.traffic_profiles import TrafficManagerProfiles
+from scenario.scenario_model import Scenario, VehicleSpec, compile_scenario
+from scenario.scenario_stream import ScenarioStream, InvalidEntry
 
 class ScenarioExecutor:
-    def __init__(self, world, traffic_manager, bp_lib, spawn_points, walker_manager):
+    def __init__(self, world, traffic_manager, bp_lib, spawn_points, walker_manager, client=None, synchronous=False,
+                 sensor_pipeline=None, actor_registry=None, map_name="Town02"):
         self.world = world
         self.traffic_manager = traffic_manager
-        self.bp_lib = bp_lib
+        self.bp_lib = bp_lib if isinstance(bp_lib, BlueprintCache) else BlueprintCache(bp_lib)
         self.spawn_points = spawn_points
         self.walker_manager = walker_manager
+        self.client = client  # Required for batch spawning
+        self.synchronous = synchronous  # In synchronous mode the executor ticks the world itself
+        self.sensor_pipeline = sensor_pipeline  # Receives the events of every attached sensor
+        self.actor_registry = actor_registry if actor_registry is not None else ActorRegistry(world)
+        self.map_name = map_name  # Selects the walker sidewalk layout
+        self.walker_table = get_walker_spawn_table(spawn_points, map_name) if spawn_points else None
+        self.traffic_profiles = None  # TrafficManagerProfiles of the scenario being executed
+        self.v2v_settings = {}  # V2V broadcast settings of the scenario being executed, passed to every sensor
         self.spawned_actors = []
-        
-    def execute(self, config):
-        try:
-            
-            # Relocate spectator to spawn point and attach sensors if needed
-            spectator_cfg = config.get("spectator")
-            if spectator_cfg:
-                spectator_loc = spectator_cfg["spawn_point"]
-                spawn_point = self.spawn_points[spectator_loc]
-                spectator = self.world.get_spectator()
-                spectator.set_transform(spawn_point)
-
-                # Attach sensors to the spectator if spawn_walkersensor_v2v is True
-                if spectator_cfg.get("spawn_walkersensor_v2v", False):
-                    spectator_sensors = attach_sensors_to_vehicle(self.world, self.bp_lib, spectator)
-                    self.world.wait_for_tick()
-                    self.spawned_actors.extend(spectator_sensors)
-
-            # Spawn vehicles
-            if not self.spawn_points:
-                raise RuntimeError("No spawn points available in the map.")
-            
-            for vehicle_cfg in config.get("vehicles", []):
-                try:
-                    vehicle_loc = vehicle_cfg["spawn_point"]
-                    spawn_point = self.spawn_points[vehicle_loc]
-                    vehicle_loc = spawn_point.location
-                    vehicle_rot = spawn_point.rotation
-
-                    vehicle_transform = carla.Transform(vehicle_loc, vehicle_rot)  # type: ignore
-
-                    vehicle = spawn_vehicle(
-                        self.world,
-                        self.bp_lib,
-                        vehicle_cfg.get("model"),
-                        vehicle_transform,
-                    )
-                    self.spawned_actors.append(vehicle)
-
-                    # Attach sensors to the vehicle if spawn_walkersensor_v2v is True
-                    if vehicle_cfg.get("spawn_walkersensor_v2v", False):
-                        sensors = attach_sensors_to_vehicle(self.world, self.bp_lib, vehicle)
-                        self.world.wait_for_tick()
-                        self.spawned_actors.extend(sensors)
-
-                    set_autopilot(vehicle, True)
-
-                    # Set vehicle distance to leading vehicle
-                    safe_distance_traffic_manager = config.get("scenario_config", {}).get("safe_distance_between_vehicles", 10.0)
-                    self.traffic_manager.distance_to_leading_vehicle(vehicle, safe_distance_traffic_manager) 
-
-                    vehicle_route_cfg = vehicle_cfg.get("route", [])
-                    print(f"Vehicle route: {vehicle_route_cfg}")
-                    vehicle_route(self.traffic_manager, self.spawn_points, vehicle, vehicle_route_cfg)
-                except Exception as e:
-                    print(f"Failed to spawn vehicle: {e}")
-            
-            # Spawn walkers
-            percentagePedestriansCrossing = 1.0 
-            self.world.set_pedestrians_cross_factor(percentagePedestriansCrossing)
-            self.world.wait_for_tick()
+        self.spawn_failures = []  # One entry per config entry that failed to spawn
 
-            for walker_cfg in config.get("walkers", []):
-                try:
-                    walker_spawn_index = walker_cfg["spawn_point"]
-                    walker = spawn_walker(
-                        self.world,
-                        self.bp_lib,
-                        walker_spawn_index,
-                    )
-                    self.spawned_actors.append(walker)
-
-                    walker_route = walker_cfg["go_to_point"]
-                    walker_speed = walker_cfg.get("speed", 1.4)
-
-                    # Add the walker to the manager
-                    self.walker_manager.add_walker(walker, walker_route, walker_speed)
-                except Exception as e:
-                    print(f"Failed to spawn walker: {e}")
-            
-            actors = self.world.get_actors().filter("vehicle.*")  # Filter for vehicles
-            print(f"Total vehicles in the world: {len(actors)}")
+    def execute(self, scenario):
+        """
+        Spawns a scenario.
+
+        Args:
+            scenario (Scenario, ScenarioStream or dict): A compiled scenario, a streamed
+                scenario whose entries are spawned while the file is read, or a raw scenario
+                dict that is validated and compiled against the executor's spawn points first.
+        """
+        if not isinstance(scenario, (Scenario, ScenarioStream)):
+            scenario = compile_scenario(scenario, self.spawn_points, map_name=self.map_name)
+        if isinstance(scenario, Scenario):
+            missing = self.bp_lib.preload_scenario(scenario)
+            if missing:
+                print(f"Blueprints not found in blueprint library: {missing}")
+        try:
+            if scenario.settings.batch_spawn and self.client is None:
+                raise RuntimeError("Batch spawning requires a carla.Client.")
+            # Sent per vehicle with its profile, so vehicles outside the scenario keep their settings
+            self.traffic_profiles = TrafficManagerProfiles(
+                self.traffic_manager,
+                defaults={"distance_to_leading_vehicle": scenario.settings.safe_distance_between_vehicles},
+            )
+            # Settings a scenario leaves out are not sent, so older plugin builds still run it
+            self.v2v_settings = {
+                "broadcast_period": scenario.settings.v2v_broadcast_period,
+                "adaptive_broadcast": scenario.settings.v2v_adaptive_broadcast,
+                "broadcast_period_range": scenario.settings.v2v_broadcast_period_range,
+            }
+            if isinstance(scenario, ScenarioStream):
+                self._execute_streamed(scenario)
+            elif scenario.settings.batch_spawn:
+                self._execute_batched(scenario)
+            else:
+                self._execute_sequential(scenario)
+            self.actor_registry.register(self.spawned_actors)
+            self.actor_registry.sync()
+            if scenario.settings.traffic_manager_audit:
+                self.audit_traffic_manager()
 
-            for actor in actors:
-                # Check if the actor is managed by the TrafficManager
-                try:
-                    is_managed = self.traffic_manager.get_vehicle_percentage_speed_difference(actor) is not None
-                except Exception:
-                    is_managed = False  # If the actor is not managed, handle gracefully
-                print(f"Actor ID: {actor.id}, Type: {actor.type_id}, Managed by TrafficManager: {is_managed}")
-                    
         except Exception as e:
             self.cleanup()
             raise
-            
+
+    def _execute_sequential(self, scenario):
+        # Relocate spectator to spawn point and attach sensors if needed
+        self._spawn_spectator_sequential(scenario.spectator)
+
+        # Spawn vehicles
+        if not self.spawn_points:
+            raise RuntimeError("No spawn points available in the map.")
+
+        for vehicle_spec in scenario.vehicles:
+            self._spawn_vehicle_sequential(scenario.settings, vehicle_spec)
+
+        # Spawn walkers
+        self._set_pedestrians_cross_factor()
+
+        for walker_spec in scenario.walkers:
+            self._spawn_walker_sequential(walker_spec)
+
+    def _execute_batched(self, scenario):
+        """
+        Spawns vehicles, their sensors and the walkers through a few apply_batch_sync calls.
+
+        Vehicles are spawned together with their SetAutopilot command, then all sensors are
+        spawned in a single batch, then all walkers. Failures are recorded per config entry
+        in self.spawn_failures instead of aborting the whole scenario.
+        """
+        if not self.spawn_points:
+            raise RuntimeError("No spawn points available in the map.")
+
+        # Sensors are attached to the spectator and every vehicle with spawn_walkersensor_v2v
+        sensor_parents = self._prepare_spectator_batched(scenario.spectator)
+        self._spawn_vehicle_batch(scenario.settings, scenario.vehicles, sensor_parents)
+
+        # Walkers
+        self._set_pedestrians_cross_factor()
+        self._spawn_walker_batch(scenario.settings, scenario.walkers)
+
+        if self.spawn_failures:
+            print(f"Batch spawn finished with {len(self.spawn_failures)} failed entries.")
+
+    def _execute_streamed(self, stream):
+        """
+        Spawns the entries of a ScenarioStream while it is being read.
+
+        With batch_spawn, entries are collected into chunks of spawn_batch_size and each
+        chunk is spawned as soon as it is full; otherwise every entry is spawned as soon as
+        it is read. Invalid lines are recorded in self.spawn_failures.
+        """
+        if not self.spawn_points:
+            raise RuntimeError("No spawn points available in the map.")
+
+        settings = stream.settings
+        batched = settings.batch_spawn
+        if batched:
+            # The spectator's sensors are spawned right away instead of waiting for a full vehicle chunk
+            sensor_parents = self._prepare_spectator_batched(stream.spectator)
+            if sensor_parents:
+                self._spawn_vehicle_batch(settings, [], sensor_parents)
+        else:
+            self._spawn_spectator_sequential(stream.spectator)
+
+        vehicle_chunk = []
+        walker_chunk = []
+        cross_factor_set = False
+        for entry in stream.entries():
+            if isinstance(entry, InvalidEntry):
+                self._record_failure(entry.kind, entry.index, entry.error)
+            elif isinstance(entry, VehicleSpec):
+                if not batched:
+                    self._spawn_vehicle_sequential(settings, entry)
+                    continue
+                vehicle_chunk.append(entry)
+                if len(vehicle_chunk) >= settings.spawn_batch_size:
+                    self._spawn_vehicle_batch(settings, vehicle_chunk, [])
+                    vehicle_chunk = []
+            else:
+                if not cross_factor_set:
+                    self._set_pedestrians_cross_factor()
+                    cross_factor_set = True
+                if not batched:
+                    self._spawn_walker_sequential(entry)
+                    continue
+                walker_chunk.append(entry)
+                if len(walker_chunk) >= settings.spawn_batch_size:
+                    self._spawn_walker_batch(settings, walker_chunk)
+                    walker_chunk = []
+
+        if vehicle_chunk:
+            self._spawn_vehicle_batch(settings, vehicle_chunk, [])
+        if walker_chunk:
+            self._spawn_walker_batch(settings, walker_chunk)
+
+        if self.spawn_failures:
+            print(f"Streamed spawn finished with {len(self.spawn_failures)} failed entries.")
+
+    def _spawn_spectator_sequential(self, spectator_spec):
+        if not spectator_spec:
+            return
+        spectator = self._move_spectator(spectator_spec)
+
+        # Attach sensors to the spectator if spawn_walkersensor_v2v is True
+        if spectator_spec.spawn_walkersensor_v2v:
+            spectator_sensors = attach_sensors_to_vehicle(self.world, self.bp_lib, spectator, self.sensor_pipeline,
+                                                          **self.v2v_settings)
+            self._wait_for_tick()
+            self.spawned_actors.extend(spectator_sensors)
+
+    def _spawn_vehicle_sequential(self, settings, vehicle_spec):
+        try:
+            vehicle = spawn_vehicle(
+                self.world,
+                self.bp_lib,
+                vehicle_spec.model,
+                vehicle_spec.transform,
+            )
+            self.spawned_actors.append(vehicle)
+
+            # Attach sensors to the vehicle if spawn_walkersensor_v2v is True
+            if vehicle_spec.spawn_walkersensor_v2v:
+                sensors = attach_sensors_to_vehicle(self.world, self.bp_lib, vehicle, self.sensor_pipeline,
+                                                    **self.v2v_settings)
+                self._wait_for_tick()
+                self.spawned_actors.extend(sensors)
+
+            set_autopilot(vehicle, True, self.traffic_manager.get_port())
+            self._configure_traffic_manager(settings, vehicle, vehicle_spec)
+        except Exception as e:
+            print(f"Failed to spawn vehicle: {e}")
+
+    def _spawn_walker_sequential(self, walker_spec):
+        try:
+            walker = spawn_walker(
+                self.world,
+                self.bp_lib,
+                walker_spec.spawn_point,
+                self.map_name,
+                spawn_points=self.spawn_points,
+                table=self.walker_table,
+            )
+            self.spawned_actors.append(walker)
+
+            # Add the walker to the manager
+            self.walker_manager.add_walker(walker, walker_spec.route, walker_spec.speed, walker_spec.route_locations)
+        except Exception as e:
+            print(f"Failed to spawn walker: {e}")
+
+    def _prepare_spectator_batched(self, spectator_spec):
+        # Returns the sensor parent entry of the spectator, spawned with the first vehicle batch
+        if not spectator_spec:
+            return []
+        spectator = self._move_spectator(spectator_spec)
+        if spectator_spec.spawn_walkersensor_v2v:
+            return [("spectator", None, spectator.id)]
+        return []
+
+    def _spawn_vehicle_batch(self, settings, vehicle_specs, sensor_parents):
+        batch_size = settings.spawn_batch_size
+        tm_port = self.traffic_manager.get_port()
+        sensor_parents = list(sensor_parents)
+
+        # Vehicles: SpawnActor -> SetAutopilot(FutureActor)
+        vehicle_entries = []
+        commands = []
+        for vehicle_spec in vehicle_specs:
+            try:
+                bp = self.bp_lib.find(vehicle_spec.model)
+                if not bp:
+                    raise ValueError(f"Vehicle model '{vehicle_spec.model}' not found in blueprint library.")
+                commands.append(build_vehicle_spawn_command(bp, vehicle_spec.transform, tm_port))
+                vehicle_entries.append(vehicle_spec)
+            except Exception as e:
+                self._record_failure("vehicle", vehicle_spec.index, e)
+
+        vehicle_ids = {}
+        for vehicle_spec, response in zip(vehicle_entries, apply_batch_in_chunks(self.client, commands, batch_size)):
+            if response.error:
+                self._record_failure("vehicle", vehicle_spec.index, response.error)
+            else:
+                vehicle_ids[vehicle_spec.index] = response.actor_id
+
+        vehicles = {actor_id: info.actor for actor_id, info in self.actor_registry.fetch(vehicle_ids.values()).items()}
+        self.spawned_actors.extend(vehicles.values())
+
+        for vehicle_spec in vehicle_entries:
+            if vehicle_spec.index in vehicle_ids and vehicle_spec.spawn_walkersensor_v2v:
+                sensor_parents.append(("vehicle", vehicle_spec.index, vehicle_ids[vehicle_spec.index]))
+
+        # Like attach_sensors_to_vehicle, a parent whose sensors cannot be built is skipped, not the whole batch
+        commands, sensor_entries = [], []
+        for kind, index, parent_id in sensor_parents:
+            try:
+                parent_commands = build_sensor_spawn_commands(self.bp_lib, parent_id, **self.v2v_settings)
+            except Exception as e:
+                self._record_failure(f"{kind} sensor", index, e)
+                continue
+            sensor_entries.append((kind, index, len(commands), len(parent_commands)))
+            commands.extend(parent_commands)
+        responses = apply_batch_in_chunks(self.client, commands, batch_size)
+
+        sensor_ids = []
+        for kind, index, start, count in sensor_entries:
+            for response in responses[start:start + count]:
+                if response.error:
+                    self._record_failure(f"{kind} sensor", index, response.error)
+                else:
+                    sensor_ids.append(response.actor_id)
+
+        sensors = [info.actor for info in self.actor_registry.fetch(sensor_ids).values()]
+        listen_to_sensors(sensors, self.sensor_pipeline)
+        self.spawned_actors.extend(sensors)
+        self._wait_for_tick()
+
+        # Traffic Manager settings still need the actor handles
+        entries, indices = [], {}
+        for vehicle_spec in vehicle_entries:
+            vehicle = vehicles.get(vehicle_ids.get(vehicle_spec.index))
+            if vehicle is None:
+                continue
+            entries.append(self._traffic_profile_entry(settings, vehicle, vehicle_spec))
+            indices[vehicle.id] = vehicle_spec.index
+        for vehicle_id, error in self.traffic_profiles.apply_many(entries):
+            self._record_failure("vehicle route", indices[vehicle_id], error)
+
+    def _spawn_walker_batch(self, settings, walker_specs):
+        walker_entries = []
+        commands = []
+        for walker_spec in walker_specs:
+            try:
+                commands.append(build_walker_spawn_command(self.bp_lib, walker_spec.spawn_point, self.spawn_points,
+                                                           self.map_name, self.walker_table))
+                walker_entries.append(walker_spec)
+            except Exception as e:
+                self._record_failure("walker", walker_spec.index, e)
+
+        walker_ids = {}
+        responses = apply_batch_in_chunks(self.client, commands, settings.spawn_batch_size)
+        for walker_spec, response in zip(walker_entries, responses):
+            if response.error:
+                self._record_failure("walker", walker_spec.index, response.error)
+            else:
+                walker_ids[walker_spec.index] = response.actor_id
+
+        walkers = {actor_id: info.actor for actor_id, info in self.actor_registry.fetch(walker_ids.values()).items()}
+        for walker_spec in walker_entries:
+            walker = walkers.get(walker_ids.get(walker_spec.index))
+            if walker is None:
+                continue
+            self.spawned_actors.append(walker)
+            self.walker_manager.add_walker(walker, walker_spec.route, walker_spec.speed, walker_spec.route_locations)
+
+    def _move_spectator(self, spectator_spec):
+        spectator = self.world.get_spectator()
+        spectator.set_transform(spectator_spec.transform)
+        return spectator
+
+    def _configure_traffic_manager(self, settings, vehicle, vehicle_spec):
+        self.traffic_profiles.apply(*self._traffic_profile_entry(settings, vehicle, vehicle_spec))
+
+    def _traffic_profile_entry(self, settings, vehicle, vehicle_spec):
+        # (vehicle, profile name, profile, path) as taken by TrafficManagerProfiles.apply
+        name = vehicle_spec.traffic_profile
+        path = [self.spawn_points[index].location for index in vehicle_spec.route]
+        return vehicle, name, settings.traffic_profiles[name], path
+
+    def audit_traffic_manager(self):
+        """
+        Prints how many vehicles the scenario put under the Traffic Manager, per profile.
+
+        Uses the profiles applied by this executor and the actor registry, so it costs
+        no server calls.
+        """
+        summary = self.traffic_profiles.summary() if self.traffic_profiles else {"vehicles": 0, "profiles": {}, "calls": 0}
+        print(f"Vehicles in the world: {len(self.actor_registry.filter('vehicle.*'))}, "
+              f"configured by the scenario: {summary['vehicles']} {summary['profiles']}, "
+              f"Traffic Manager calls: {summary['calls']}")
+        return summary
+
+    def _set_pedestrians_cross_factor(self):
+        percentagePedestriansCrossing = 1.0
+        self.world.set_pedestrians_cross_factor(percentagePedestriansCrossing)
+        self._wait_for_tick()
+
+    def _wait_for_tick(self):
+        if self.synchronous:
+            self.world.tick()
+        else:
+            self.world.wait_for_tick()
+
+    def _record_failure(self, kind, index, error):
+        self.spawn_failures.append({"kind": kind, "index": index, "error": str(error)})
+        print(f"Failed to spawn {kind} #{index}: {error}")
+
     def cleanup(self):
         for actor in self.spawned_actors:
             if actor.is_alive:
@@ -115,4 +373,7 @@ class ScenarioExecutor:
                     actor.destroy()
                 except Exception as e:
                     print(f"Failed to destroy actor: {e}")
-        self.spawned_actors = []
\ No newline at end of file
+        self.actor_registry.discard(actor.id for actor in self.spawned_actors)
+        if self.traffic_profiles:
+            self.traffic_profiles.forget(actor.id for actor in self.spawned_actors)
+        self.spawned_actors = []
@@ -0,0 +1,339 @@
+# scenario_model.py
+from dataclasses import dataclass
+
+import carla
+from utils.walker_utils import get_walker_spawn_table
+from utils.traffic_profiles import BUILTIN_PROFILES, PROFILE_DEFAULTS, freeze_profile
+
+DEFAULT_VEHICLE_MODEL = "vehicle.tesla.model3"
+DEFAULT_WALKER_SPEED = 1.4
+
+class ScenarioValidationError(ValueError):
+    """
+    Raised when a scenario does not fit the map, with one message per problem.
+    """
+
+    def __init__(self, path, errors):
+        self.path = path
+        self.errors = list(errors)
+        super().__init__(f"Invalid scenario {path or ''}:\n  " + "\n  ".join(self.errors))
+
+# Poses are kept as (x, y, z, pitch, yaw, roll) tuples so compiled scenarios can be pickled
+def pose_from_transform(transform):
+    location, rotation = transform.location, transform.rotation
+    return (location.x, location.y, location.z, rotation.pitch, rotation.yaw, rotation.roll)
+
+def transform_from_pose(pose):
+    x, y, z, pitch, yaw, roll = pose
+    return carla.Transform(carla.Location(x=x, y=y, z=z), carla.Rotation(pitch=pitch, yaw=yaw, roll=roll))  # type: ignore
+
+class _Record:
+    __slots__ = ()
+
+    def __reduce__(self):
+        # Rebuild through __init__ with positional fields, much faster to unpickle than slot state
+        return (self.__class__, tuple(getattr(self, name) for name in self.__slots__))
+
+@dataclass
+class ScenarioSettings(_Record):
+    __slots__ = (
+        "safe_distance_to_spectator", "safe_distance_between_vehicles", "batch_spawn", "spawn_batch_size",
+        "synchronous_mode", "fixed_delta_seconds", "seed", "max_ticks", "record_events",
+        "traffic_profiles", "traffic_manager_audit",
+        "v2v_broadcast_period", "v2v_adaptive_broadcast", "v2v_broadcast_period_range",
+    )
+    safe_distance_to_spectator: float
+    safe_distance_between_vehicles: float
+    batch_spawn: bool
+    spawn_batch_size: int
+    synchronous_mode: bool
+    fixed_delta_seconds: float
+    seed: int
+    max_ticks: int
+    record_events: str
+    traffic_profiles: dict  # Profile name -> frozen profile, built-in profiles included
+    traffic_manager_audit: bool
+    v2v_broadcast_period: float  # Seconds between V2V broadcasts, None for the plugin default
+    v2v_adaptive_broadcast: bool  # None for the plugin default
+    v2v_broadcast_period_range: tuple  # (min, max) seconds of the adaptive period, None for the plugin default
+
+@dataclass
+class SpectatorSpec(_Record):
+    __slots__ = ("spawn_point", "pose", "spawn_walkersensor_v2v")
+    spawn_point: int
+    pose: tuple
+    spawn_walkersensor_v2v: bool
+
+    @property
+    def transform(self):
+        return transform_from_pose(self.pose)
+
+@dataclass
+class VehicleSpec(_Record):
+    __slots__ = (
+        "index", "model", "spawn_point", "pose", "route", "stop_at_end", "spawn_walkersensor_v2v", "traffic_profile",
+    )
+    index: int  # Position in the scenario's "vehicles" list
+    model: str
+    spawn_point: int
+    pose: tuple
+    route: tuple  # Spawn point indices
+    stop_at_end: bool
+    spawn_walkersensor_v2v: bool
+    traffic_profile: str  # Key of ScenarioSettings.traffic_profiles
+
+    @property
+    def transform(self):
+        return transform_from_pose(self.pose)
+
+@dataclass
+class WalkerSpec(_Record):
+    __slots__ = ("index", "spawn_point", "pose", "route", "route_locations", "speed")
+    index: int  # Position in the scenario's "walkers" list
+    spawn_point: int
+    pose: tuple  # Sidewalk offset already applied
+    route: tuple  # Spawn point indices
+    route_locations: tuple  # (x, y, z) of every route point, sidewalk offset applied
+    speed: float
+
+    @property
+    def transform(self):
+        return transform_from_pose(self.pose)
+
+@dataclass
+class Scenario(_Record):
+    __slots__ = ("path", "settings", "spectator", "vehicles", "walkers")
+    path: str
+    settings: ScenarioSettings
+    spectator: SpectatorSpec  # None if the scenario does not move the spectator
+    vehicles: tuple
+    walkers: tuple
+
+def compile_scenario(config, spawn_points, path=None, map_name="Town02"):
+    """
+    Validates a scenario dict against the map and builds the typed scenario model.
+
+    Every problem is collected before raising, so one run reports all bad entries.
+    Spawn point indices are resolved to poses here, walker poses with their sidewalk offset.
+
+    Args:
+        config (dict): The scenario as loaded from JSON.
+        spawn_points (list): List of carla.Transform objects representing spawn points.
+        path (str): Scenario file, used in error messages.
+        map_name (str): Short name of the map, used for the walker sidewalk layout.
+
+    Returns:
+        Scenario: The compiled scenario.
+
+    Raises:
+        ScenarioValidationError: If any entry is invalid for this map.
+    """
+    if not spawn_points:
+        raise RuntimeError("No spawn points available in the map.")
+    if not isinstance(config, dict):
+        raise ScenarioValidationError(path, ["The scenario must be a JSON object."])
+
+    errors = []
+    settings = compile_settings(config.get("scenario_config", {}), errors)
+    spectator = compile_spectator(config.get("spectator"), spawn_points, errors)
+    vehicles = [
+        compile_vehicle(index, vehicle_cfg, spawn_points, errors, settings.traffic_profiles)
+        for index, vehicle_cfg in enumerate(config.get("vehicles", []))
+    ]
+    table = get_walker_spawn_table(spawn_points, map_name)
+    walkers = [
+        compile_walker(index, walker_cfg, spawn_points, errors, map_name, table)
+        for index, walker_cfg in enumerate(config.get("walkers", []))
+    ]
+
+    if errors:
+        raise ScenarioValidationError(path, errors)
+    return Scenario(path=str(path) if path else None, settings=settings, spectator=spectator,
+                    vehicles=tuple(vehicles), walkers=tuple(walkers))
+
+def compile_settings(scenario_cfg, errors):
+    """
+    Builds the settings from a "scenario_config" section, appending problems to errors.
+
+    The V2V broadcast keys are optional: v2v_broadcast_period (seconds),
+    v2v_adaptive_broadcast (true/false) and v2v_broadcast_period_range ([min, max] seconds
+    of the adaptive period). Left out or null, the sensor attribute is not sent and the
+    plugin default applies, which plugin builds without these attributes rely on.
+    """
+    if not isinstance(scenario_cfg, dict):
+        errors.append(f"scenario_config: expected an object, got {scenario_cfg!r}")
+        scenario_cfg = {}
+    settings = ScenarioSettings(
+        safe_distance_to_spectator=_number(errors, "scenario_config.safe_distance_to_spectator",
+                                           scenario_cfg.get("safe_distance_to_spectator", 10.0)),
+        safe_distance_between_vehicles=_number(errors, "scenario_config.safe_distance_between_vehicles",
+                                               scenario_cfg.get("safe_distance_between_vehicles", 10.0)),
+        batch_spawn=bool(scenario_cfg.get("batch_spawn", False)),
+        spawn_batch_size=scenario_cfg.get("spawn_batch_size", 500),
+        synchronous_mode=bool(scenario_cfg.get("synchronous_mode", False)),
+        fixed_delta_seconds=_number(errors, "scenario_config.fixed_delta_seconds",
+                                    scenario_cfg.get("fixed_delta_seconds", 0.05)),
+        seed=scenario_cfg.get("seed"),
+        max_ticks=scenario_cfg.get("max_ticks"),
+        record_events=scenario_cfg.get("record_events"),
+        traffic_profiles=_compile_traffic_profiles(errors, scenario_cfg.get("traffic_profiles", {})),
+        traffic_manager_audit=bool(scenario_cfg.get("traffic_manager_audit", False)),
+        v2v_broadcast_period=_optional_number(errors, "scenario_config.v2v_broadcast_period",
+                                              scenario_cfg.get("v2v_broadcast_period")),
+        v2v_adaptive_broadcast=_optional_bool(scenario_cfg.get("v2v_adaptive_broadcast")),
+        v2v_broadcast_period_range=_compile_period_range(errors, scenario_cfg.get("v2v_broadcast_period_range")),
+    )
+    if not _is_int(settings.spawn_batch_size) or settings.spawn_batch_size <= 0:
+        errors.append(f"scenario_config.spawn_batch_size: expected a positive integer, got {settings.spawn_batch_size!r}")
+    if settings.max_ticks is not None and (not _is_int(settings.max_ticks) or settings.max_ticks < 0):
+        errors.append(f"scenario_config.max_ticks: expected a non-negative integer, got {settings.max_ticks!r}")
+    if settings.seed is not None and not _is_int(settings.seed):
+        errors.append(f"scenario_config.seed: expected an integer, got {settings.seed!r}")
+    if settings.v2v_broadcast_period is not None and settings.v2v_broadcast_period <= 0:
+        errors.append(f"scenario_config.v2v_broadcast_period: expected a positive number of seconds, "
+                      f"got {settings.v2v_broadcast_period!r}")
+    return settings
+
+def compile_spectator(spectator_cfg, spawn_points, errors):
+    """
+    Builds the spectator entry, or None if there is none or it is invalid.
+    """
+    if not spectator_cfg:
+        return None
+    spawn_point = spectator_cfg.get("spawn_point")
+    if not _check_index(errors, "spectator.spawn_point", spawn_point, len(spawn_points)):
+        return None
+    return SpectatorSpec(
+        spawn_point=spawn_point,
+        pose=pose_from_transform(spawn_points[spawn_point]),
+        spawn_walkersensor_v2v=bool(spectator_cfg.get("spawn_walkersensor_v2v", False)),
+    )
+
+def compile_vehicle(index, vehicle_cfg, spawn_points, errors, traffic_profiles=None):
+    """
+    Builds one vehicle entry, or None if it is invalid.
+    """
+    where = f"vehicles[{index}]"
+    if not isinstance(vehicle_cfg, dict):
+        errors.append(f"{where}: expected an object, got {vehicle_cfg!r}")
+        return None
+    spawn_point = vehicle_cfg.get("spawn_point")
+    route = vehicle_cfg.get("route", [])
+    model = vehicle_cfg.get("model", DEFAULT_VEHICLE_MODEL)
+    valid = isinstance(model, str)
+    if not valid:
+        errors.append(f"{where}.model: expected a blueprint id, got {model!r}")
+    valid &= _check_index(errors, f"{where}.spawn_point", spawn_point, len(spawn_points))
+    valid &= _check_route(errors, f"{where}.route", route, len(spawn_points))
+    traffic_profile = vehicle_cfg.get("traffic_profile", "route" if route else "default")
+    if traffic_profile not in (traffic_profiles if traffic_profiles is not None else BUILTIN_PROFILES):
+        errors.append(f"{where}.traffic_profile: unknown traffic profile {traffic_profile!r}")
+        valid = False
+    if not valid:
+        return None
+    return VehicleSpec(
+        index=index,
+        model=model,
+        spawn_point=spawn_point,
+        pose=pose_from_transform(spawn_points[spawn_point]),
+        route=tuple(route),
+        stop_at_end=bool(vehicle_cfg.get("stop_at_end", False)),
+        spawn_walkersensor_v2v=bool(vehicle_cfg.get("spawn_walkersensor_v2v", False)),
+        traffic_profile=traffic_profile,
+    )
+
+def compile_walker(index, walker_cfg, spawn_points, errors, map_name="Town02", table=None):
+    """
+    Builds one walker entry, or None if it is invalid.
+
+    Pass the WalkerSpawnTable of the map as table when compiling many walkers, so it is
+    not looked up again for every one of them.
+    """
+    where = f"walkers[{index}]"
+    if not isinstance(walker_cfg, dict):
+        errors.append(f"{where}: expected an object, got {walker_cfg!r}")
+        return None
+    spawn_point = walker_cfg.get("spawn_point")
+    route = walker_cfg.get("go_to_point", [])
+    speed = _number(errors, f"{where}.speed", walker_cfg.get("speed", DEFAULT_WALKER_SPEED))
+    valid = speed is not None
+    if table is None:
+        table = get_walker_spawn_table(spawn_points, map_name)
+    if _check_index(errors, f"{where}.spawn_point", spawn_point, len(spawn_points)):
+        if not table.is_valid(spawn_point):
+            errors.append(f"{where}.spawn_point: spawn point {spawn_point} is not available for walkers")
+            valid = False
+    else:
+        valid = False
+    valid &= _check_route(errors, f"{where}.go_to_point", route, len(spawn_points))
+    if not valid:
+        return None
+
+    return WalkerSpec(
+        index=index,
+        spawn_point=spawn_point,
+        pose=tuple(table.locations[spawn_point].tolist() + table.rotations[spawn_point].tolist()),
+        route=tuple(route),
+        route_locations=tuple(map(tuple, table.targets(route).tolist())),
+        speed=speed,
+    )
+
+def _compile_traffic_profiles(errors, profiles_cfg):
+    profiles = {name: freeze_profile(profile) for name, profile in BUILTIN_PROFILES.items()}
+    if not isinstance(profiles_cfg, dict):
+        errors.append(f"scenario_config.traffic_profiles: expected an object, got {profiles_cfg!r}")
+        return profiles
+    for name, profile in profiles_cfg.items():
+        where = f"scenario_config.traffic_profiles.{name}"
+        if not isinstance(profile, dict):
+            errors.append(f"{where}: expected an object, got {profile!r}")
+            continue
+        unknown = sorted(set(profile) - set(PROFILE_DEFAULTS))
+        if unknown:
+            errors.append(f"{where}: unknown Traffic Manager settings {unknown}, expected some of {sorted(PROFILE_DEFAULTS)}")
+            continue
+        # A profile extends the built-in profile of the same name, if any
+        profiles[name] = freeze_profile({**BUILTIN_PROFILES.get(name, {}), **profile})
+    return profiles
+
+def _check_index(errors, where, value, spawn_count):
+    if not _is_int(value) or not 0 <= value < spawn_count:
+        errors.append(f"{where}: spawn point {value!r} is not in 0..{spawn_count - 1}")
+        return False
+    return True
+
+def _check_route(errors, where, route, spawn_count):
+    if not isinstance(route, list):
+        errors.append(f"{where}: route must be a list of spawn point indices, got {route!r}")
+        return False
+    return all([_check_index(errors, f"{where}[{i}]", index, spawn_count) for i, index in enumerate(route)])
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _compile_period_range(errors, period_range):
+    if period_range is None:
+        return None
+    where = "scenario_config.v2v_broadcast_period_range"
+    if not isinstance(period_range, (list, tuple)) or len(period_range) != 2:
+        errors.append(f"{where}: expected [min, max] seconds, got {period_range!r}")
+        return None
+    minimum, maximum = (_number(errors, where, value) for value in period_range)
+    if minimum is None or maximum is None:
+        return None
+    if not 0 < minimum <= maximum:
+        errors.append(f"{where}: expected 0 < min <= max, got {list(period_range)!r}")
+        return None
+    return (minimum, maximum)
+
+def _optional_bool(value):
+    return None if value is None else bool(value)
+
+def _optional_number(errors, where, value):
+    return None if value is None else _number(errors, where, value)
+
+def _number(errors, where, value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        errors.append(f"{where}: expected a number, got {value!r}")
+        return None
+    return float(value)
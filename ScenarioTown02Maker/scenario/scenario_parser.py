@@ -1,13 +1,93 @@
+import hashlib
 import json
+import pickle
 from pathlib import Path
 
+from scenario import scenario_model
+from utils import traffic_profiles, walker_utils
+from scenario.scenario_model import compile_scenario, pose_from_transform
+from scenario.scenario_stream import ScenarioStream
+
+SCENARIO_CACHE_DIR = Path(__file__).resolve().parent.parent / "cache" / "scenarios"
+# Modules whose code or tables end up in a compiled scenario: the model itself, the sidewalk
+# layouts walker poses and routes are offset with, and the built-in traffic profiles
+_COMPILER_MODULES = (scenario_model, walker_utils, traffic_profiles)
+
 def load_scenario_from_json(path):
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"Scenario file not found: {path}")
-    
+
     try:
         with open(path, "r") as f:
             return json.load(f)
     except json.JSONDecodeError as e:
         raise ValueError(f"Error parsing JSON file: {path}. Error: {e}")
+
+def load_scenario(path, spawn_points, cache_dir=SCENARIO_CACHE_DIR, map_name="Town02"):
+    """
+    Loads, validates and compiles a scenario file for the current map.
+
+    Compiled scenarios are pickled under cache_dir, keyed by the hash of the file, the
+    spawn points it was validated against and the code that compiles it, so a scenario that did not
+    change is not parsed or validated again. A .jsonl file is opened as a ScenarioStream
+    instead: only its header is read here and the entries are read while spawning.
+
+    Args:
+        path (str): Path of the scenario JSON file.
+        spawn_points (list): List of carla.Transform objects representing spawn points.
+        cache_dir (str or Path): Cache directory. If None, the cache is not used.
+        map_name (str): Short name of the map, used for the walker sidewalk layout.
+
+    Returns:
+        scenario_model.Scenario or ScenarioStream: The compiled or streamed scenario.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file is not valid JSON.
+        scenario_model.ScenarioValidationError: If the scenario does not fit the map.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Scenario file not found: {path}")
+    if path.suffix == ".jsonl":
+        return ScenarioStream(path, spawn_points, map_name)
+    content = path.read_bytes()
+
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = Path(cache_dir) / f"{_cache_key(content, spawn_points, map_name)}.pkl"
+        if cache_path.exists():
+            try:
+                with open(cache_path, "rb") as f:
+                    scenario = pickle.load(f)
+                scenario.path = str(path)
+                return scenario
+            except Exception as e:
+                print(f"Ignoring unreadable scenario cache {cache_path}: {e}")
+
+    try:
+        config = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Error parsing JSON file: {path}. Error: {e}")
+    scenario = compile_scenario(config, spawn_points, path=path, map_name=map_name)
+
+    if cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path = cache_path.with_suffix(".tmp")
+            with open(temporary_path, "wb") as f:
+                pickle.dump(scenario, f, protocol=pickle.HIGHEST_PROTOCOL)
+            temporary_path.replace(cache_path)
+        except OSError as e:
+            print(f"Could not write scenario cache {cache_path}: {e}")
+    return scenario
+
+def _cache_key(content, spawn_points, map_name):
+    digest = hashlib.sha256(content)
+    digest.update(map_name.encode())
+    digest.update(repr([pose_from_transform(spawn_point) for spawn_point in spawn_points]).encode())
+    # A change to the compiling code invalidates every cached scenario
+    for module in _COMPILER_MODULES:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
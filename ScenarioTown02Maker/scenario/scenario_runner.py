@@ -0,0 +1,238 @@
+# scenario_runner.py
+import glob
+import importlib
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_MAX_TICKS = 1000
+
+def collect_scenarios(patterns):
+    """
+    Expands directories and glob patterns into a sorted list of scenario files.
+
+    Args:
+        patterns (list): Scenario files, directories (all *.json and *.jsonl inside) or glob patterns.
+
+    Returns:
+        list: Paths of the scenario files, without duplicates.
+
+    Raises:
+        FileNotFoundError: If a pattern matches no scenario file.
+    """
+    paths = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(str(p) for p in path.glob("*.json*") if p.suffix in (".json", ".jsonl"))
+        else:
+            matches = sorted(glob.glob(pattern))
+        if not matches:
+            raise FileNotFoundError(f"No scenario files match: {pattern}")
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+def parse_endpoint(endpoint):
+    """
+    Parses a "host:port[:tm_port]" server endpoint.
+
+    Args:
+        endpoint (str): The endpoint string. The Traffic Manager port defaults to 8000.
+
+    Returns:
+        tuple: (host, port, tm_port).
+
+    Raises:
+        ValueError: If the endpoint is malformed.
+    """
+    parts = endpoint.split(":")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Invalid server endpoint '{endpoint}', expected host:port[:tm_port].")
+    try:
+        port = int(parts[1])
+        tm_port = int(parts[2]) if len(parts) == 3 else 8000
+    except ValueError:
+        raise ValueError(f"Invalid port in server endpoint '{endpoint}'.")
+    return parts[0], port, tm_port
+
+def run_scenario(client, scenario_path, tm_port=8000, max_ticks=DEFAULT_MAX_TICKS, profiler=None):
+    """
+    Runs one scenario to completion on an already connected client.
+
+    Args:
+        client (carla.Client): Client connected to the server that runs the scenario.
+        scenario_path (str): Path of the scenario JSON file.
+        tm_port (int): Port of the Traffic Manager to use on that server.
+        max_ticks (int): Ticks to run when the scenario does not set scenario_config.max_ticks.
+        profiler (TickProfiler): If given, records the ticks and counts the calls made through
+            the client, world and Traffic Manager in profiler.rpc_counts.
+
+    Returns:
+        dict: Per-scenario result with status, error, spawn failures and timings, plus the
+            number of calls made during setup when profiling.
+    """
+    # Imported here so worker processes can swap the carla module before these load
+    from scenario.scenario_parser import load_scenario
+    from scenario.scenario_executor import ScenarioExecutor
+    from scenario.tick_scheduler import (
+        TickScheduler, apply_simulation_settings, STAGE_ACTORS, STAGE_WALKERS, STAGE_SPECTATOR, STAGE_SENSORS,
+    )
+    from utils.walker_route_manager import WalkerManager
+    from utils.spectator_controller import SpectatorController
+    from utils.sensor_pipeline import SensorEventPipeline
+    from utils.actor_registry import ActorRegistry
+    from utils.map_context import MapContext
+    from utils.tick_profiler import RpcCounter
+
+    result = {"scenario": str(scenario_path), "status": "ok", "error": None, "spawn_failures": [],
+              "ticks": 0, "setup_seconds": 0.0, "run_seconds": 0.0}
+    world = client.get_world()
+    original_settings = world.get_settings()
+    traffic_manager = client.get_trafficmanager(tm_port)
+    if profiler is not None:
+        client = RpcCounter(client, profiler.rpc_counts)
+        world = RpcCounter(world, profiler.rpc_counts)
+        traffic_manager = RpcCounter(traffic_manager, profiler.rpc_counts)
+    executor = None
+    start = time.perf_counter()
+    try:
+        map_context = MapContext(world)
+        spawn_points = map_context.spawn_points
+        map_name = map_context.map_name
+        scenario = load_scenario(scenario_path, spawn_points, map_name=map_name)
+        synchronous = apply_simulation_settings(world, traffic_manager, scenario.settings)
+
+        actor_registry = ActorRegistry(world)
+        walker_manager = WalkerManager(world, spawn_points, client=client, actor_registry=actor_registry,
+                                       map_name=map_name)
+        sensor_pipeline = SensorEventPipeline(world, actor_registry=actor_registry)
+        executor = ScenarioExecutor(world, traffic_manager, map_context.blueprints, spawn_points,
+                                    walker_manager, client=client, synchronous=synchronous,
+                                    sensor_pipeline=sensor_pipeline, actor_registry=actor_registry,
+                                    map_name=map_name)
+        executor.execute(scenario)
+        result["spawn_failures"] = executor.spawn_failures
+
+        spectator = world.get_spectator()
+        spectator_controller = SpectatorController(
+            world, traffic_manager, client=client, carla_map=map_context.map, lane_index=map_context.lane_index,
+            safe_distance=scenario.settings.safe_distance_to_spectator, actor_registry=actor_registry,
+            managed=executor.traffic_profiles.applied,
+        )
+        if profiler is not None:
+            profiler.actor_count = actor_registry.__len__
+        scheduler = TickScheduler(world, synchronous=synchronous, profiler=profiler)
+        scheduler.add_hook("actors", actor_registry.sync, STAGE_ACTORS)
+        scheduler.add_hook("walkers", walker_manager.update_walkers, STAGE_WALKERS)
+        scheduler.add_hook("spectator", lambda: spectator_controller.update(spectator), STAGE_SPECTATOR)
+        scheduler.add_hook("sensors", lambda: sensor_pipeline.drain(scheduler.frame), STAGE_SENSORS)
+
+        setup_done = time.perf_counter()
+        result["setup_seconds"] = setup_done - start
+        if profiler is not None:
+            result["setup_rpcs"] = sum(profiler.rpc_counts.values())
+            result["actors"] = len(actor_registry)
+        result["ticks"] = scheduler.run(max_ticks=scenario.settings.max_ticks or max_ticks)
+        result["run_seconds"] = time.perf_counter() - setup_done
+        result["sensor_events"] = sensor_pipeline.stats()
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    finally:
+        if executor:
+            executor.cleanup()
+        traffic_manager.set_synchronous_mode(False)
+        world.apply_settings(original_settings)
+    result["total_seconds"] = time.perf_counter() - start
+    return result
+
+def _server_worker(endpoint, tasks, results, carla_module, max_ticks):
+    # Each worker owns one server; the carla module is swapped before any scenario code imports it
+    carla = importlib.import_module(carla_module)
+    sys.modules["carla"] = carla
+
+    host, port, tm_port = parse_endpoint(endpoint)
+    client = carla.Client(host, port)
+    client.set_timeout(10.0)
+
+    while True:
+        scenario_path = tasks.get()
+        if scenario_path is None:
+            break
+        result = run_scenario(client, scenario_path, tm_port=tm_port, max_ticks=max_ticks)
+        result["endpoint"] = endpoint
+        results.put(result)
+
+def run_scenarios(scenario_paths, endpoints, carla_module="carla", max_ticks=DEFAULT_MAX_TICKS):
+    """
+    Distributes scenarios over one worker process per server endpoint.
+
+    Workers pull scenarios from a shared queue, so a slow scenario does not hold back
+    the rest of the batch.
+
+    Args:
+        scenario_paths (list): Scenario files to run.
+        endpoints (list): Server endpoints as "host:port[:tm_port]", one worker each.
+        carla_module (str): Module imported as carla in the workers, e.g. "carla_standin".
+        max_ticks (int): Ticks per scenario when the scenario does not set max_ticks.
+
+    Returns:
+        dict: Summary with one result per scenario, in input order, and aggregate timings.
+    """
+    for endpoint in endpoints:
+        parse_endpoint(endpoint)
+
+    context = multiprocessing.get_context("spawn")
+    tasks = context.Queue()
+    results = context.Queue()
+    for scenario_path in scenario_paths:
+        tasks.put(str(scenario_path))
+    for _ in endpoints:
+        tasks.put(None)
+
+    start = time.perf_counter()
+    workers = [
+        context.Process(target=_server_worker, args=(endpoint, tasks, results, carla_module, max_ticks))
+        for endpoint in endpoints
+    ]
+    for worker in workers:
+        worker.start()
+
+    collected = {}
+    while len(collected) < len(scenario_paths):
+        if not any(worker.is_alive() for worker in workers) and results.empty():
+            break
+        try:
+            result = results.get(timeout=1.0)
+        except Exception:
+            continue
+        collected[result["scenario"]] = result
+    for worker in workers:
+        worker.join()
+
+    scenario_results = []
+    for scenario_path in scenario_paths:
+        scenario_results.append(collected.get(str(scenario_path), {
+            "scenario": str(scenario_path), "status": "failed", "error": "Worker exited before running the scenario",
+        }))
+
+    return {
+        "endpoints": list(endpoints),
+        "total": len(scenario_results),
+        "failed": sum(1 for result in scenario_results if result["status"] != "ok"),
+        "wall_seconds": time.perf_counter() - start,
+        "results": scenario_results,
+    }
+
+def write_summary(summary, path):
+    """
+    Writes a run summary as JSON.
+
+    Args:
+        summary (dict): Summary returned by run_scenarios.
+        path (str): Destination file.
+    """
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=4)
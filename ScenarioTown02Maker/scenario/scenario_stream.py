@@ -0,0 +1,129 @@
+# scenario_stream.py
+import json
+from collections import namedtuple
+from pathlib import Path
+
+from scenario.scenario_model import (
+    ScenarioValidationError, compile_settings, compile_spectator, compile_vehicle, compile_walker,
+)
+from utils.walker_utils import get_walker_spawn_table
+
+# A vehicle or walker line that failed validation; the stream carries on with the next line
+InvalidEntry = namedtuple("InvalidEntry", ["kind", "index", "error"])
+
+HEADER_KEYS = ("scenario_config", "spectator")
+ENTRY_KEYS = ("vehicle", "walker")
+
+class ScenarioStream:
+    """
+    Reads a JSON Lines scenario one entry at a time.
+
+    Every line is an object with a single key: "scenario_config" and "spectator" lines
+    form the header and come first, followed by any number of "vehicle" and "walker"
+    lines holding the same fields as the entries of a JSON scenario. The header is read
+    when the stream is opened; entries() then reads, validates and yields the remaining
+    lines lazily, so spawning can start before the end of the file is reached.
+    """
+
+    def __init__(self, path, spawn_points, map_name="Town02"):
+        """
+        Args:
+            path (str): Path of the .jsonl scenario file.
+            spawn_points (list): List of carla.Transform objects representing spawn points.
+            map_name (str): Short name of the map, used for the walker sidewalk layout.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If a header line is not valid JSON.
+            scenario_model.ScenarioValidationError: If the header is invalid.
+        """
+        self.path = str(path)
+        if not Path(path).exists():
+            raise FileNotFoundError(f"Scenario file not found: {path}")
+        if not spawn_points:
+            raise RuntimeError("No spawn points available in the map.")
+        self.spawn_points = spawn_points
+        self.map_name = map_name
+        self.walker_table = get_walker_spawn_table(spawn_points, map_name)
+
+        header = {}
+        self._entries_offset = 0
+        self._entries_line = 1
+        with open(path, "rb") as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    self._entries_line += 1
+                    continue
+                key, value = self._parse(line, self._entries_line)
+                if key not in HEADER_KEYS:
+                    f.seek(offset)
+                    break
+                header[key] = value
+                self._entries_line += 1
+            self._entries_offset = f.tell()
+
+        errors = []
+        self.settings = compile_settings(header.get("scenario_config", {}), errors)
+        self.spectator = compile_spectator(header.get("spectator"), spawn_points, errors)
+        if errors:
+            raise ScenarioValidationError(self.path, errors)
+
+    def entries(self):
+        """
+        Yields the vehicle and walker entries in file order.
+
+        Yields:
+            VehicleSpec, WalkerSpec or InvalidEntry: One item per entry line. Lines that fail
+                validation are yielded as InvalidEntry instead of stopping the stream.
+
+        Raises:
+            ValueError: If a header line appears after the first entry, or a line is not JSON.
+        """
+        counts = {"vehicle": 0, "walker": 0}
+        with open(self.path, "rb") as f:
+            f.seek(self._entries_offset)
+            for line_number, line in enumerate(f, start=self._entries_line):
+                if not line.strip():
+                    continue
+                key, value = self._parse(line, line_number)
+                if key not in ENTRY_KEYS:
+                    raise ValueError(f"{self.path}:{line_number}: '{key}' must come before the first vehicle or walker.")
+
+                index = counts[key]
+                counts[key] += 1
+                errors = []
+                if key == "vehicle":
+                    spec = compile_vehicle(index, value, self.spawn_points, errors, self.settings.traffic_profiles)
+                else:
+                    spec = compile_walker(index, value, self.spawn_points, errors, self.map_name, self.walker_table)
+                yield spec if spec is not None else InvalidEntry(key, index, "; ".join(errors))
+
+    def _parse(self, line, line_number):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Error parsing JSON line {line_number} of {self.path}. Error: {e}")
+        if not isinstance(record, dict) or len(record) != 1 or next(iter(record)) not in HEADER_KEYS + ENTRY_KEYS:
+            raise ValueError(f"{self.path}:{line_number}: expected one of {HEADER_KEYS + ENTRY_KEYS} as the only key.")
+        return next(iter(record.items()))
+
+def write_scenario_jsonl(config, path):
+    """
+    Writes a scenario dict in the JSON Lines layout read by ScenarioStream.
+
+    Args:
+        config (dict): Scenario with the same layout as a JSON scenario file.
+        path (str): Destination file.
+    """
+    with open(path, "w") as f:
+        for key in HEADER_KEYS:
+            if config.get(key) is not None:
+                f.write(json.dumps({key: config[key]}) + "\n")
+        for vehicle_cfg in config.get("vehicles", []):
+            f.write(json.dumps({"vehicle": vehicle_cfg}) + "\n")
+        for walker_cfg in config.get("walkers", []):
+            f.write(json.dumps({"walker": walker_cfg}) + "\n")
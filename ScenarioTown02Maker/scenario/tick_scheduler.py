@@ -0,0 +1,131 @@
+# tick_scheduler.py
+import random
+
+from utils.tick_profiler import TICK_STAGE
+
+# Stage order of the per-tick hooks, lower runs first
+STAGE_ACTORS = 50
+STAGE_WALKERS = 100
+STAGE_SPECTATOR = 200
+STAGE_SENSORS = 300
+
+def apply_simulation_settings(world, traffic_manager, scenario_settings):
+    """
+    Applies the execution mode requested in scenario_config.
+
+    In synchronous mode the client drives world.tick() with a fixed delta and the
+    TrafficManager follows the same clock. A seed makes the TrafficManager and Python
+    random choices repeatable across runs.
+
+    Args:
+        world (carla.World): The CARLA world instance.
+        traffic_manager (carla.TrafficManager): The TrafficManager instance.
+        scenario_settings (ScenarioSettings): The settings of the compiled scenario.
+
+    Returns:
+        bool: True if the world now runs in synchronous mode.
+    """
+    synchronous = scenario_settings.synchronous_mode
+
+    settings = world.get_settings()
+    settings.synchronous_mode = synchronous
+    settings.fixed_delta_seconds = scenario_settings.fixed_delta_seconds if synchronous else None
+    world.apply_settings(settings)
+    traffic_manager.set_synchronous_mode(synchronous)
+
+    seed = scenario_settings.seed
+    if seed is not None:
+        random.seed(seed)
+        traffic_manager.set_random_device_seed(seed)
+
+    return synchronous
+
+class TickScheduler:
+    """
+    Advances the simulation and runs the per-tick hooks in a fixed order.
+
+    In synchronous mode the scheduler calls world.tick() itself, so a run goes as fast as
+    the server can simulate. Otherwise it waits for the server's own ticks. Hooks run
+    sorted by stage and then by registration order. With a TickProfiler, the tick itself
+    and every hook are timed as stages named after them.
+    """
+
+    def __init__(self, world, synchronous=False, profiler=None):
+        """
+        Args:
+            world (carla.World): The CARLA world instance.
+            synchronous (bool): Whether the world runs in synchronous mode.
+            profiler (TickProfiler): Records the per-tick stage timings, if given.
+        """
+        self.world = world
+        self.synchronous = synchronous
+        self.profiler = profiler
+        self.frame = None
+        self._hooks = []
+
+    def add_hook(self, name, callback, stage):
+        """
+        Registers a callable that runs once per tick.
+
+        Args:
+            name (str): Name of the hook, used in error messages.
+            callback (callable): Called without arguments after every tick.
+            stage (int): Hooks with a lower stage run first, e.g. STAGE_WALKERS.
+        """
+        self._hooks.append((stage, len(self._hooks), name, callback))
+        self._hooks.sort(key=lambda hook: hook[:2])
+
+    def tick(self):
+        """
+        Advances the simulation by one tick and runs every hook.
+
+        Returns:
+            int: The frame that was just simulated.
+        """
+        if self.profiler is not None:
+            return self._profiled_tick()
+        if self.synchronous:
+            self.frame = self.world.tick()
+        else:
+            self.frame = self.world.wait_for_tick().frame
+
+        for _, _, name, callback in self._hooks:
+            try:
+                callback()
+            except Exception as e:
+                raise RuntimeError(f"Tick hook '{name}' failed at frame {self.frame}: {e}") from e
+        return self.frame
+
+    def _profiled_tick(self):
+        profiler = self.profiler
+        profiler.begin_tick()
+        with profiler.stage(TICK_STAGE):
+            if self.synchronous:
+                self.frame = self.world.tick()
+            else:
+                self.frame = self.world.wait_for_tick().frame
+
+        for _, _, name, callback in self._hooks:
+            try:
+                with profiler.stage(name):
+                    callback()
+            except Exception as e:
+                raise RuntimeError(f"Tick hook '{name}' failed at frame {self.frame}: {e}") from e
+        profiler.end_tick(self.frame)
+        return self.frame
+
+    def run(self, max_ticks=None):
+        """
+        Ticks until interrupted or until max_ticks ticks have run.
+
+        Args:
+            max_ticks (int): Number of ticks to run. If None, runs until interrupted.
+
+        Returns:
+            int: The number of ticks that were run.
+        """
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            self.tick()
+            ticks += 1
+        return ticks
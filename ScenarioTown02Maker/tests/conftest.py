@@ -0,0 +1,26 @@
+# conftest.py
+"""
+Runs the tests against carla_standin, so no CARLA server or carla egg is needed.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import carla_standin
+
+sys.modules["carla"] = carla_standin
+
+@pytest.fixture
+def client():
+    return carla_standin.Client("localhost", 2000)
+
+@pytest.fixture
+def world(client):
+    return client.get_world()
+
+@pytest.fixture
+def spawn_points(world):
+    return world.get_map().get_spawn_points()
@@ -0,0 +1,35 @@
+from utils.actor_registry import ActorRegistry
+
+def _spawn_vehicles(world, spawn_points, count):
+    bp = world.get_blueprint_library().find("vehicle.tesla.model3")
+    return [world.spawn_actor(bp, spawn_points[index]) for index in range(count)]
+
+def test_sync_tracks_spawned_and_destroyed_actors(world, spawn_points):
+    registry = ActorRegistry(world)
+    vehicles = _spawn_vehicles(world, spawn_points, 3)
+    world.tick()
+    registry.sync()
+    assert {info.id for info in registry.filter("vehicle.*")} == {vehicle.id for vehicle in vehicles}
+
+    vehicles[0].destroy()
+    world.tick()
+    registry.sync()
+    assert vehicles[0].id not in registry
+    assert registry.fetches == 2
+
+def test_live_actors_are_never_evicted(world, spawn_points):
+    registry = ActorRegistry(world, max_size=2)
+    vehicles = _spawn_vehicles(world, spawn_points, 4)
+    registry.register(vehicles)
+
+    assert len(registry.filter("vehicle.*")) == 4
+
+def test_destroyed_actors_are_evicted_past_max_size(world, spawn_points):
+    registry = ActorRegistry(world, max_size=2)
+    vehicles = _spawn_vehicles(world, spawn_points, 4)
+    registry.register(vehicles[:2])
+    vehicles[0].destroy()
+    registry.register(vehicles[2:])
+
+    assert vehicles[0].id not in registry
+    assert {info.id for info in registry.filter("vehicle.*")} == {vehicle.id for vehicle in vehicles[1:]}
@@ -0,0 +1,88 @@
+import asyncio
+
+import carla
+
+from utils.async_client import AsyncCarlaClient, gather_bounded, run_timelines
+
+def _run(client, timeline, **kwargs):
+    async def main():
+        async with AsyncCarlaClient(client, **kwargs) as carla_async:
+            return await timeline(carla_async)
+    return asyncio.run(main())
+
+def test_spawn_control_and_destroy_in_batches(client, world, spawn_points):
+    blueprint = world.get_blueprint_library().find("vehicle.tesla.model3")
+
+    async def timeline(carla_async):
+        responses = await carla_async.spawn_many([(blueprint, spawn_points[i]) for i in range(5)], batch_size=2)
+        ids = [response.actor_id for response in responses]
+        await carla_async.apply_controls([(actor_id, carla.VehicleControl(throttle=1.0)) for actor_id in ids])
+        actors = await carla_async.get_actors(ids)
+        throttles = [actor._control.throttle for actor in actors]
+        destroyed = await carla_async.destroy_many(ids)
+        return responses, throttles, destroyed
+
+    responses, throttles, destroyed = _run(client, timeline)
+    assert not any(response.error for response in responses)
+    assert throttles == [1.0] * 5
+    assert not any(response.error for response in destroyed)
+    assert len(world.get_actors().filter("vehicle.*")) == 0
+
+def test_next_tick_is_shared(client, world):
+    async def timeline(carla_async):
+        calls = world.rpc_calls
+        snapshots = await asyncio.gather(*(carla_async.next_tick() for _ in range(4)))
+        return snapshots, world.rpc_calls - calls, await carla_async.next_tick()
+
+    snapshots, rpcs, later = _run(client, timeline)
+    assert len({snapshot.frame for snapshot in snapshots}) == 1
+    assert rpcs == 1
+    assert later.frame > snapshots[0].frame
+
+def test_sleep_on_the_simulation_clock(client):
+    async def timeline(carla_async):
+        start = await carla_async.next_tick()
+        after_ticks = await carla_async.sleep_ticks(3)
+        after_seconds = await carla_async.sleep_sim_seconds(0.5)
+        return start, after_ticks, after_seconds
+
+    start, after_ticks, after_seconds = _run(client, timeline)
+    assert after_ticks.frame == start.frame + 3
+    assert after_seconds.timestamp.elapsed_seconds >= after_ticks.timestamp.elapsed_seconds + 0.5
+
+def test_traffic_manager_setters(client, world, spawn_points):
+    vehicle = world.spawn_actor(world.get_blueprint_library().find("vehicle.tesla.model3"), spawn_points[3])
+
+    async def timeline(carla_async):
+        await carla_async.set_autopilot(vehicle)
+        await carla_async.traffic_manager_call("vehicle_percentage_speed_difference", vehicle, 20.0)
+
+    _run(client, timeline, tm_port=8010)
+    traffic_manager = client.get_trafficmanager(8010)
+    assert traffic_manager._registered[vehicle.id]
+    assert traffic_manager.vehicle_settings[vehicle.id]["percentage_speed_difference"] == 20.0
+
+def test_gather_bounded_limits_concurrency():
+    running, peak = 0, 0
+
+    async def job(value):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return value
+
+    assert asyncio.run(gather_bounded([job(i) for i in range(6)], 2)) == list(range(6))
+    assert peak == 2
+
+def test_run_timelines_keeps_going_when_one_fails():
+    async def ok():
+        return "ok"
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    ok_result, error = asyncio.run(run_timelines([ok(), failing()]))
+    assert ok_result == "ok"
+    assert isinstance(error, RuntimeError)
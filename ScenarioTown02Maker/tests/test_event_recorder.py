@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from utils.event_recorder import EventRecorder, EventRecording
+from utils.sensor_pipeline import SensorEvent, SAFE_DISTANCE, WALKER_DETECTION
+
+def _walker_event(sensor_id, walker_id, timestamp, own, received):
+    data = {"Timestamp": timestamp, "DetectedByOwnVehicle": own}
+    return SensorEvent(WALKER_DETECTION, sensor_id, walker_id, None, (1.0, 2.0, 0.5), data, received)
+
+def _record(path, chunk_size):
+    recorder = EventRecorder(path, chunk_size=chunk_size)
+    # Walker 7 is seen by sensor 1 on frame 10 and reaches sensor 2 over V2V on frame 12
+    recorder.record(10, [_walker_event(1, 7, 0.5, True, 100.0)])
+    recorder.record(11, [_walker_event(1, 7, 0.55, True, 100.05),
+                         SensorEvent(SAFE_DISTANCE, 3, 9, None, None, None, 100.05)])
+    recorder.record(12, [_walker_event(2, 7, 0.55, False, 100.1), _walker_event(1, 7, 0.6, True, 100.1)])
+    recorder.close()
+    return EventRecording(path)
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_round_trip(tmp_path, chunk_size):
+    recording = _record(tmp_path / "events", chunk_size)
+
+    assert len(recording) == 5
+    records = recording.query()
+    assert list(records["frame"]) == [10, 11, 11, 12, 12]
+    assert list(records["own"]) == [1, 1, -1, 0, 1]
+    assert np.isnan(records["timestamp"][2]) and np.isnan(records["x"][2])
+    np.testing.assert_allclose(records[0][["x", "y", "z"]].tolist(), (1.0, 2.0, 0.5))
+
+    frames = [(frame, len(records)) for frame, records in recording.replay()]
+    assert frames == [(10, 1), (11, 2), (12, 2)]
+    assert [frame for frame, _ in recording.replay(first_frame=11, last_frame=11)] == [11]
+
+def test_query_filters(tmp_path):
+    recording = _record(tmp_path / "events", 2)
+
+    assert len(recording.query(stream=SAFE_DISTANCE)) == 1
+    assert list(recording.query(sensor_id=1)["frame"]) == [10, 11, 12]
+    assert list(recording.query(actor_id=7, first_frame=11, last_frame=11)["sensor_id"]) == [1]
+    assert len(recording.query(first_frame=13)) == 0
+
+def test_propagation_latency(tmp_path):
+    recording = _record(tmp_path / "events", 2)
+
+    [latency] = recording.propagation_latency()
+    assert (latency["walker_id"], latency["sensor_id"], latency["frames"]) == (7, 2, 2)
+    assert latency["seconds"] == pytest.approx(0.1)
+
+def test_refuses_to_overwrite_a_recording(tmp_path):
+    EventRecorder(tmp_path).close()
+    with pytest.raises(FileExistsError):
+        EventRecorder(tmp_path)
+
+def test_missing_recording(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        EventRecording(tmp_path)
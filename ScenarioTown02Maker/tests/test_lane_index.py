@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from utils.lane_index import LaneIndex
+
+@pytest.fixture
+def index():
+    rng = np.random.default_rng(0)
+    locations = rng.uniform(-100.0, 100.0, (500, 3))
+    locations[:, 2] = 0.0
+    count = len(locations)
+    return LaneIndex("Town02", locations, np.arange(count), np.zeros(count), np.where(np.arange(count) % 2, 1, -1),
+                     np.zeros(count), cell_size=5.0)
+
+@pytest.mark.parametrize("point", [(0.0, 0.0, 0.0), (12.3, -45.6, 0.5), (-99.0, 99.0, 0.0), (400.0, -300.0, 0.0)])
+def test_nearest_matches_brute_force(index, point):
+    distances = np.linalg.norm(index.locations - point, axis=1)
+    assert distances[index.nearest(*point)] == distances.min()
+
+def test_lane_info_comes_from_the_nearest_waypoint(index):
+    x, y, z = index.locations[42]
+    assert index.lane_info(x, y, z) == (int(index.road_ids[42]), 0, int(index.lane_ids[42]))
+    assert list(index.lane_ids_for(index.locations[:10])) == list(index.lane_ids[:10])
+
+def test_rejects_empty_waypoints():
+    with pytest.raises(ValueError):
+        LaneIndex("Town02", np.empty((0, 3)), [], [], [], [])
+
+def test_from_map_caches_by_map_and_spacing(world, tmp_path, monkeypatch):
+    carla_map = world.get_map()
+    built = LaneIndex.from_map(carla_map, spacing=2.0, cache_dir=tmp_path)
+    assert (tmp_path / "lane_index_Town02_2.npz").exists()
+
+    def generate_waypoints(distance):
+        raise AssertionError("the cached index should be loaded")
+
+    monkeypatch.setattr(carla_map, "generate_waypoints", generate_waypoints)
+    loaded = LaneIndex.from_map(carla_map, spacing=2.0, cache_dir=tmp_path)
+    assert loaded.map_name == "Town02"
+    np.testing.assert_array_equal(loaded.locations, built.locations)
+    np.testing.assert_array_equal(loaded.lane_ids, built.lane_ids)
+
+    # Another spacing is another index
+    with pytest.raises(AssertionError):
+        LaneIndex.from_map(carla_map, spacing=0.5, cache_dir=tmp_path)
+
+def test_from_map_lanes_match_the_map(world, spawn_points):
+    carla_map = world.get_map()
+    index = LaneIndex.from_map(carla_map, cache_dir=None)
+    for transform in spawn_points[:20]:
+        location = transform.location
+        waypoint = carla_map.get_waypoint(location)
+        assert index.lane_info(location.x, location.y, location.z) == (
+            waypoint.road_id, waypoint.section_id, waypoint.lane_id)
@@ -0,0 +1,52 @@
+from scenario import scenario_executor
+from scenario.scenario_executor import ScenarioExecutor
+from utils.blueprint_cache import BlueprintCache
+from utils.walker_route_manager import WalkerManager
+
+SENSORS = ["sensor.other.v2v_broadcast", "sensor.other.walker_detection"]
+
+def _executor(client, world, spawn_points, bp_lib=None):
+    bp_lib = bp_lib or BlueprintCache(world.get_blueprint_library())
+    traffic_manager = client.get_trafficmanager(8000)
+    return ScenarioExecutor(world, traffic_manager, bp_lib, spawn_points, WalkerManager(world, spawn_points),
+                            client=client)
+
+def _batch_scenario(vehicles):
+    return {
+        "scenario_config": {"batch_spawn": True},
+        "vehicles": [{"spawn_point": spawn_point, "spawn_walkersensor_v2v": True} for spawn_point in vehicles],
+    }
+
+def _sensors_by_parent(world):
+    sensors = {}
+    for sensor in world.get_actors().filter("sensor.*"):
+        sensors.setdefault(sensor.parent.id, []).append(sensor.type_id)
+    return {parent_id: sorted(type_ids) for parent_id, type_ids in sensors.items()}
+
+def test_batch_skips_the_sensors_of_a_vehicle_that_cannot_be_built(client, world, spawn_points, monkeypatch):
+    calls = []
+    build = scenario_executor.build_sensor_spawn_commands
+
+    def build_sensor_spawn_commands(bp_lib, parent_id, **settings):
+        calls.append(parent_id)
+        if len(calls) == 2:
+            raise ValueError("bad V2V attribute")
+        return build(bp_lib, parent_id, **settings)
+
+    monkeypatch.setattr(scenario_executor, "build_sensor_spawn_commands", build_sensor_spawn_commands)
+    executor = _executor(client, world, spawn_points)
+    executor.execute(_batch_scenario([3, 4, 5]))
+
+    assert executor.spawn_failures == [{"kind": "vehicle sensor", "index": 1, "error": "bad V2V attribute"}]
+    assert _sensors_by_parent(world) == {calls[0]: SENSORS, calls[2]: SENSORS}
+
+def test_batch_survives_a_missing_sensor_blueprint(client, world, spawn_points):
+    bp_lib = BlueprintCache(world.get_blueprint_library())
+    bp_lib._blueprints["sensor.other.walker_detection"] = None
+    executor = _executor(client, world, spawn_points, bp_lib)
+    executor.execute(_batch_scenario([3, 4]))
+
+    assert [(failure["kind"], failure["index"]) for failure in executor.spawn_failures] == [
+        ("vehicle sensor", 0), ("vehicle sensor", 1)]
+    assert len(world.get_actors().filter("vehicle.*")) == 2
+    assert len(world.get_actors().filter("sensor.*")) == 0
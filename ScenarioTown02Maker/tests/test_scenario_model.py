@@ -0,0 +1,64 @@
+import pickle
+
+import pytest
+
+from scenario.scenario_model import ScenarioValidationError, compile_scenario, pose_from_transform
+
+def _errors(config, spawn_points):
+    with pytest.raises(ScenarioValidationError) as error:
+        compile_scenario(config, spawn_points, path="bad.json")
+    return error.value.errors
+
+def test_compiles_a_valid_scenario(spawn_points):
+    scenario = compile_scenario({
+        "scenario_config": {"max_ticks": 10, "v2v_broadcast_period": 0.5, "v2v_adaptive_broadcast": False,
+                            "v2v_broadcast_period_range": [0.2, 2], "traffic_profiles": {"slow": {"ignore_lights_percentage": 10.0}}},
+        "spectator": {"spawn_point": 12},
+        "vehicles": [{"spawn_point": 3, "route": [4, 5]}, {"spawn_point": 47, "traffic_profile": "slow"}],
+        "walkers": [{"spawn_point": 7, "go_to_point": [9], "speed": 2}],
+    }, spawn_points, path="good.json")
+
+    settings = scenario.settings
+    assert (settings.v2v_broadcast_period, settings.v2v_adaptive_broadcast) == (0.5, False)
+    assert settings.v2v_broadcast_period_range == (0.2, 2.0)
+    assert {"default", "route", "slow"} <= set(settings.traffic_profiles)
+    assert scenario.spectator.pose == pose_from_transform(spawn_points[12])
+    assert [vehicle.traffic_profile for vehicle in scenario.vehicles] == ["route", "slow"]
+    assert scenario.vehicles[0].route == (4, 5)
+    assert scenario.walkers[0].speed == 2.0 and len(scenario.walkers[0].route_locations) == 1
+    assert pickle.loads(pickle.dumps(scenario)) == scenario
+
+def test_v2v_settings_default_to_the_plugin(spawn_points):
+    settings = compile_scenario({}, spawn_points).settings
+    assert settings.v2v_broadcast_period is None
+    assert settings.v2v_adaptive_broadcast is None
+    assert settings.v2v_broadcast_period_range is None
+
+def test_reports_every_invalid_entry(spawn_points):
+    errors = _errors({
+        "scenario_config": {"max_ticks": -1, "spawn_batch_size": 0},
+        "spectator": {"spawn_point": 1000},
+        "vehicles": [{"spawn_point": 3, "route": [4, 999]}, {"spawn_point": 4, "traffic_profile": "missing"}, "car"],
+        "walkers": [{"spawn_point": 17}, {"spawn_point": 7, "speed": "fast"}],
+    }, spawn_points)
+
+    assert errors == [
+        "scenario_config.spawn_batch_size: expected a positive integer, got 0",
+        "scenario_config.max_ticks: expected a non-negative integer, got -1",
+        f"spectator.spawn_point: spawn point 1000 is not in 0..{len(spawn_points) - 1}",
+        f"vehicles[0].route[1]: spawn point 999 is not in 0..{len(spawn_points) - 1}",
+        "vehicles[1].traffic_profile: unknown traffic profile 'missing'",
+        "vehicles[2]: expected an object, got 'car'",
+        "walkers[0].spawn_point: spawn point 17 is not available for walkers",
+        "walkers[1].speed: expected a number, got 'fast'",
+    ]
+
+@pytest.mark.parametrize("scenario_config, message", [
+    ({"v2v_broadcast_period": 0}, "scenario_config.v2v_broadcast_period: expected a positive number of seconds"),
+    ({"v2v_broadcast_period_range": [2.0, 1.0]}, "scenario_config.v2v_broadcast_period_range: expected 0 < min <= max"),
+    ({"v2v_broadcast_period_range": [1.0]}, "scenario_config.v2v_broadcast_period_range: expected [min, max] seconds"),
+    ({"traffic_profiles": {"slow": {"speed": 3}}}, "scenario_config.traffic_profiles.slow: unknown Traffic Manager settings"),
+])
+def test_rejects_invalid_settings(spawn_points, scenario_config, message):
+    [error] = _errors({"scenario_config": scenario_config}, spawn_points)
+    assert error.startswith(message)
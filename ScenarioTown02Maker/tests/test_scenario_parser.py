@@ -0,0 +1,32 @@
+import json
+
+from scenario import scenario_parser
+from scenario.scenario_model import Scenario
+
+SCENARIO = {
+    "scenario_config": {"batch_spawn": True},
+    "vehicles": [{"spawn_point": 3, "route": [4, 5]}],
+    "walkers": [{"spawn_point": 7, "go_to_point": [9]}],
+}
+
+def test_compiled_scenario_is_cached(tmp_path, spawn_points):
+    path = tmp_path / "scenario.json"
+    path.write_text(json.dumps(SCENARIO))
+    cache_dir = tmp_path / "cache"
+
+    first = scenario_parser.load_scenario(path, spawn_points, cache_dir=cache_dir)
+    second = scenario_parser.load_scenario(path, spawn_points, cache_dir=cache_dir)
+
+    assert isinstance(second, Scenario)
+    assert len(list(cache_dir.iterdir())) == 1
+    assert second.walkers[0].route_locations == first.walkers[0].route_locations
+
+def test_cache_key_covers_the_sidewalk_layouts_and_traffic_profiles(monkeypatch, tmp_path, spawn_points):
+    content = json.dumps(SCENARIO).encode()
+    key = scenario_parser._cache_key(content, spawn_points, "Town02")
+    for module in scenario_parser._COMPILER_MODULES[1:]:
+        source = tmp_path / f"{module.__name__}.py"
+        source.write_bytes(open(module.__file__, "rb").read() + b"\n# edited\n")
+        with monkeypatch.context() as patch:
+            patch.setattr(module, "__file__", str(source))
+            assert scenario_parser._cache_key(content, spawn_points, "Town02") != key
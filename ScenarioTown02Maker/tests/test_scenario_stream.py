@@ -0,0 +1,46 @@
+import pytest
+
+from scenario.scenario_model import ScenarioValidationError, VehicleSpec, WalkerSpec, compile_scenario
+from scenario.scenario_stream import InvalidEntry, ScenarioStream, write_scenario_jsonl
+
+SCENARIO = {
+    "scenario_config": {"v2v_broadcast_period": 0.5},
+    "spectator": {"spawn_point": 12},
+    "vehicles": [{"spawn_point": 3, "route": [4]}, {"spawn_point": 999}],
+    "walkers": [{"spawn_point": 7, "go_to_point": [9]}, {"spawn_point": 17}],
+}
+
+def test_entries_match_the_json_scenario(tmp_path, spawn_points):
+    path = tmp_path / "scenario.jsonl"
+    write_scenario_jsonl(SCENARIO, path)
+    stream = ScenarioStream(path, spawn_points)
+    entries = list(stream.entries())
+
+    valid = {**SCENARIO, "vehicles": SCENARIO["vehicles"][:1], "walkers": SCENARIO["walkers"][:1]}
+    scenario = compile_scenario(valid, spawn_points)
+    assert stream.settings == scenario.settings
+    assert stream.spectator == scenario.spectator
+    assert entries[0] == scenario.vehicles[0] and isinstance(entries[0], VehicleSpec)
+    assert entries[2] == scenario.walkers[0] and isinstance(entries[2], WalkerSpec)
+    assert (entries[1].kind, entries[1].index) == ("vehicle", 1)
+    assert entries[3] == InvalidEntry("walker", 1, "walkers[1].spawn_point: spawn point 17 is not available for walkers")
+
+def test_header_after_entries_is_rejected(tmp_path, spawn_points):
+    path = tmp_path / "scenario.jsonl"
+    path.write_text('{"vehicle": {"spawn_point": 3}}\n\n{"spectator": {"spawn_point": 12}}\n')
+    stream = ScenarioStream(path, spawn_points)
+    with pytest.raises(ValueError, match=":3: 'spectator' must come before"):
+        list(stream.entries())
+
+def test_invalid_header_is_reported_when_opening(tmp_path, spawn_points):
+    path = tmp_path / "scenario.jsonl"
+    path.write_text('{"scenario_config": {"v2v_broadcast_period_range": [0, 1]}}\n')
+    with pytest.raises(ScenarioValidationError):
+        ScenarioStream(path, spawn_points)
+
+@pytest.mark.parametrize("line", ['{"vehicle": ', '{"car": {}}', '{"vehicle": {}, "walker": {}}'])
+def test_malformed_lines(tmp_path, spawn_points, line):
+    path = tmp_path / "scenario.jsonl"
+    path.write_text(line + "\n")
+    with pytest.raises(ValueError):
+        list(ScenarioStream(path, spawn_points).entries())
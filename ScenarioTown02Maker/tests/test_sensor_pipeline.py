@@ -0,0 +1,37 @@
+from utils.actor_registry import ActorRegistry
+from utils.sensor_pipeline import SensorEvent, SensorEventPipeline, WalkerViews, WALKER_DETECTION
+
+def test_pushed_counts_queued_and_dropped_events(world):
+    pipeline = SensorEventPipeline(world, max_queue_size=2)
+    push = pipeline.callback(WALKER_DETECTION, 1)
+    for _ in range(5):
+        push({})
+
+    stats = pipeline.stats()[WALKER_DETECTION]
+    assert (stats["pushed"], stats["drained"], stats["dropped"], stats["queued"]) == (5, 0, 3, 2)
+
+    pipeline.drain()
+    stats = pipeline.stats()[WALKER_DETECTION]
+    assert (stats["pushed"], stats["drained"], stats["dropped"], stats["queued"]) == (5, 2, 3, 0)
+
+def _walker_event(actor_id, data, sensor_id=1):
+    return SensorEvent(WALKER_DETECTION, sensor_id, actor_id, None, data.get("Location"), data, 0.0)
+
+def test_walker_views_keep_the_newest_entry(world):
+    views = WalkerViews(ActorRegistry(world))
+    views.merge([
+        _walker_event(10, {"Timestamp": 2.0, "Version": 1}),
+        _walker_event(10, {"Timestamp": 1.0, "Version": 2}),
+        _walker_event(11, {"Timestamp": 2.0, "Version": 1}),
+        _walker_event(11, {"Removed": True}),
+    ])
+
+    assert views.view(1) == {10: {"Timestamp": 2.0, "Version": 1}}
+    assert (views.merged, views.ignored) == (2, 1)
+
+def test_walker_views_skip_entries_without_timestamp(world):
+    views = WalkerViews(ActorRegistry(world))
+    views.merge([_walker_event(10, {"Version": 1}), _walker_event(11, {"Timestamp": 1.0})])
+
+    assert list(views.view(1)) == [11]
+    assert views.ignored == 1
@@ -0,0 +1,38 @@
+import carla
+
+from utils.tick_profiler import RpcCounter, TickProfiler
+
+def test_calls_on_returned_actors_are_counted(world, spawn_points):
+    counted_world = RpcCounter(world)
+    bp_lib = world.get_blueprint_library()
+    vehicle = counted_world.spawn_actor(bp_lib.find("vehicle.tesla.model3"), spawn_points[3])
+    sensor = counted_world.spawn_actor(bp_lib.find("sensor.other.walker_detection"), carla.Transform(),
+                                       attach_to=vehicle)
+    vehicle.apply_control(carla.VehicleControl(throttle=1.0))
+    vehicle.get_transform()
+    for actor in counted_world.get_actors([vehicle.id, sensor.id]):
+        actor.destroy()
+
+    assert sensor.parent.id == vehicle.id
+    assert counted_world.calls == {"spawn_actor": 2, "apply_control": 1, "get_actors": 1, "destroy": 2}
+
+def test_actor_proxies_compare_like_actors(world, spawn_points):
+    counted_world = RpcCounter(world)
+    vehicle = counted_world.spawn_actor(world.get_blueprint_library().find("vehicle.audi.tt"), spawn_points[3])
+    found = counted_world.get_actors().find(vehicle.id)
+
+    assert found == vehicle
+    assert len({found, vehicle}) == 1
+
+def test_profiler_summary_counts_rpcs_per_tick():
+    profiler = TickProfiler(capacity=4)
+    for calls in (2, 4):
+        profiler.begin_tick()
+        with profiler.stage("tick"):
+            profiler.rpc_counts["tick"] = profiler.rpc_counts.get("tick", 0) + calls
+        profiler.end_tick(frame=profiler.ticks)
+
+    summary = profiler.summary()
+    assert summary["ticks"] == 2
+    assert summary["rpcs_per_tick"] == {"mean": 3.0, "max": 4}
+    assert summary["stages_ms"]["tick"]["count"] == 2
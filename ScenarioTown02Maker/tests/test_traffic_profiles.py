@@ -0,0 +1,29 @@
+from utils.traffic_profiles import BUILTIN_PROFILES, TrafficManagerProfiles
+
+def _vehicle(world, spawn_points, index):
+    vehicle = world.spawn_actor(world.get_blueprint_library().find("vehicle.tesla.model3"), spawn_points[index])
+    vehicle.set_autopilot(True, 8000)
+    return vehicle
+
+def test_distance_to_leading_vehicle_is_set_per_vehicle(client, world, spawn_points):
+    traffic_manager = client.get_trafficmanager(8000)
+    outsider = _vehicle(world, spawn_points, 3)
+    vehicle = _vehicle(world, spawn_points, 4)
+    overridden = _vehicle(world, spawn_points, 5)
+    profiles = TrafficManagerProfiles(traffic_manager, defaults={"distance_to_leading_vehicle": 5.0})
+
+    profiles.apply(vehicle, "route", BUILTIN_PROFILES["route"], [spawn_points[6].location])
+    profiles.apply(overridden, "close", {"distance_to_leading_vehicle": 2.0})
+
+    assert traffic_manager.global_settings == {}
+    assert outsider.id not in traffic_manager.vehicle_settings
+    assert traffic_manager.vehicle_settings[vehicle.id]["distance_to_leading_vehicle"] == 5.0
+    assert traffic_manager.vehicle_settings[overridden.id]["distance_to_leading_vehicle"] == 2.0
+    assert profiles.summary() == {"vehicles": 2, "profiles": {"route": 1, "close": 1}, "calls": 4}
+
+def test_only_values_that_differ_from_the_defaults_are_sent(client, world, spawn_points):
+    profiles = TrafficManagerProfiles(client.get_trafficmanager(8000))
+    profiles.apply(_vehicle(world, spawn_points, 3), "default", BUILTIN_PROFILES["default"])
+    profiles.apply(_vehicle(world, spawn_points, 4), "route", BUILTIN_PROFILES["route"])
+
+    assert profiles.calls == 1
@@ -0,0 +1,39 @@
+import carla
+
+from utils.blueprint_cache import BlueprintCache
+from utils.scenario_utils import attach_sensors_to_vehicle, build_sensor_spawn_commands
+
+V2V = "sensor.other.v2v_broadcast"
+
+def _vehicle(world, spawn_points, index=3):
+    return world.spawn_actor(world.get_blueprint_library().find("vehicle.tesla.model3"), spawn_points[index])
+
+def _v2v_sensor(sensors):
+    return next(sensor for sensor in sensors if sensor.type_id == V2V)
+
+def test_per_call_settings_do_not_leak_through_the_cache(world, spawn_points):
+    cache = BlueprintCache(world.get_blueprint_library())
+    first = attach_sensors_to_vehicle(world, cache, _vehicle(world, spawn_points, 3),
+                                      broadcast_period=0.5, adaptive_broadcast=True)
+    second = attach_sensors_to_vehicle(world, cache, _vehicle(world, spawn_points, 4))
+
+    assert _v2v_sensor(first).attributes["broadcast_period"] == "0.5"
+    assert _v2v_sensor(first).attributes["adaptive_broadcast"] == "true"
+    assert _v2v_sensor(second).attributes["broadcast_period"] == "1.0"
+    assert _v2v_sensor(second).attributes["adaptive_broadcast"] == "false"
+    assert cache.find(V2V).get_attribute("broadcast_period").as_str() == "1.0"
+
+def test_explicit_false_overrides_a_configured_adaptive_mode(world, spawn_points):
+    cache = BlueprintCache(world.get_blueprint_library(), {V2V: {"adaptive_broadcast": "true"}})
+    sensors = attach_sensors_to_vehicle(world, cache, _vehicle(world, spawn_points), adaptive_broadcast=False)
+
+    assert _v2v_sensor(sensors).attributes["adaptive_broadcast"] == "false"
+
+def test_variants_are_shared_per_attribute_set(world):
+    cache = BlueprintCache(world.get_blueprint_library())
+    first = build_sensor_spawn_commands(cache, 1, broadcast_period_range=(0.1, 3.0))[1].blueprint
+    second = build_sensor_spawn_commands(cache, 2, broadcast_period_range=(0.1, 3.0))[1].blueprint
+
+    assert first is second
+    assert first.get_attribute("min_broadcast_period").as_str() == "0.1"
+    assert first is not cache.find(V2V)
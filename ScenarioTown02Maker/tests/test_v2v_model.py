@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from utils.v2v_model import V2VPropagationModel, parse_model_spec
+
+def test_parse_model_spec():
+    assert parse_model_spec("10:0.5") == {"broadcast_radius": 10.0, "period": 0.5}
+    assert parse_model_spec("25:1:0.1") == {"broadcast_radius": 25.0, "period": 1.0, "latency": 0.1}
+
+@pytest.mark.parametrize("spec", ["10", "10:x", "10:0", "0:1", "-5:1", "10:-1", "10:1:-0.1"])
+def test_parse_model_spec_rejects_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        parse_model_spec(spec)
+
+@pytest.mark.parametrize("arguments", [
+    {"broadcast_radius": 0.0}, {"period": 0.0}, {"period": -1.0}, {"latency": -0.5},
+])
+def test_model_rejects_invalid_arguments(arguments):
+    with pytest.raises(ValueError):
+        V2VPropagationModel(**arguments)
+
+def _run(model, ticks=120, dt=0.1, seed=3):
+    # Vehicles and walkers random-walk in a 60 m square, so neighbours and detections change over time
+    rng = np.random.default_rng(seed)
+    vehicle_ids, walker_ids = list(range(1, 21)), list(range(100, 140))
+    vehicles = rng.uniform(0.0, 60.0, (len(vehicle_ids), 3))
+    walkers = rng.uniform(0.0, 60.0, (len(walker_ids), 3))
+    for tick in range(ticks):
+        vehicles += rng.normal(0.0, 1.0, vehicles.shape)
+        walkers += rng.normal(0.0, 0.2, walkers.shape)
+        model.step(tick * dt, vehicle_ids, vehicles, walker_ids, walkers)
+    return model
+
+@pytest.mark.parametrize("latency", [0.0, 0.25])
+def test_delta_updates_match_full_copies(latency):
+    arguments = {"broadcast_radius": 15.0, "period": 0.5, "latency": latency, "detection_range": 8.0,
+                 "stale_after": 4.0, "refresh_ttl": 1.0}
+    delta = _run(V2VPropagationModel(delta_updates=True, **arguments))
+    full = _run(V2VPropagationModel(delta_updates=False, **arguments))
+    assert delta.views == full.views
+    assert delta.broadcasts == full.broadcasts
+    assert 0 < delta.entries_sent < full.entries_sent
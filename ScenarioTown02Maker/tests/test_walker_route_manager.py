@@ -0,0 +1,69 @@
+import numpy as np
+
+from utils.walker_route_manager import WalkerManager
+from utils.walker_utils import get_walker_spawn_table
+
+def _spawn_walker(world, table, index):
+    return world.spawn_actor(world.get_blueprint_library().find("walker.pedestrian.0001"), table.transform(index))
+
+def test_walker_at_its_last_target_is_destroyed(world, spawn_points):
+    table = get_walker_spawn_table(spawn_points)
+    manager = WalkerManager(world, spawn_points)
+    walker = _spawn_walker(world, table, 7)
+    manager.add_walker(walker, [7], 1.4)
+
+    manager.update_walkers()
+
+    assert manager.walkers == []
+    assert world.get_actors().find(walker.id) is None
+
+def test_add_after_removing_every_walker(world, spawn_points):
+    table = get_walker_spawn_table(spawn_points)
+    manager = WalkerManager(world, spawn_points)
+    manager.add_walker(_spawn_walker(world, table, 7), [7], 1.4)
+    manager.update_walkers()
+    assert manager.walkers == []
+
+    walker = _spawn_walker(world, table, 7)
+    manager.add_walker(walker, [7, 9], 1.4)
+    manager.update_walkers()
+
+    assert manager.walkers == [walker]
+    assert manager._route_start.tolist() == [0]
+    assert manager._current_index.tolist() == [1]
+
+def test_removal_keeps_the_routes_of_the_others(world, spawn_points):
+    table = get_walker_spawn_table(spawn_points)
+    manager = WalkerManager(world, spawn_points)
+    done = _spawn_walker(world, table, 7)
+    walking = _spawn_walker(world, table, 9)
+    manager.add_walker(done, [7], 1.4)
+    manager.add_walker(walking, [9, 5, 3], 1.4)
+
+    manager.update_walkers()
+
+    assert manager.walkers == [walking]
+    start = manager._route_start[0] + manager._current_index[0]
+    assert manager._route_targets[start].tolist() == table.locations[5].tolist()
+
+def test_update_steers_toward_the_target_and_skips_unchanged_controls(world, spawn_points):
+    table = get_walker_spawn_table(spawn_points)
+    manager = WalkerManager(world, spawn_points)
+    walker = _spawn_walker(world, table, 7)
+    manager.add_walker(walker, [9], 1.4)
+
+    manager.update_walkers()
+    control = walker._control
+    target = table.locations[9]
+    start = walker.get_location()
+    offset = np.array((target[0] - start.x, target[1] - start.y))
+    assert control.speed == 1.4
+    assert np.allclose((control.direction.x, control.direction.y), offset / np.linalg.norm(offset), atol=0.05)
+
+    manager.update_walkers()
+    assert walker._control is control
+
+    for _ in range(20):
+        world.tick()
+    location = walker.get_location()
+    assert np.hypot(target[0] - location.x, target[1] - location.y) < np.linalg.norm(offset)
@@ -0,0 +1,47 @@
+import carla
+import pytest
+
+from utils.walker_utils import (
+    WalkerSpawnTable, get_walker_location_from_index, get_walker_spawn_table, is_valid_walker_spawn_index,
+    read_spawn_point_poses, walker_go_to_location, SPAWN_POINT_FILES,
+)
+
+def test_spawn_point_dump_matches_the_stand_in_map(spawn_points):
+    poses = read_spawn_point_poses(SPAWN_POINT_FILES["Town02"])
+    assert len(poses) == len(spawn_points) == 101
+    assert poses[7][:3] == (spawn_points[7].location.x, spawn_points[7].location.y, spawn_points[7].location.z)
+
+def test_location_from_index_applies_the_sidewalk_offset(spawn_points):
+    transform = get_walker_location_from_index(spawn_points, 27)
+    assert transform.location.y == pytest.approx(spawn_points[27].location.y - 4)
+    with pytest.raises(IndexError):
+        get_walker_location_from_index(spawn_points, len(spawn_points))
+
+def test_helpers_follow_the_given_table(spawn_points):
+    table = WalkerSpawnTable.from_spawn_points(spawn_points, map_name="Town10HD")
+    transform = get_walker_location_from_index(spawn_points, 27, table)
+    assert transform.location.y == pytest.approx(spawn_points[27].location.y)
+    assert is_valid_walker_spawn_index(17, table)
+    assert not is_valid_walker_spawn_index(17)
+
+def test_go_to_location_heads_for_the_table_target(world, spawn_points):
+    table = WalkerSpawnTable.from_spawn_points(spawn_points, map_name="Town10HD")
+    walker = world.spawn_actor(world.get_blueprint_library().find("walker.pedestrian.0001"), table.transform(27))
+    start = spawn_points[27].location
+    target = spawn_points[28].location
+    walker_go_to_location(walker, spawn_points, start, 28, 1.4, table)
+
+    control = walker._control
+    expected = carla.Vector3D(target.x - start.x, target.y - start.y, -start.z)
+    assert control.direction.x == pytest.approx(expected.x / expected.length())
+    assert control.speed == 1.4
+
+def test_spawn_tables_are_keyed_on_the_spawn_points(spawn_points):
+    moved = list(spawn_points)
+    moved[1] = carla.Transform(carla.Location(x=1.0, y=2.0, z=3.0), spawn_points[1].rotation)
+
+    table = get_walker_spawn_table(spawn_points)
+    assert get_walker_spawn_table(list(spawn_points)) is table
+    assert get_walker_spawn_table(moved) is not table
+    assert get_walker_spawn_table(moved).locations[1].tolist() == [1.0, 2.0, 3.0]
+    assert get_walker_spawn_table(spawn_points, "Town10HD") is not table
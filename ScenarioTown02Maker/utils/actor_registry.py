@@ -0,0 +1,180 @@
+import fnmatch
+from collections import OrderedDict, namedtuple
+
+# Static metadata of one actor, plus its handle for calls that need the actor itself
+ActorInfo = namedtuple("ActorInfo", ["id", "type_id", "attributes", "parent_id", "actor"])
+
+class ActorRegistry:
+    """
+    Local copy of the actor metadata of a world.
+
+    All actors are loaded with one world.get_actors() call. After that, sync() compares
+    the actor ids of a world snapshot with the previous one: ids that appeared are fetched
+    in a single get_actors(ids) call, ids that disappeared are evicted. type_id, attributes
+    and parent relationships are then served from memory. Past max_size actors, the least
+    recently used entries of destroyed actors are dropped. Live actors are never dropped,
+    since filter() and children() answer from the registry alone, so a world with more
+    live actors than max_size grows the registry past it.
+    """
+
+    def __init__(self, world, max_size=20000):
+        """
+        Args:
+            world (carla.World): The CARLA world instance.
+            max_size (int): Number of actors above which entries of destroyed actors are dropped.
+        """
+        self.world = world
+        self.max_size = max_size
+        self._trim_above = max_size  # Raised when live actors alone exceed max_size, so trimming is not rescanned every call
+        self.frame = None
+        self._actors = OrderedDict()  # actor id -> ActorInfo
+        self._snapshot_ids = frozenset()
+        self._unknown = set()  # Ids the server did not know since the last actor set change
+        self.fetches = 0  # get_actors calls made, to check the registry is doing its job
+
+        self._store(self.world.get_actors())
+        self.fetches += 1
+        self._snapshot_ids = frozenset(self._actors)
+
+    def sync(self, snapshot=None):
+        """
+        Brings the registry up to date with a world snapshot.
+
+        Args:
+            snapshot (carla.WorldSnapshot): Snapshot to sync with. If None, the current
+                snapshot of the world is used.
+        """
+        if snapshot is None:
+            snapshot = self.world.get_snapshot()
+        if snapshot.frame == self.frame:
+            return
+        self.frame = snapshot.frame
+
+        snapshot_ids = frozenset(actor_snapshot.id for actor_snapshot in snapshot)
+        if snapshot_ids == self._snapshot_ids:
+            return
+
+        # Actors added by register() but not in a snapshot yet are kept
+        self.discard(self._snapshot_ids - snapshot_ids)
+        self._snapshot_ids = snapshot_ids
+        self._trim_above = max(self.max_size, len(self._actors))
+        self._unknown.clear()
+        self.fetch(snapshot_ids.difference(self._actors))
+
+    def register(self, actors):
+        """
+        Adds actors the caller already holds, e.g. right after spawning them.
+
+        Args:
+            actors (iterable): carla.Actor objects.
+        """
+        self._store(actors)
+
+    def discard(self, actor_ids):
+        """
+        Evicts actors, e.g. right after destroying them.
+
+        Args:
+            actor_ids (iterable): Ids of the actors to drop.
+        """
+        for actor_id in actor_ids:
+            self._actors.pop(actor_id, None)
+
+    def fetch(self, actor_ids):
+        """
+        Returns the metadata of several actors, asking the server only for unknown ids.
+
+        Args:
+            actor_ids (iterable): Ids of the actors.
+
+        Returns:
+            dict: actor id -> ActorInfo for every id that exists.
+        """
+        found = {}
+        missing = []
+        for actor_id in actor_ids:
+            info = self._actors.get(actor_id)
+            if info is not None:
+                self._actors.move_to_end(actor_id)
+                found[actor_id] = info
+            elif actor_id not in self._unknown:
+                missing.append(actor_id)
+
+        if missing:
+            self.fetches += 1
+            for info in self._store(self.world.get_actors(missing)):
+                found[info.id] = info
+            self._unknown.update(actor_id for actor_id in missing if actor_id not in found)
+        return found
+
+    def get(self, actor_id):
+        """
+        Returns the metadata of one actor.
+
+        Args:
+            actor_id (int): Id of the actor.
+
+        Returns:
+            ActorInfo: The actor's metadata, or None if the actor does not exist.
+        """
+        return self.fetch((actor_id,)).get(actor_id)
+
+    def type_id(self, actor_id):
+        info = self.get(actor_id)
+        return info.type_id if info else None
+
+    def attributes(self, actor_id):
+        info = self.get(actor_id)
+        return info.attributes if info else {}
+
+    def parent_id(self, actor_id):
+        info = self.get(actor_id)
+        return info.parent_id if info else None
+
+    def children(self, actor_id):
+        """
+        Returns the ids of the actors attached to an actor, e.g. its sensors.
+        """
+        return [info.id for info in self._actors.values() if info.parent_id == actor_id]
+
+    def filter(self, pattern):
+        """
+        Returns the known actors whose type_id matches a wildcard pattern.
+
+        Args:
+            pattern (str): Pattern like "vehicle.*", as for ActorList.filter.
+
+        Returns:
+            list: Matching ActorInfo objects.
+        """
+        return [info for info in self._actors.values() if fnmatch.fnmatchcase(info.type_id, pattern)]
+
+    def __contains__(self, actor_id):
+        return actor_id in self._actors
+
+    def __len__(self):
+        return len(self._actors)
+
+    def _store(self, actors):
+        stored = []
+        for actor in actors:
+            parent = actor.parent
+            info = ActorInfo(actor.id, actor.type_id, dict(actor.attributes), parent.id if parent is not None else None, actor)
+            self._actors[actor.id] = info
+            self._actors.move_to_end(actor.id)
+            stored.append(info)
+        if len(self._actors) > self._trim_above:
+            self._trim()
+        return stored
+
+    def _trim(self):
+        # Only actors neither in the last snapshot nor alive are dropped, least recently used first
+        excess = len(self._actors) - self.max_size
+        destroyed = []
+        for actor_id, info in self._actors.items():
+            if len(destroyed) == excess:
+                break
+            if actor_id not in self._snapshot_ids and not info.actor.is_alive:
+                destroyed.append(actor_id)
+        self.discard(destroyed)
+        self._trim_above = max(self.max_size, len(self._actors))
@@ -0,0 +1,187 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import carla
+from utils.scenario_utils import apply_batch_in_chunks
+
+class AsyncCarlaClient:
+    """
+    asyncio façade over the blocking CARLA client calls used by the scenario tools.
+
+    Every call runs on a bounded thread pool, so coroutines can overlap their RPC round
+    trips while the event loop stays on one thread. next_tick is shared: every coroutine
+    awaiting it during the same tick gets the same snapshot from a single wait_for_tick,
+    which lets many scenario timelines pace themselves on the simulation clock.
+
+    Usage:
+        async with AsyncCarlaClient(client) as carla_async:
+            vehicle = await carla_async.spawn_actor(bp, transform)
+            await carla_async.sleep_ticks(20)
+    """
+
+    def __init__(self, client, max_workers=8, tm_port=8000):
+        """
+        Args:
+            client (carla.Client): Connected CARLA client.
+            max_workers (int): Maximum number of blocking calls in flight at once.
+            tm_port (int): Port of the Traffic Manager used by the Traffic Manager helpers.
+        """
+        self.client = client
+        self.world = client.get_world()
+        self.traffic_manager = client.get_trafficmanager(tm_port)
+        self.tm_port = tm_port
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="carla-rpc")
+        self._tick_task = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """
+        Waits for the calls in flight and stops the thread pool.
+        """
+        self._executor.shutdown(wait=True)
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Runs any blocking call on the thread pool and returns its result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def spawn_actor(self, blueprint, transform, attach_to=None):
+        return await self.run(self.world.spawn_actor, blueprint, transform, attach_to=attach_to)
+
+    async def try_spawn_actor(self, blueprint, transform, attach_to=None):
+        return await self.run(self.world.try_spawn_actor, blueprint, transform, attach_to=attach_to)
+
+    async def destroy(self, actor):
+        return await self.run(actor.destroy)
+
+    async def get_actors(self, actor_ids=None):
+        if actor_ids is None:
+            return await self.run(self.world.get_actors)
+        return await self.run(self.world.get_actors, list(actor_ids))
+
+    async def apply_control(self, actor, control):
+        return await self.run(actor.apply_control, control)
+
+    async def get_snapshot(self):
+        return await self.run(self.world.get_snapshot)
+
+    async def tick(self):
+        return await self.run(self.world.tick)
+
+    async def set_autopilot(self, vehicle, enabled=True):
+        return await self.run(vehicle.set_autopilot, enabled, self.tm_port)
+
+    async def traffic_manager_call(self, name, *args):
+        """
+        Calls a Traffic Manager setter by name, e.g. traffic_manager_call("set_path", vehicle, path).
+        """
+        return await self.run(getattr(self.traffic_manager, name), *args)
+
+    async def next_tick(self):
+        """
+        Waits for the next simulation tick and returns its snapshot.
+
+        Coroutines that wait at the same time share one wait_for_tick call.
+        """
+        if self._tick_task is None:
+            self._tick_task = asyncio.ensure_future(self._wait_for_tick())
+        return await asyncio.shield(self._tick_task)
+
+    async def sleep_ticks(self, ticks):
+        """
+        Waits for the given number of ticks and returns the last snapshot.
+        """
+        snapshot = None
+        for _ in range(ticks):
+            snapshot = await self.next_tick()
+        return snapshot
+
+    async def sleep_sim_seconds(self, seconds):
+        """
+        Waits until the given simulation time has passed and returns the last snapshot.
+        """
+        snapshot = await self.next_tick()
+        end = snapshot.timestamp.elapsed_seconds + seconds
+        while snapshot.timestamp.elapsed_seconds < end:
+            snapshot = await self.next_tick()
+        return snapshot
+
+    async def apply_batch_sync(self, commands, batch_size=500, due_tick_cue=False):
+        """
+        Sends commands through apply_batch_sync in chunks and returns one response per command.
+        """
+        return await self.run(apply_batch_in_chunks, self.client, list(commands), batch_size, due_tick_cue)
+
+    async def spawn_many(self, blueprint_transforms, batch_size=500):
+        """
+        Spawns actors in batches.
+
+        Args:
+            blueprint_transforms (list): (blueprint, transform) pairs.
+            batch_size (int): Maximum number of commands per batch.
+
+        Returns:
+            list: One carla.command.Response per actor, in the same order.
+        """
+        commands = [carla.command.SpawnActor(blueprint, transform) for blueprint, transform in blueprint_transforms]
+        return await self.apply_batch_sync(commands, batch_size)
+
+    async def destroy_many(self, actor_ids, batch_size=500):
+        """
+        Destroys actors by id in batches and returns one response per actor.
+        """
+        return await self.apply_batch_sync([carla.command.DestroyActor(actor_id) for actor_id in actor_ids], batch_size)
+
+    async def apply_controls(self, controls, batch_size=500):
+        """
+        Applies vehicle controls in batches.
+
+        Args:
+            controls (list): (vehicle id, carla.VehicleControl) pairs.
+        """
+        commands = [carla.command.ApplyVehicleControl(actor_id, control) for actor_id, control in controls]
+        return await self.apply_batch_sync(commands, batch_size)
+
+    async def _wait_for_tick(self):
+        try:
+            return await self.run(self.world.wait_for_tick)
+        finally:
+            # Cleared before the waiters resume, so their next call waits for a new tick
+            self._tick_task = None
+
+async def gather_bounded(coroutines, limit):
+    """
+    Awaits coroutines concurrently with at most limit of them running at once.
+
+    Returns:
+        list: Their results, in the same order.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(bounded(coroutine) for coroutine in coroutines))
+
+async def run_timelines(timelines):
+    """
+    Runs scenario timelines concurrently on the current event loop.
+
+    Args:
+        timelines (list): Coroutines, typically alternating AsyncCarlaClient calls with
+            next_tick or sleep_sim_seconds.
+
+    Returns:
+        list: Result or exception of every timeline, in the same order, so one failing
+            timeline does not cancel the others.
+    """
+    return await asyncio.gather(*timelines, return_exceptions=True)
@@ -0,0 +1,135 @@
+import random
+
+WALKER_BLUEPRINT = "walker.pedestrian.0001"
+SENSOR_BLUEPRINTS = ("sensor.other.walker_detection", "sensor.other.v2v_broadcast")
+
+class BlueprintCache:
+    """
+    Blueprint lookups resolved once per session.
+
+    BlueprintLibrary.find and filter scan the whole library on every call. The cache
+    keeps the resolved blueprints in dictionaries and offers the same find/filter
+    interface, so it can be passed wherever a bp_lib is expected. Attribute sets given
+    with configure are applied to the cached blueprint, so every actor spawned from it
+    gets them without setting them again.
+
+    The cached blueprints are shared: use configure rather than calling set_attribute on
+    a blueprint returned by find, and variant for attributes that only some actors get.
+    """
+
+    def __init__(self, bp_lib, attributes=None):
+        """
+        Args:
+            bp_lib (carla.BlueprintLibrary): The blueprint library.
+            attributes (dict): Blueprint id -> {attribute: value} applied when the id is resolved.
+        """
+        self.library = bp_lib
+        self._blueprints = {}  # Blueprint id -> blueprint, None if the library has no such id
+        self._patterns = {}  # Filter pattern -> list of blueprints
+        self._attributes = {}
+        self._variants = {}  # (blueprint id, sorted attribute items) -> blueprint copy
+        for blueprint_id, blueprint_attributes in (attributes or {}).items():
+            self.configure(blueprint_id, **blueprint_attributes)
+
+    def find(self, blueprint_id):
+        """
+        Returns the blueprint with the given id, or None if the library has none.
+        """
+        try:
+            return self._blueprints[blueprint_id]
+        except KeyError:
+            pass
+        try:
+            blueprint = self.library.find(blueprint_id)
+        except IndexError:
+            blueprint = None
+        if blueprint is not None:
+            for key, value in self._attributes.get(blueprint_id, {}).items():
+                blueprint.set_attribute(key, value)
+        self._blueprints[blueprint_id] = blueprint
+        return blueprint
+
+    def filter(self, pattern):
+        """
+        Returns the blueprints whose id matches the wildcard pattern.
+
+        Returns:
+            list: The matching blueprints, empty if there are none.
+        """
+        blueprints = self._patterns.get(pattern)
+        if blueprints is None:
+            blueprints = [self.find(blueprint.id) for blueprint in self.library.filter(pattern)]
+            self._patterns[pattern] = blueprints
+        return blueprints
+
+    def choice(self, pattern):
+        """
+        Returns a random blueprint matching the pattern.
+
+        Raises:
+            ValueError: If no blueprint matches.
+        """
+        blueprints = self.filter(pattern)
+        if not blueprints:
+            raise ValueError(f"No blueprint matches '{pattern}'.")
+        return random.choice(blueprints)
+
+    def configure(self, blueprint_id, **attributes):
+        """
+        Sets attributes on the cached blueprint, e.g. configure("sensor.other.v2v_broadcast", broadcast_radius=500).
+
+        Raises:
+            ValueError: If the library has no such blueprint.
+        """
+        self._attributes.setdefault(blueprint_id, {}).update({key: str(value) for key, value in attributes.items()})
+        self._variants = {key: blueprint for key, blueprint in self._variants.items() if key[0] != blueprint_id}
+        blueprint = self.find(blueprint_id)
+        if blueprint is None:
+            raise ValueError(f"Blueprint '{blueprint_id}' not found in blueprint library.")
+        for key, value in self._attributes[blueprint_id].items():
+            blueprint.set_attribute(key, value)
+        return blueprint
+
+    def variant(self, blueprint_id, **attributes):
+        """
+        Returns a copy of the blueprint with the configured attributes plus the given ones.
+
+        The shared blueprint returned by find is left untouched. Copies are cached per
+        attribute set, so spawning many actors with the same variant stays cheap.
+
+        Raises:
+            ValueError: If the library has no such blueprint.
+        """
+        key = (blueprint_id, tuple(sorted((name, str(value)) for name, value in attributes.items())))
+        blueprint = self._variants.get(key)
+        if blueprint is None:
+            if self.find(blueprint_id) is None:
+                raise ValueError(f"Blueprint '{blueprint_id}' not found in blueprint library.")
+            # BlueprintLibrary.find returns a copy
+            blueprint = self.library.find(blueprint_id)
+            for name, value in {**self._attributes.get(blueprint_id, {}), **dict(key[1])}.items():
+                blueprint.set_attribute(name, value)
+            self._variants[key] = blueprint
+        return blueprint
+
+    def preload(self, blueprint_ids=(), patterns=()):
+        """
+        Resolves blueprint ids and filter patterns ahead of spawning.
+
+        Returns:
+            list: The ids the library does not have.
+        """
+        missing = [blueprint_id for blueprint_id in blueprint_ids if self.find(blueprint_id) is None]
+        for pattern in patterns:
+            self.filter(pattern)
+        return missing
+
+    def preload_scenario(self, scenario):
+        """
+        Resolves the vehicle models, walker and sensor blueprints a compiled scenario spawns.
+
+        Returns:
+            list: The ids the library does not have.
+        """
+        model_ids = dict.fromkeys(vehicle_spec.model for vehicle_spec in scenario.vehicles)
+        return self.preload([*model_ids, WALKER_BLUEPRINT, *SENSOR_BLUEPRINTS])
@@ -0,0 +1,300 @@
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+from utils.sensor_pipeline import STREAMS, WALKER_DETECTION
+
+FORMAT_VERSION = 1
+
+# One file per column, every record adds one value to each of them
+COLUMNS = (
+    ("frame", np.int64),
+    ("timestamp", np.float64),  # Detection time reported by the sensor, NaN if it has none
+    ("received", np.float64),  # time.monotonic() when the client callback ran
+    ("stream", np.uint8),  # Index into STREAMS
+    ("sensor_id", np.uint32),
+    ("actor_id", np.uint32),  # Walker or vehicle the event is about
+    ("x", np.float32),
+    ("y", np.float32),
+    ("z", np.float32),
+    ("own", np.int8),  # 1 detected by the sensor's own vehicle, 0 shared over V2V, -1 unknown
+)
+RECORD_DTYPE = np.dtype(list(COLUMNS))
+
+class EventRecorder:
+    """
+    Records decoded sensor events as columnar, append-only binary files.
+
+    Events are buffered and written in chunks: every column is appended to its own
+    raw file and the chunk's row range and frame range go to chunks.jsonl. A run that is
+    interrupted keeps every chunk written so far. Register the recorder as a
+    SensorEventPipeline sink.
+    """
+
+    def __init__(self, path, chunk_size=65536):
+        """
+        Args:
+            path (str or Path): Directory of the recording, created if needed.
+            chunk_size (int): Number of records buffered before a chunk is written.
+
+        Raises:
+            FileExistsError: If the directory already holds a recording.
+        """
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.path.mkdir(parents=True, exist_ok=True)
+        if (self.path / "meta.json").exists():
+            raise FileExistsError(f"A recording already exists in '{self.path}'.")
+
+        meta = {
+            "version": FORMAT_VERSION,
+            "streams": list(STREAMS),
+            "columns": [[name, np.dtype(dtype).str] for name, dtype in COLUMNS],
+        }
+        with open(self.path / "meta.json", "w") as f:
+            json.dump(meta, f, indent=4)
+
+        self.rows = 0
+        self._stream_codes = {stream: code for code, stream in enumerate(STREAMS)}
+        self._buffer = []
+        self._files = {name: open(self.path / f"{name}.bin", "ab") for name, _ in COLUMNS}
+        self._chunks = open(self.path / "chunks.jsonl", "a")
+
+    def __call__(self, frame, events, summary):
+        self.record(frame, events)
+
+    def record(self, frame, events):
+        """
+        Buffers the events of one frame, writing a chunk when the buffer is full.
+
+        Args:
+            frame (int): Frame the events belong to.
+            events (list): SensorEvent objects from SensorEventPipeline.drain.
+        """
+        frame = -1 if frame is None else frame
+        for event in events:
+            x, y, z = _xyz(event.location)
+            data = event.data or {}
+            own = data.get("DetectedByOwnVehicle")
+            self._buffer.append((
+                frame,
+                data.get("Timestamp", math.nan),
+                event.received,
+                self._stream_codes[event.stream],
+                event.sensor_id,
+                event.actor_id,
+                x, y, z,
+                -1 if own is None else int(bool(own)),
+            ))
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered records as one chunk.
+        """
+        if not self._buffer:
+            return
+        records = np.array(self._buffer, dtype=RECORD_DTYPE)
+        for name, _ in COLUMNS:
+            records[name].tofile(self._files[name])
+            self._files[name].flush()
+
+        chunk = {
+            "start": self.rows,
+            "count": len(records),
+            "first_frame": int(records["frame"].min()),
+            "last_frame": int(records["frame"].max()),
+        }
+        self._chunks.write(json.dumps(chunk) + "\n")
+        self._chunks.flush()
+        self.rows += len(records)
+        self._buffer = []
+
+    def close(self):
+        """
+        Writes the remaining records and closes the files.
+        """
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._chunks.close()
+
+class EventRecording:
+    """
+    Read-only view of a recording made by EventRecorder.
+
+    Columns are memory-mapped, so only the chunks a query touches are read from disk.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str or Path): Directory of the recording.
+
+        Raises:
+            FileNotFoundError: If the directory holds no recording.
+            ValueError: If the recording was made with another format version.
+        """
+        self.path = Path(path)
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No event recording in '{self.path}'.")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported event recording version {meta['version']}.")
+        self.streams = meta["streams"]
+
+        # Only chunks that made it to chunks.jsonl are complete
+        self.chunks = []
+        with open(self.path / "chunks.jsonl") as f:
+            for line in f:
+                if line.strip():
+                    self.chunks.append(json.loads(line))
+        self.rows = self.chunks[-1]["start"] + self.chunks[-1]["count"] if self.chunks else 0
+
+        self.columns = {}
+        for name, dtype in meta["columns"]:
+            if self.rows:
+                self.columns[name] = np.memmap(self.path / f"{name}.bin", dtype=np.dtype(dtype), mode="r", shape=(self.rows,))
+            else:
+                self.columns[name] = np.empty(0, dtype=np.dtype(dtype))
+
+    def __len__(self):
+        return self.rows
+
+    def query(self, stream=None, sensor_id=None, actor_id=None, first_frame=None, last_frame=None):
+        """
+        Returns the records that match every given filter.
+
+        Args:
+            stream (str): Sensor type id, e.g. "sensor.other.v2v_broadcast".
+            sensor_id (int): Id of the sensor that reported the event.
+            actor_id (int): Id of the walker or vehicle the event is about.
+            first_frame (int): First frame to include.
+            last_frame (int): Last frame to include.
+
+        Returns:
+            numpy.ndarray: Structured array with RECORD_DTYPE, in recording order.
+        """
+        stream_code = self.streams.index(stream) if stream is not None else None
+        parts = []
+        for chunk in self.chunks:
+            if first_frame is not None and chunk["last_frame"] < first_frame:
+                continue
+            if last_frame is not None and chunk["first_frame"] > last_frame:
+                continue
+            rows = slice(chunk["start"], chunk["start"] + chunk["count"])
+            mask = np.ones(chunk["count"], dtype=bool)
+            if stream_code is not None:
+                mask &= self.columns["stream"][rows] == stream_code
+            if sensor_id is not None:
+                mask &= self.columns["sensor_id"][rows] == sensor_id
+            if actor_id is not None:
+                mask &= self.columns["actor_id"][rows] == actor_id
+            if first_frame is not None or last_frame is not None:
+                frames = self.columns["frame"][rows]
+                if first_frame is not None:
+                    mask &= frames >= first_frame
+                if last_frame is not None:
+                    mask &= frames <= last_frame
+            parts.append(self._records(rows, mask))
+        if not parts:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.concatenate(parts)
+
+    def replay(self, first_frame=None, last_frame=None):
+        """
+        Yields the records frame by frame, one chunk in memory at a time.
+
+        Args:
+            first_frame (int): First frame to replay.
+            last_frame (int): Last frame to replay.
+
+        Yields:
+            tuple: (frame, records) with records a structured array of that frame.
+        """
+        pending = None  # Records of a frame that continues in the next chunk
+        for chunk in self.chunks:
+            if first_frame is not None and chunk["last_frame"] < first_frame:
+                continue
+            if last_frame is not None and chunk["first_frame"] > last_frame:
+                break
+            records = self._chunk_records(chunk, first_frame, last_frame)
+            if pending is not None:
+                records = np.concatenate((pending, records))
+            if len(records) == 0:
+                pending = None
+                continue
+            boundaries = np.flatnonzero(np.diff(records["frame"])) + 1
+            starts = np.concatenate(([0], boundaries))
+            ends = np.concatenate((boundaries, [len(records)]))
+            for start, end in zip(starts[:-1], ends[:-1]):
+                yield int(records["frame"][start]), records[start:end]
+            pending = records[starts[-1]:ends[-1]]
+        if pending is not None and len(pending):
+            yield int(pending["frame"][0]), pending
+
+    def propagation_latency(self, walker_id=None):
+        """
+        Measures how long V2V sharing took to bring each walker to each sensor.
+
+        For every walker, the first own detection by any sensor is the reference. Every
+        sensor that first learned about the walker through a shared entry contributes one
+        row with the delay between both.
+
+        Args:
+            walker_id (int): Restricts the analysis to one walker.
+
+        Returns:
+            list: Dicts with walker_id, sensor_id, detected_frame, shared_frame, frames and seconds.
+        """
+        records = self.query(stream=WALKER_DETECTION, actor_id=walker_id)
+        latencies = []
+        for walker in np.unique(records["actor_id"]):
+            walker_records = records[records["actor_id"] == walker]
+            own = walker_records[walker_records["own"] == 1]
+            if len(own) == 0:
+                continue
+            origin = own[0]
+            shared = walker_records[walker_records["own"] == 0]
+            for sensor in np.unique(shared["sensor_id"]):
+                sensor_records = walker_records[walker_records["sensor_id"] == sensor]
+                first = sensor_records[0]
+                if first["own"] != 0:
+                    continue  # The sensor saw the walker itself before anything was shared
+                latencies.append({
+                    "walker_id": int(walker),
+                    "sensor_id": int(sensor),
+                    "detected_frame": int(origin["frame"]),
+                    "shared_frame": int(first["frame"]),
+                    "frames": int(first["frame"] - origin["frame"]),
+                    "seconds": float(first["received"] - origin["received"]),
+                })
+        return latencies
+
+    def _chunk_records(self, chunk, first_frame, last_frame):
+        rows = slice(chunk["start"], chunk["start"] + chunk["count"])
+        frames = self.columns["frame"][rows]
+        mask = np.ones(chunk["count"], dtype=bool)
+        if first_frame is not None:
+            mask &= frames >= first_frame
+        if last_frame is not None:
+            mask &= frames <= last_frame
+        return self._records(rows, mask)
+
+    def _records(self, rows, mask):
+        records = np.empty(int(mask.sum()), dtype=RECORD_DTYPE)
+        for name, _ in COLUMNS:
+            records[name] = self.columns[name][rows][mask]
+        return records
+
+def _xyz(location):
+    if location is None:
+        return math.nan, math.nan, math.nan
+    if hasattr(location, "x"):
+        return location.x, location.y, location.z
+    return tuple(location)[:3]
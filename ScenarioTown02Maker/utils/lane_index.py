@@ -0,0 +1,203 @@
+import math
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "cache"
+
+class LaneIndex:
+    """
+    In-process spatial index over the driving-lane waypoints of a map.
+
+    Waypoints are bucketed in a uniform XY grid so nearest-lane, road_id and lane_id
+    queries are answered locally instead of calling map.get_waypoint for every location.
+    The index is built once per map and saved to disk keyed by map name and spacing.
+    """
+
+    def __init__(self, map_name, locations, road_ids, section_ids, lane_ids, yaws, cell_size=10.0):
+        """
+        Args:
+            map_name (str): Short name of the map, e.g. "Town02".
+            locations (numpy.ndarray): (N, 3) waypoint locations.
+            road_ids (numpy.ndarray): (N,) road id of every waypoint.
+            section_ids (numpy.ndarray): (N,) section id of every waypoint.
+            lane_ids (numpy.ndarray): (N,) lane id of every waypoint.
+            yaws (numpy.ndarray): (N,) waypoint yaw in degrees.
+            cell_size (float): Size in meters of the grid cells.
+        """
+        if len(locations) == 0:
+            raise ValueError(f"Cannot build a lane index without waypoints for map '{map_name}'.")
+
+        self.map_name = map_name
+        self.cell_size = float(cell_size)
+
+        # Sort waypoints by grid cell so every cell is a contiguous slice
+        cells = np.floor(np.asarray(locations, dtype=np.float64)[:, :2] / self.cell_size).astype(np.int64)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        self.locations = np.asarray(locations, dtype=np.float64)[order]
+        self.road_ids = np.asarray(road_ids, dtype=np.int32)[order]
+        self.section_ids = np.asarray(section_ids, dtype=np.int32)[order]
+        self.lane_ids = np.asarray(lane_ids, dtype=np.int32)[order]
+        self.yaws = np.asarray(yaws, dtype=np.float32)[order]
+
+        cells = cells[order]
+        boundaries = np.flatnonzero(np.any(np.diff(cells, axis=0) != 0, axis=1)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(cells)]))
+        self._cells = {
+            (int(cells[start, 0]), int(cells[start, 1])): (int(start), int(end))
+            for start, end in zip(starts, ends)
+        }
+        self._neighbourhood = {}  # cell -> waypoint positions of the 3x3 block around it, filled lazily
+
+    @classmethod
+    def from_map(cls, carla_map, spacing=2.0, cache_dir=DEFAULT_CACHE_DIR, cell_size=10.0):
+        """
+        Loads the index for a map from disk, building and saving it on the first use.
+
+        Args:
+            carla_map (carla.Map): The map to index.
+            spacing (float): Distance in meters between generated waypoints.
+            cache_dir (str or Path): Directory of the saved indexes. If None, nothing is read or written.
+            cell_size (float): Size in meters of the grid cells.
+
+        Returns:
+            LaneIndex: The index for the map.
+        """
+        map_name = carla_map.name.split("/")[-1]
+        path = None
+        if cache_dir is not None:
+            path = Path(cache_dir) / f"lane_index_{map_name}_{spacing:g}.npz"
+            if path.exists():
+                return cls.load(path, cell_size=cell_size)
+
+        waypoints = carla_map.generate_waypoints(spacing)
+        locations = [(w.transform.location.x, w.transform.location.y, w.transform.location.z) for w in waypoints]
+        index = cls(
+            map_name,
+            np.asarray(locations, dtype=np.float64).reshape(-1, 3),
+            [w.road_id for w in waypoints],
+            [w.section_id for w in waypoints],
+            [w.lane_id for w in waypoints],
+            [w.transform.rotation.yaw for w in waypoints],
+            cell_size=cell_size,
+        )
+        if path is not None:
+            index.save(path)
+        return index
+
+    @classmethod
+    def load(cls, path, cell_size=10.0):
+        """
+        Loads an index saved with LaneIndex.save.
+
+        Args:
+            path (str or Path): The .npz file.
+            cell_size (float): Size in meters of the grid cells.
+
+        Returns:
+            LaneIndex: The loaded index.
+        """
+        with np.load(path) as data:
+            return cls(
+                str(data["map_name"]),
+                data["locations"],
+                data["road_ids"],
+                data["section_ids"],
+                data["lane_ids"],
+                data["yaws"],
+                cell_size=cell_size,
+            )
+
+    def save(self, path):
+        """
+        Saves the index arrays to a .npz file.
+
+        Args:
+            path (str or Path): The destination file.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            map_name=np.array(self.map_name),
+            locations=self.locations,
+            road_ids=self.road_ids,
+            section_ids=self.section_ids,
+            lane_ids=self.lane_ids,
+            yaws=self.yaws,
+        )
+
+    def nearest(self, x, y, z=0.0):
+        """
+        Finds the waypoint closest to a location.
+
+        Args:
+            x (float): X coordinate in meters.
+            y (float): Y coordinate in meters.
+            z (float): Z coordinate in meters.
+
+        Returns:
+            int: Position of the closest waypoint in the index arrays.
+        """
+        cx = math.floor(x / self.cell_size)
+        cy = math.floor(y / self.cell_size)
+        point = np.array((x, y, z))
+
+        # Fast path: the 3x3 block around the query holds the answer whenever the
+        # closest waypoint found there is within one cell size
+        candidates = self._neighbourhood.get((cx, cy))
+        if candidates is None:
+            candidates = self._neighbourhood_candidates(cx, cy)
+        if len(candidates):
+            offsets = self.locations[candidates] - point
+            distances = np.einsum("ij,ij->i", offsets, offsets)
+            local = int(np.argmin(distances))
+            if distances[local] <= self.cell_size * self.cell_size:
+                return int(candidates[local])
+
+        # Far from the road: a single scan over all waypoints is cheaper than growing the search
+        offsets = self.locations - point
+        return int(np.argmin(np.einsum("ij,ij->i", offsets, offsets)))
+
+    def lane_info(self, x, y, z=0.0):
+        """
+        Returns the lane of the waypoint closest to a location.
+
+        Args:
+            x (float): X coordinate in meters.
+            y (float): Y coordinate in meters.
+            z (float): Z coordinate in meters.
+
+        Returns:
+            tuple: (road_id, section_id, lane_id) of the closest waypoint.
+        """
+        index = self.nearest(x, y, z)
+        return int(self.road_ids[index]), int(self.section_ids[index]), int(self.lane_ids[index])
+
+    def lane_ids_for(self, points):
+        """
+        Returns the lane id of the waypoint closest to each point.
+
+        Args:
+            points (numpy.ndarray): (N, 3) locations.
+
+        Returns:
+            numpy.ndarray: (N,) lane ids.
+        """
+        return np.fromiter(
+            (self.lane_ids[self.nearest(x, y, z)] for x, y, z in np.asarray(points, dtype=np.float64).reshape(-1, 3)),
+            dtype=np.int32,
+            count=len(points),
+        )
+
+    def _neighbourhood_candidates(self, cx, cy):
+        slices = [
+            np.arange(*self._cells[(cx + dx, cy + dy)])
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+            if (cx + dx, cy + dy) in self._cells
+        ]
+        candidates = np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+        self._neighbourhood[(cx, cy)] = candidates
+        return candidates
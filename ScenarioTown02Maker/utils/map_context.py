@@ -0,0 +1,48 @@
+from utils.blueprint_cache import BlueprintCache
+from utils.lane_index import LaneIndex
+from utils.walker_utils import get_walker_spawn_table
+
+class MapContext:
+    """
+    Map data shared by a whole session.
+
+    world.get_map() transfers and parses the full OpenDRIVE map, so the map, its spawn
+    points and the blueprint library are fetched once here and handed to every helper
+    instead of being fetched again per spawned actor. Blueprint lookups go through the
+    BlueprintCache in blueprints.
+    """
+
+    def __init__(self, world, carla_map=None):
+        """
+        Args:
+            world (carla.World): The CARLA world instance.
+            carla_map (carla.Map): Already fetched map. If None, it is fetched once here.
+
+        Raises:
+            RuntimeError: If the map has no spawn points.
+        """
+        self.world = world
+        self.map = carla_map if carla_map is not None else world.get_map()
+        self.map_name = self.map.name.split("/")[-1]
+        self.spawn_points = self.map.get_spawn_points()
+        if not self.spawn_points:
+            raise RuntimeError("No spawn points available in the map.")
+        self.blueprint_library = world.get_blueprint_library()
+        self.blueprints = BlueprintCache(self.blueprint_library)
+        self._lane_index = None
+
+    @property
+    def walker_table(self):
+        """
+        The WalkerSpawnTable of this map.
+        """
+        return get_walker_spawn_table(self.spawn_points, self.map_name)
+
+    @property
+    def lane_index(self):
+        """
+        The LaneIndex of this map, loaded or built on first use.
+        """
+        if self._lane_index is None:
+            self._lane_index = LaneIndex.from_map(self.map)
+        return self._lane_index
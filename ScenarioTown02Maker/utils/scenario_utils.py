@@ -1,8 +1,7 @@
 import random
 import carla
-from utils.walker_utils import get_walker_location_from_index
 
-def spawn_vehicle(world, bp_lib, model="vehicle.tesla.model3", transform=None):
+def spawn_vehicle(world, bp_lib, model="vehicle.tesla.model3", transform=None, spawn_points=None):
     """
     Spawns a vehicle in the CARLA world.
 
@@ -11,6 +10,8 @@ def spawn_vehicle(world, bp_lib, model="vehicle.tesla.model3", transform=None):
         bp_lib (carla.BlueprintLibrary): The blueprint library to find the vehicle blueprint.
         model (str): The model of the vehicle to spawn. Default is "vehicle.tesla.model3".
         transform (carla.Transform): The transform where the vehicle will be spawned. If None, a random spawn point is used.
+        spawn_points (list): Spawn points to pick the random one from, e.g. MapContext.spawn_points.
+            If None, they are fetched from the server.
 
     Returns:
         carla.Actor: The spawned vehicle actor.
@@ -24,60 +25,43 @@ def spawn_vehicle(world, bp_lib, model="vehicle.tesla.model3", transform=None):
         raise ValueError(f"Vehicle model '{model}' not found in blueprint library.")
     
     if transform is None:
-        transform = random.choice(world.get_map().get_spawn_points())
+        if spawn_points is None:
+            spawn_points = world.get_map().get_spawn_points()
+        transform = random.choice(spawn_points)
     
     vehicle = world.spawn_actor(bp, transform)
     if not vehicle:
         raise RuntimeError(f"Failed to spawn vehicle '{model}' at {transform.location}.")
     return vehicle
 
-def vehicle_route(traffic_manager, spawn_points, vehicle, route):
-    """
-    Assigns a route to a vehicle in the CARLA simulator.
-
-    Args:
-        traffic_manager (carla.TrafficManager): The traffic manager instance.
-        spawn_points (list): List of carla.Transform objects representing spawn points.
-        vehicle (carla.Actor): The vehicle actor.
-        route (list): List of indices representing the route.
-
-    Raises:
-        ValueError: If the vehicle or route is not provided.
-        RuntimeError: If no spawn points are available.
-    """
-    if not vehicle or not route:
-        raise ValueError("Vehicle and route must be provided.")
-
-    if not spawn_points:
-        raise RuntimeError("No spawn points available in the map.")
-    
-    route_1 = []
-    for ind in route:
-        route_1.append(spawn_points[ind].location)
-    
-    traffic_manager.random_left_lanechange_percentage(vehicle, 0)
-    traffic_manager.random_right_lanechange_percentage(vehicle, 0)
-    traffic_manager.auto_lane_change(vehicle, False)
-    traffic_manager.set_path(vehicle, route_1)
-
-def set_autopilot(vehicle, enable=True):
+def set_autopilot(vehicle, enable=True, tm_port=8000):
     """
     Enables or disables autopilot for a vehicle.
 
     Args:
         vehicle (carla.Actor): The vehicle actor.
         enable (bool): Whether to enable autopilot. Default is True.
+        tm_port (int): Port of the TrafficManager that drives the vehicle.
     """
-    vehicle.set_autopilot(enable)
+    vehicle.set_autopilot(enable, tm_port)
 
-def attach_sensors_to_vehicle(world, bp_lib, vehicle):
+def attach_sensors_to_vehicle(world, bp_lib, vehicle, sensor_pipeline=None, broadcast_period=None,
+                              adaptive_broadcast=None, broadcast_period_range=None):
     """
     Attaches walker detection and V2V broadcast sensors to a vehicle.
 
+    The V2V broadcast settings only apply to this vehicle's sensor; a shared BlueprintCache
+    blueprint is not modified.
+
     Args:
         world (carla.World): The CARLA world instance.
         bp_lib (carla.BlueprintLibrary): The blueprint library to find sensor blueprints.
         vehicle (carla.Actor): The vehicle to which the sensors will be attached.
+        sensor_pipeline (SensorEventPipeline): If given, the sensor events are pushed into it.
+        broadcast_period (float): Seconds between V2V broadcasts. None keeps the blueprint's value.
+        adaptive_broadcast (bool): Broadcast more often when walkers are close or fast, less often
+            otherwise. None keeps the blueprint's value.
+        broadcast_period_range (tuple): (min, max) seconds of the adaptive period. None keeps the blueprint's value.
 
     Returns:
         list: A list of spawned sensor actors.
@@ -88,7 +72,8 @@ def attach_sensors_to_vehicle(world, bp_lib, vehicle):
     try:
         # Find sensor blueprints
         walker_detection_sensor_bp = bp_lib.find("sensor.other.walker_detection")
-        v2v_broadcast_sensor_bp = bp_lib.find("sensor.other.v2v_broadcast")
+        v2v_broadcast_sensor_bp = find_v2v_broadcast_blueprint(
+            bp_lib, v2v_broadcast_attributes(broadcast_period, adaptive_broadcast, broadcast_period_range))
 
         # Spawn walker detection sensor
         walker_detection_sensor = world.spawn_actor(
@@ -104,9 +89,8 @@ def attach_sensors_to_vehicle(world, bp_lib, vehicle):
             attach_to=vehicle
         )
 
-        # Start listening to sensors (no-op for now)
-        walker_detection_sensor.listen(lambda _: None)
-        v2v_broadcast_sensor.listen(lambda _: None)
+        # Start listening to sensors
+        listen_to_sensors([walker_detection_sensor, v2v_broadcast_sensor], sensor_pipeline)
 
         # Return the spawned sensors
         return [walker_detection_sensor, v2v_broadcast_sensor]
@@ -115,36 +99,120 @@ def attach_sensors_to_vehicle(world, bp_lib, vehicle):
         print(f"Failed to attach sensors to vehicle: {e}")
         return []
 
-def control_vehicles_near_spectator(world, traffic_manager, spectator, safe_distance=10.0):
+def v2v_broadcast_attributes(broadcast_period=None, adaptive_broadcast=None, broadcast_period_range=None):
     """
-    Stops vehicles managed by the TrafficManager if they get too close and are in front of the spectator.
+    Translates V2V broadcast settings into the sensor's blueprint attributes.
 
     Args:
-        world (carla.World): The CARLA world instance.
-        traffic_manager (carla.TrafficManager): The TrafficManager instance.
-        spectator (carla.Actor): The spectator actor.
-        safe_distance (float): The minimum safe distance from the spectator in meters.
-    """
-    spectator_location = spectator.get_location()
-    map = world.get_map()
-    spectator_wp = map.get_waypoint(spectator_location, project_to_road=True, lane_type=carla.LaneType.Driving)
-    vehicles = world.get_actors().filter("vehicle.*")
-
-    for vehicle in vehicles:
-        vehicle_location = vehicle.get_location()
-        distance = vehicle_location.distance(spectator_location)
-        vehicle_wp = map.get_waypoint(vehicle_location, project_to_road=True, lane_type=carla.LaneType.Driving)
-
-        # Check if on the same road and lane direction
-        same_lane_sign = vehicle_wp.lane_id * spectator_wp.lane_id > 0  # same direction
-
-        # Check if spectator is in front of the vehicle
-        vehicle_forward = vehicle.get_transform().get_forward_vector()
-        to_spectator = spectator_location - vehicle_location
-        to_spectator_norm = to_spectator.make_unit_vector()
-        dot = vehicle_forward.x * to_spectator_norm.x + vehicle_forward.y * to_spectator_norm.y + vehicle_forward.z * to_spectator_norm.z
-
-        if distance < safe_distance and same_lane_sign and dot > 0.7:
-            vehicle.apply_control(carla.VehicleControl(throttle=0.0, brake=1.0))
+        broadcast_period (float): Seconds between broadcasts.
+        adaptive_broadcast (bool): Whether the period adapts to the distance and speed of the tracked walkers.
+        broadcast_period_range (tuple): (min, max) seconds the adaptive period stays within.
+
+    Returns:
+        dict: Attribute name -> value, without the settings that are None.
+    """
+    attributes = {}
+    if broadcast_period is not None:
+        attributes["broadcast_period"] = broadcast_period
+    if adaptive_broadcast is not None:
+        attributes["adaptive_broadcast"] = "true" if adaptive_broadcast else "false"
+    if broadcast_period_range is not None:
+        attributes["min_broadcast_period"], attributes["max_broadcast_period"] = broadcast_period_range
+    return attributes
+
+def find_v2v_broadcast_blueprint(bp_lib, attributes=None):
+    """
+    Returns the V2V broadcast blueprint with the given attributes set.
+
+    A BlueprintCache shares its blueprints, so the attributes are set on a cached variant;
+    a plain blueprint library returns a fresh copy that is modified directly.
+    """
+    if not attributes:
+        return bp_lib.find("sensor.other.v2v_broadcast")
+    if hasattr(bp_lib, "variant"):
+        return bp_lib.variant("sensor.other.v2v_broadcast", **attributes)
+    blueprint = bp_lib.find("sensor.other.v2v_broadcast")
+    for key, value in attributes.items():
+        blueprint.set_attribute(key, str(value))
+    return blueprint
+
+def listen_to_sensors(sensors, sensor_pipeline=None):
+    """
+    Starts listening to sensors, feeding a SensorEventPipeline or discarding the events.
+
+    Args:
+        sensors (list): The sensor actors.
+        sensor_pipeline (SensorEventPipeline): Pipeline that receives the events. If None, the
+            events are discarded.
+    """
+    for sensor in sensors:
+        if sensor_pipeline is not None:
+            sensor_pipeline.attach(sensor)
         else:
-            vehicle.set_autopilot(True, traffic_manager.get_port())
+            sensor.listen(lambda _: None)
+
+def apply_batch_in_chunks(client, commands, batch_size=500, due_tick_cue=False):
+    """
+    Submits a list of CARLA commands through client.apply_batch_sync in chunks.
+
+    Args:
+        client (carla.Client): The CARLA client instance.
+        commands (list): List of carla.command objects to execute.
+        batch_size (int): Maximum number of commands per apply_batch_sync call.
+        due_tick_cue (bool): Whether the server should tick after each chunk (synchronous mode).
+
+    Returns:
+        list: One carla.command.Response per command, in the same order as the commands.
+    """
+    responses = []
+    for start in range(0, len(commands), batch_size):
+        responses.extend(client.apply_batch_sync(commands[start:start + batch_size], due_tick_cue))
+    return responses
+
+def build_vehicle_spawn_command(bp, transform, tm_port):
+    """
+    Builds a SpawnActor command that puts the vehicle under the TrafficManager once spawned.
+
+    Args:
+        bp (carla.ActorBlueprint): The vehicle blueprint.
+        transform (carla.Transform): The transform where the vehicle will be spawned.
+        tm_port (int): Port of the TrafficManager that will drive the vehicle.
+
+    Returns:
+        carla.command.SpawnActor: The chained spawn and autopilot command.
+    """
+    return carla.command.SpawnActor(bp, transform).then(
+        carla.command.SetAutopilot(carla.command.FutureActor, True, tm_port)
+    )
+
+def build_sensor_spawn_commands(bp_lib, parent_id, broadcast_period=None, adaptive_broadcast=None,
+                                broadcast_period_range=None):
+    """
+    Builds the SpawnActor commands for the walker detection and V2V broadcast sensors of a vehicle.
+
+    The walker detection sensor is spawned first so the V2V broadcast sensor finds it
+    among the parent's attached actors, mirroring attach_sensors_to_vehicle.
+
+    Args:
+        bp_lib (carla.BlueprintLibrary): The blueprint library to find sensor blueprints.
+        parent_id (int): Id of the actor the sensors will be attached to.
+        broadcast_period, adaptive_broadcast, broadcast_period_range: V2V broadcast settings,
+            as in attach_sensors_to_vehicle.
+
+    Returns:
+        list: The two SpawnActor commands (walker detection, V2V broadcast).
+
+    Raises:
+        ValueError: If a sensor blueprint is not in the library.
+    """
+    walker_detection_sensor_bp = bp_lib.find("sensor.other.walker_detection")
+    v2v_broadcast_sensor_bp = find_v2v_broadcast_blueprint(
+        bp_lib, v2v_broadcast_attributes(broadcast_period, adaptive_broadcast, broadcast_period_range))
+    if not walker_detection_sensor_bp or not v2v_broadcast_sensor_bp:
+        raise ValueError("Sensor blueprints 'sensor.other.walker_detection' and 'sensor.other.v2v_broadcast' "
+                         "not found in blueprint library.")
+    sensor_transform = carla.Transform(carla.Location(z=1.0))
+    return [
+        carla.command.SpawnActor(walker_detection_sensor_bp, sensor_transform, parent_id),
+        carla.command.SpawnActor(v2v_broadcast_sensor_bp, sensor_transform, parent_id),
+    ]
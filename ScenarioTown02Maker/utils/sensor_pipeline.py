@@ -0,0 +1,270 @@
+import itertools
+import threading
+import time
+from collections import deque, namedtuple
+from utils.actor_registry import ActorRegistry
+
+WALKER_DETECTION = "sensor.other.walker_detection"
+V2V_BROADCAST = "sensor.other.v2v_broadcast"
+SAFE_DISTANCE = "sensor.other.safe_distance"
+STREAMS = (WALKER_DETECTION, V2V_BROADCAST, SAFE_DISTANCE)
+STALE_SECONDS = 20.0  # AWalkerDetectionSensor drops entries older than this
+
+# One decoded detection: which sensor reported which actor, and where
+SensorEvent = namedtuple("SensorEvent", ["stream", "sensor_id", "actor_id", "type_id", "location", "data", "received"])
+
+class SensorEventPipeline:
+    """
+    Moves sensor work off the CARLA callback thread.
+
+    Sensor callbacks only append the raw event to a bounded per-stream queue. drain(),
+    called once per tick from the main loop, decodes the queued events, resolves actor
+    type ids through an ActorRegistry, aggregates them per stream and hands the batch to
+    every registered sink. When a queue is full the oldest events are dropped and counted.
+    """
+
+    def __init__(self, world, max_queue_size=10000, actor_registry=None):
+        """
+        Args:
+            world (carla.World): The CARLA world instance.
+            max_queue_size (int): Maximum number of raw events kept per stream.
+            actor_registry (ActorRegistry): Registry used to resolve actor ids. If None, one is
+                created for the world.
+        """
+        self.world = world
+        self.actor_registry = actor_registry if actor_registry is not None else ActorRegistry(world)
+        self.max_queue_size = max_queue_size
+        self.sinks = []
+        self._queues = {stream: deque(maxlen=max_queue_size) for stream in STREAMS}
+        self._sequences = {stream: itertools.count() for stream in STREAMS}
+        self._locks = {stream: threading.Lock() for stream in STREAMS}  # Sensor callbacks may run on several threads
+        self._pushed = dict.fromkeys(STREAMS, 0)
+        self._drained = dict.fromkeys(STREAMS, 0)
+        self._high_water = dict.fromkeys(STREAMS, 0)
+
+    def attach(self, sensor):
+        """
+        Starts listening to a sensor, pushing its events into the matching stream.
+
+        Args:
+            sensor (carla.Sensor): A walker detection, V2V broadcast or safe distance sensor.
+
+        Raises:
+            ValueError: If the sensor type has no stream.
+        """
+        sensor.listen(self.callback(sensor.type_id, sensor.id))
+
+    def callback(self, stream, sensor_id):
+        """
+        Builds the listen callback for one sensor.
+
+        The callback does no decoding and no RPC: it stamps the raw event with a sequence
+        number, counts it as pushed and appends it to the stream's queue.
+
+        Args:
+            stream (str): Sensor type id of the stream.
+            sensor_id (int): Id of the sensor actor.
+
+        Returns:
+            callable: Callback to pass to sensor.listen.
+
+        Raises:
+            ValueError: If the stream is unknown.
+        """
+        if stream not in self._queues:
+            raise ValueError(f"No event stream for sensor type '{stream}'.")
+        queue = self._queues[stream]
+        sequence = self._sequences[stream]
+        lock = self._locks[stream]
+        pushed = self._pushed
+
+        def push(event):
+            with lock:
+                pushed[stream] += 1
+                queue.append((next(sequence), sensor_id, time.monotonic(), event))
+
+        return push
+
+    def add_sink(self, sink):
+        """
+        Registers a consumer of drained events.
+
+        Args:
+            sink (callable): Called as sink(frame, events, summary) after every drain, where
+                events is a list of SensorEvent and summary the per-stream aggregate.
+        """
+        self.sinks.append(sink)
+
+    def drain(self, frame=None):
+        """
+        Decodes every queued event and fans the batch out to the sinks.
+
+        Args:
+            frame (int): Frame the events are attributed to, passed through to the sinks.
+
+        Returns:
+            list: The decoded SensorEvent objects.
+        """
+        events = []
+        for stream, queue in self._queues.items():
+            self._high_water[stream] = max(self._high_water[stream], len(queue))
+            while queue:
+                sequence, sensor_id, received, raw_event = queue.popleft()
+                self._drained[stream] += 1
+                events.extend(_decode(stream, sensor_id, received, raw_event))
+
+        if events:
+            # Unknown ids are fetched by the registry in one get_actors call
+            actors = self.actor_registry.fetch({event.actor_id for event in events})
+            events = [
+                event._replace(type_id=actors[event.actor_id].type_id if event.actor_id in actors else None)
+                for event in events
+            ]
+
+        summary = _summarize(events)
+        for sink in self.sinks:
+            sink(frame, events, summary)
+        return events
+
+    def stats(self):
+        """
+        Returns the backpressure counters of every stream.
+
+        pushed counts every event a callback received, including those still queued and
+        those the full queue dropped.
+
+        Returns:
+            dict: stream -> {"pushed", "drained", "dropped", "queued", "high_water"}.
+        """
+        stats = {}
+        for stream in STREAMS:
+            with self._locks[stream]:
+                pushed, queued = self._pushed[stream], len(self._queues[stream])
+            stats[stream] = {
+                "pushed": pushed,
+                "drained": self._drained[stream],
+                "dropped": pushed - self._drained[stream] - queued,
+                "queued": queued,
+                "high_water": max(self._high_water[stream], queued),
+            }
+        return stats
+
+def _decode(stream, sensor_id, received, raw_event):
+    if stream == SAFE_DISTANCE:
+        return [SensorEvent(stream, sensor_id, actor_id, None, None, None, received) for actor_id in raw_event]
+    return [
+        SensorEvent(stream, sensor_id, actor_id, None, data.get("Location"), data, received)
+        for actor_id, data in raw_event.items()
+    ]
+
+def _summarize(events):
+    summary = {}
+    for event in events:
+        stream_summary = summary.setdefault(event.stream, {"events": 0, "actors": set(), "sensors": {}})
+        stream_summary["events"] += 1
+        stream_summary["actors"].add(event.actor_id)
+        stream_summary["sensors"][event.sensor_id] = stream_summary["sensors"].get(event.sensor_id, 0) + 1
+    return summary
+
+def print_events(frame, events, summary):
+    """
+    Sink that prints every resolved detection, like the original sensor callbacks did.
+    """
+    for event in events:
+        if event.type_id is None:
+            continue
+        if event.stream == SAFE_DISTANCE:
+            print(f"Vehicle too close: {event.type_id}")
+        elif event.stream == WALKER_DETECTION:
+            if event.data.get("Removed"):
+                continue
+            print(f"Detected walker: {event.type_id} at {event.location}")
+        else:
+            print(f"Detected vehicle: {event.type_id} at {event.location}")
+
+def print_summary(frame, events, summary):
+    """
+    Sink that prints one line per stream and tick.
+    """
+    for stream, stream_summary in summary.items():
+        print(f"[frame {frame}] {stream}: {stream_summary['events']} events, "
+              f"{len(stream_summary['actors'])} actors, {len(stream_summary['sensors'])} sensors")
+
+class WalkerViews:
+    """
+    Sink that merges walker detection deltas into one view per vehicle.
+
+    Walker detection sensors only report the entries that changed since their previous
+    event and mark the walkers they dropped as removed, so the full picture of a vehicle
+    is rebuilt here. An entry replaces the known one if it has a newer timestamp, or the
+    same timestamp and a higher version; entries older than stale_after seconds of
+    simulation time are dropped like the sensor drops them.
+    """
+
+    def __init__(self, actor_registry, stale_after=STALE_SECONDS):
+        """
+        Args:
+            actor_registry (ActorRegistry): Resolves the vehicle each sensor is attached to.
+            stale_after (float): Seconds after which an entry is dropped.
+        """
+        self.actor_registry = actor_registry
+        self.stale_after = stale_after
+        self.views = {}  # Vehicle id -> {walker id -> latest entry}
+        self.merged = 0  # Entries that changed a view
+        self.ignored = 0  # Entries older than what the view already had, or without a timestamp
+        self._now = 0.0
+
+    def __call__(self, frame, events, summary):
+        self.merge(events)
+
+    def merge(self, events):
+        """
+        Applies the walker detection events of one drain to the views.
+
+        Args:
+            events (list): SensorEvent objects from SensorEventPipeline.drain.
+        """
+        for event in events:
+            if event.stream != WALKER_DETECTION or not event.data:
+                continue
+            vehicle_id = self.actor_registry.parent_id(event.sensor_id)
+            view = self.views.setdefault(vehicle_id if vehicle_id is not None else event.sensor_id, {})
+            data = event.data
+            if data.get("Removed"):
+                view.pop(event.actor_id, None)
+                continue
+            timestamp = data.get("Timestamp")
+            if timestamp is None:
+                self.ignored += 1
+                continue
+            known = view.get(event.actor_id)
+            if known is None or (timestamp, data.get("Version", 0)) > (known["Timestamp"], known.get("Version", 0)):
+                view[event.actor_id] = data
+                self.merged += 1
+            else:
+                self.ignored += 1
+            self._now = max(self._now, timestamp)
+        self.expire(self._now)
+
+    def expire(self, now):
+        """
+        Drops the entries older than stale_after at simulation time now.
+        """
+        for view in self.views.values():
+            for walker_id in [walker_id for walker_id, entry in view.items() if now - entry["Timestamp"] > self.stale_after]:
+                del view[walker_id]
+
+    def view(self, vehicle_id):
+        """
+        Returns what a vehicle currently knows, walker id -> entry with Location, Timestamp,
+        DetectedByOwnVehicle and Version.
+        """
+        return self.views.get(vehicle_id, {})
+
+    def stats(self):
+        return {
+            "vehicles": len(self.views),
+            "entries": sum(len(view) for view in self.views.values()),
+            "merged": self.merged,
+            "ignored": self.ignored,
+        }
@@ -0,0 +1,199 @@
+import numpy as np
+import carla
+from utils.lane_index import LaneIndex
+
+# Control mode of a vehicle as last sent to the server
+MODE_UNMANAGED = "unmanaged"  # Never touched, e.g. the VR vehicle or parked cars
+MODE_AUTOPILOT = "autopilot"
+MODE_BRAKING = "braking"
+
+# Minimum cosine between a vehicle's heading and the direction to the spectator to count as "in front"
+IN_FRONT_COSINE = 0.7
+
+class SpectatorController:
+    """
+    Stops vehicles managed by the TrafficManager when they get too close and are in front of the spectator.
+
+    The map is fetched once, vehicle transforms are read from a single world snapshot per tick
+    and the distance, lane-direction and heading tests run as one NumPy operation over all
+    vehicles. Lane directions come from a local LaneIndex, so the check makes no map queries.
+
+    Every vehicle has a mode: unmanaged, autopilot or braking. Only vehicles the scenario put
+    under the TrafficManager are controlled, the others stay unmanaged and never receive a
+    command. Commands are only sent on a mode change, in a single batch, and a braking
+    vehicle is only released once it is release_margin farther than safe_distance or
+    clearly no longer facing the spectator, so vehicles at the boundary do not flap.
+    """
+
+    def __init__(self, world, traffic_manager, client=None, safe_distance=10.0, carla_map=None, lane_index=None,
+                 actor_registry=None, managed=None, release_margin=2.0, heading_margin=0.1):
+        """
+        Args:
+            world (carla.World): The CARLA world instance.
+            traffic_manager (carla.TrafficManager): The TrafficManager instance.
+            client (carla.Client): Used to send state changes as one batch. If None, changes are
+                applied actor by actor.
+            safe_distance (float): The minimum safe distance from the spectator in meters.
+            carla_map (carla.Map): Already fetched map. If None, it is fetched once here.
+            lane_index (LaneIndex): Local lane lookup. If None, it is loaded or built for the map.
+            actor_registry (ActorRegistry): Source of the vehicle list. If None, the vehicles are
+                listed with world.get_actors() whenever the actor set changes.
+            managed (container): Ids of the vehicles under the TrafficManager that may be braked,
+                e.g. TrafficManagerProfiles.applied. It is read whenever the actor set changes.
+                If None, every vehicle is assumed to be driven by the TrafficManager.
+            release_margin (float): Extra distance in meters before a braking vehicle is released.
+            heading_margin (float): How far below IN_FRONT_COSINE the heading cosine of a braking
+                vehicle must drop before it is released.
+        """
+        self.world = world
+        self.traffic_manager = traffic_manager
+        self.client = client
+        self.safe_distance = safe_distance
+        self.map = carla_map if carla_map is not None else world.get_map()
+        self.lane_index = lane_index if lane_index is not None else LaneIndex.from_map(self.map)
+        self.actor_registry = actor_registry
+        self.tm_port = traffic_manager.get_port()
+        self.managed = managed
+        self.release_margin = release_margin
+        self.heading_margin = heading_margin
+        self.commands_sent = 0
+        self._snapshot_ids = frozenset()
+        self._vehicle_ids = []  # Vehicles that are not unmanaged
+        self._modes = {}  # vehicle id -> mode, see MODE_*
+
+    def update(self, spectator):
+        """
+        Runs the safety check for one tick.
+
+        Args:
+            spectator (carla.Actor): The spectator actor.
+
+        Returns:
+            numpy.ndarray: Ids of the vehicles currently held in the braking state.
+        """
+        snapshot = self.world.get_snapshot()
+        self._refresh_vehicle_ids(snapshot)
+
+        spectator_snapshot = snapshot.find(spectator.id)
+        if spectator_snapshot is not None:
+            spectator_location = spectator_snapshot.get_transform().location
+        else:
+            spectator_location = spectator.get_location()
+
+        vehicle_ids, poses = self._vehicle_poses(snapshot)
+        if len(vehicle_ids) == 0:
+            return vehicle_ids
+
+        was_braking = np.fromiter((self._modes[vehicle_id] == MODE_BRAKING for vehicle_id in vehicle_ids.tolist()),
+                                  dtype=bool, count=len(vehicle_ids))
+        braking = self._compute_braking(poses, spectator_location, was_braking)
+        self._send_changes(vehicle_ids, braking)
+        return vehicle_ids[braking]
+
+    def set_managed(self, managed):
+        """
+        Replaces the set of vehicles that may be controlled; vehicles that leave it are released.
+        """
+        self.managed = managed
+        self._snapshot_ids = frozenset()  # Re-evaluated on the next update
+
+    def _refresh_vehicle_ids(self, snapshot):
+        # Only ask the server for the vehicle list when actors were spawned or destroyed
+        snapshot_ids = frozenset(actor_snapshot.id for actor_snapshot in snapshot)
+        if snapshot_ids == self._snapshot_ids:
+            return
+        self._snapshot_ids = snapshot_ids
+        if self.actor_registry is not None:
+            self.actor_registry.sync(snapshot)
+            vehicle_ids = [info.id for info in self.actor_registry.filter("vehicle.*")]
+        else:
+            vehicle_ids = [vehicle.id for vehicle in self.world.get_actors().filter("vehicle.*")]
+
+        modes = {}
+        released = []
+        for vehicle_id in vehicle_ids:
+            mode = self._modes.get(vehicle_id)
+            if self.managed is not None and vehicle_id not in self.managed:
+                if mode == MODE_BRAKING:
+                    released.append(vehicle_id)  # Left the managed set while held, hand it back
+                modes[vehicle_id] = MODE_UNMANAGED
+            else:
+                # Managed vehicles were spawned under the TrafficManager, nothing to send for them yet
+                modes[vehicle_id] = mode if mode in (MODE_AUTOPILOT, MODE_BRAKING) else MODE_AUTOPILOT
+        self._modes = modes
+        self._vehicle_ids = [vehicle_id for vehicle_id, mode in modes.items() if mode != MODE_UNMANAGED]
+        if released:
+            self._apply([], released)
+
+    def _vehicle_poses(self, snapshot):
+        vehicle_ids = []
+        poses = []
+        for vehicle_id in self._vehicle_ids:
+            actor_snapshot = snapshot.find(vehicle_id)
+            if actor_snapshot is None:
+                continue
+            transform = actor_snapshot.get_transform()
+            location = transform.location
+            rotation = transform.rotation
+            vehicle_ids.append(vehicle_id)
+            poses.append((location.x, location.y, location.z, rotation.pitch, rotation.yaw))
+        return np.asarray(vehicle_ids, dtype=np.int64), np.asarray(poses, dtype=np.float64).reshape(-1, 5)
+
+    def _compute_braking(self, poses, spectator_location, was_braking):
+        spectator_xyz = np.array([spectator_location.x, spectator_location.y, spectator_location.z])
+
+        to_spectator = spectator_xyz - poses[:, :3]
+        distance = np.linalg.norm(to_spectator, axis=1)
+        to_spectator_norm = to_spectator / np.maximum(distance, 1e-6)[:, None]
+
+        pitch = np.radians(poses[:, 3])
+        yaw = np.radians(poses[:, 4])
+        forward = np.stack((np.cos(pitch) * np.cos(yaw), np.cos(pitch) * np.sin(yaw), np.sin(pitch)), axis=1)
+        dot = np.einsum("ij,ij->i", forward, to_spectator_norm)
+
+        # Check if spectator is close and in front of the vehicle, with looser limits to stay braking
+        distance_limit = np.where(was_braking, self.safe_distance + self.release_margin, self.safe_distance)
+        heading_limit = np.where(was_braking, IN_FRONT_COSINE - self.heading_margin, IN_FRONT_COSINE)
+        candidates = (distance < distance_limit) & (dot > heading_limit)
+        if not candidates.any():
+            return candidates
+
+        # Check if on the same lane direction, only for the few vehicles that can brake
+        spectator_lane_id = self.lane_index.lane_ids_for(spectator_xyz[None, :])[0]
+        candidate_lane_ids = self.lane_index.lane_ids_for(poses[candidates, :3])
+        candidates[candidates] = candidate_lane_ids * spectator_lane_id > 0
+        return candidates
+
+    def _send_changes(self, vehicle_ids, braking):
+        to_brake = []
+        to_release = []
+        for vehicle_id, is_braking in zip(vehicle_ids.tolist(), braking.tolist()):
+            mode = MODE_BRAKING if is_braking else MODE_AUTOPILOT
+            if self._modes[vehicle_id] == mode:
+                continue
+            self._modes[vehicle_id] = mode
+            (to_brake if is_braking else to_release).append(vehicle_id)
+        self._apply(to_brake, to_release)
+
+    def _apply(self, to_brake, to_release):
+        if not to_brake and not to_release:
+            return
+        self.commands_sent += len(to_brake) + len(to_release)
+
+        if self.client is None:
+            brake_ids = set(to_brake)
+            for vehicle in self.world.get_actors(to_brake + to_release):
+                if vehicle.id in brake_ids:
+                    vehicle.set_autopilot(False, self.tm_port)
+                    vehicle.apply_control(carla.VehicleControl(throttle=0.0, brake=1.0))
+                else:
+                    vehicle.set_autopilot(True, self.tm_port)
+            return
+
+        commands = []
+        for vehicle_id in to_brake:
+            commands.append(carla.command.SetAutopilot(vehicle_id, False, self.tm_port))
+            commands.append(carla.command.ApplyVehicleControl(vehicle_id, carla.VehicleControl(throttle=0.0, brake=1.0)))
+        for vehicle_id in to_release:
+            commands.append(carla.command.SetAutopilot(vehicle_id, True, self.tm_port))
+        self.client.apply_batch(commands)
@@ -0,0 +1,233 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+TICK_STAGE = "tick"  # world.tick() or wait_for_tick()
+HISTOGRAM_BINS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# World methods whose results are wrapped, so calls made on the returned actors are counted too
+ACTOR_FACTORIES = ("spawn_actor", "try_spawn_actor", "get_actor", "get_actors", "get_spectator")
+# Actor getters the client serves from its episode snapshot without a round trip
+CACHED_ACTOR_GETTERS = frozenset((
+    "get_transform", "get_location", "get_velocity", "get_angular_velocity", "get_acceleration", "get_world",
+))
+
+class RpcCounter:
+    """
+    Transparent proxy that counts the method calls made on a CARLA object.
+
+    Wrap the client, world or Traffic Manager handed to the scenario code; every method
+    call goes through and increments calls[method name]. Actors returned by the world's
+    spawn and lookup methods are wrapped as well, so per-actor calls like apply_control,
+    set_autopilot, destroy or a walker controller's go_to_location count too; only the
+    getters in CACHED_ACTOR_GETTERS, which need no round trip, are left out. Proxies are
+    unwrapped when passed back as arguments. Only used when profiling, so normal runs pay
+    nothing for it.
+    """
+
+    def __init__(self, target, counts=None, uncounted=frozenset()):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "calls", counts if counts is not None else {})
+        object.__setattr__(self, "_uncounted", uncounted)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if not callable(attribute) or name in self._uncounted:
+            return attribute
+        calls = self.calls
+
+        def counted(*args, **kwargs):
+            calls[name] = calls.get(name, 0) + 1
+            result = attribute(*[_unwrap(arg) for arg in args], **{key: _unwrap(value) for key, value in kwargs.items()})
+            if name in ACTOR_FACTORIES and result is not None:
+                result = _ActorListCounter(result, calls) if name == "get_actors" else _count_actor(result, calls)
+            return result
+        return counted
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    # Actors compare and hash by id, proxies of the same actor must too
+    def __eq__(self, other):
+        return self._target == _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    @property
+    def total(self):
+        return sum(self.calls.values())
+
+class _ActorListCounter:
+    """
+    carla.ActorList whose actors count their calls.
+    """
+
+    def __init__(self, actors, counts):
+        self._actors = actors
+        self._counts = counts
+
+    def find(self, actor_id):
+        actor = self._actors.find(actor_id)
+        return _count_actor(actor, self._counts) if actor is not None else None
+
+    def filter(self, pattern):
+        return [_count_actor(actor, self._counts) for actor in self._actors.filter(pattern)]
+
+    def __iter__(self):
+        return (_count_actor(actor, self._counts) for actor in self._actors)
+
+    def __len__(self):
+        return len(self._actors)
+
+    def __getitem__(self, index):
+        return _count_actor(self._actors[index], self._counts)
+
+def _count_actor(actor, counts):
+    return RpcCounter(actor, counts, CACHED_ACTOR_GETTERS)
+
+def _unwrap(value):
+    if isinstance(value, RpcCounter):
+        return value._target
+    if isinstance(value, (list, tuple)) and any(isinstance(item, RpcCounter) for item in value):
+        return type(value)(_unwrap(item) for item in value)
+    return value
+
+class TickProfiler:
+    """
+    Per-tick stage timings, RPC counts and actor counts kept in a ring buffer.
+
+    TickScheduler times the tick itself and every hook through stage(). The last
+    capacity ticks are kept for the percentiles and histograms of summary(); with
+    stream_path every tick is also appended to a JSON Lines file as it completes.
+    With profile_stage, one stage runs under cProfile, accumulated over all ticks.
+    """
+
+    def __init__(self, capacity=4096, rpc_counts=None, actor_count=None, stream_path=None, profile_stage=None):
+        """
+        Args:
+            capacity (int): Number of ticks kept in the ring buffer.
+            rpc_counts (dict): Call counts updated by RpcCounter proxies, shared between them.
+            actor_count (callable): Returns the number of actors, e.g. ActorRegistry.__len__.
+            stream_path (str): JSON Lines file every tick is appended to.
+            profile_stage (str): Name of the stage to run under cProfile.
+        """
+        self.capacity = capacity
+        self.rpc_counts = rpc_counts if rpc_counts is not None else {}
+        self.actor_count = actor_count
+        self.profile_stage = profile_stage
+        self.profile = cProfile.Profile() if profile_stage else None
+        self.ticks = 0  # Ticks recorded since the start, including those overwritten
+        self._stages = {}  # Stage name -> ring of milliseconds, NaN where the stage did not run
+        self._rpcs = np.zeros(capacity, dtype=np.int64)
+        self._actors = np.full(capacity, -1, dtype=np.int64)
+        self._frames = np.full(capacity, -1, dtype=np.int64)
+        self._current = {}
+        self._rpc_start = 0
+        self._stream = open(stream_path, "a") if stream_path else None
+
+    def begin_tick(self):
+        self._current = {}
+        self._rpc_start = sum(self.rpc_counts.values())
+
+    @contextmanager
+    def stage(self, name):
+        profiling = self.profile is not None and name == self.profile_stage
+        start = time.perf_counter()
+        if profiling:
+            self.profile.enable()
+        try:
+            yield
+        finally:
+            if profiling:
+                self.profile.disable()
+            self._current[name] = self._current.get(name, 0.0) + (time.perf_counter() - start) * 1000.0
+
+    def end_tick(self, frame):
+        slot = self.ticks % self.capacity
+        for name in self._current:
+            if name not in self._stages:
+                self._stages[name] = np.full(self.capacity, np.nan)
+        for name, ring in self._stages.items():
+            ring[slot] = self._current.get(name, np.nan)
+        rpcs = sum(self.rpc_counts.values()) - self._rpc_start
+        actors = self.actor_count() if self.actor_count is not None else -1
+        self._rpcs[slot] = rpcs
+        self._actors[slot] = actors
+        self._frames[slot] = -1 if frame is None else frame
+        self.ticks += 1
+
+        if self._stream is not None:
+            record = {"frame": frame, "stages_ms": self._current, "rpcs": rpcs, "actors": actors}
+            self._stream.write(json.dumps(record) + "\n")
+
+    def summary(self):
+        """
+        Returns percentiles and histograms of the ticks in the ring buffer.
+
+        Returns:
+            dict: ticks, per-stage statistics in milliseconds, RPCs per tick and actor counts.
+        """
+        count = min(self.ticks, self.capacity)
+        stages = {}
+        for name, ring in self._stages.items():
+            values = ring[:count][~np.isnan(ring[:count])]
+            if len(values) == 0:
+                continue
+            p50, p90, p99 = np.percentile(values, (50, 90, 99))
+            histogram = np.histogram(values, bins=(0.0, *HISTOGRAM_BINS_MS, np.inf))[0]
+            stages[name] = {
+                "count": int(len(values)),
+                "mean": float(values.mean()),
+                "p50": float(p50),
+                "p90": float(p90),
+                "p99": float(p99),
+                "max": float(values.max()),
+                "histogram": dict(zip([f"<{bound}" for bound in HISTOGRAM_BINS_MS] + ["inf"], histogram.tolist())),
+            }
+        rpcs = self._rpcs[:count]
+        actors = self._actors[:count]
+        return {
+            "ticks": self.ticks,
+            "window": count,
+            "stages_ms": stages,
+            "rpcs_per_tick": {"mean": float(rpcs.mean()) if count else 0.0, "max": int(rpcs.max()) if count else 0},
+            "rpc_calls": dict(sorted(self.rpc_counts.items(), key=lambda item: -item[1])),
+            "actors": {"last": int(actors[(self.ticks - 1) % self.capacity]) if count else -1,
+                       "max": int(actors.max()) if count else -1},
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"Tick profile over the last {summary['window']} of {summary['ticks']} ticks (ms):")
+        for name, stats in summary["stages_ms"].items():
+            print(f"  {name:<12} mean {stats['mean']:8.3f}  p50 {stats['p50']:8.3f}  p90 {stats['p90']:8.3f}  "
+                  f"p99 {stats['p99']:8.3f}  max {stats['max']:8.3f}")
+        print(f"  RPCs per tick: mean {summary['rpcs_per_tick']['mean']:.1f}, max {summary['rpcs_per_tick']['max']}; "
+              f"actors: {summary['actors']['last']} (max {summary['actors']['max']})")
+
+    def close(self, profile_path=None):
+        """
+        Closes the stream and writes the cProfile statistics of the profiled stage.
+
+        Args:
+            profile_path (str): Where to dump the raw statistics, readable with pstats.
+
+        Returns:
+            str: The 20 most expensive functions by cumulative time, or None without profile_stage.
+        """
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self.profile is None:
+            return None
+        if profile_path:
+            self.profile.dump_stats(profile_path)
+        output = io.StringIO()
+        pstats.Stats(self.profile, stream=output).sort_stats("cumulative").print_stats(20)
+        return output.getvalue()
@@ -0,0 +1,103 @@
+# Per-vehicle Traffic Manager setters a profile can set, with the value the Traffic Manager
+# uses for a vehicle that never had the setter called
+PROFILE_DEFAULTS = {
+    "distance_to_leading_vehicle": None,  # None follows the global distance
+    "vehicle_percentage_speed_difference": 0.0,
+    "auto_lane_change": True,
+    "random_left_lanechange_percentage": 0.0,
+    "random_right_lanechange_percentage": 0.0,
+    "ignore_lights_percentage": 0.0,
+}
+
+# Vehicles that follow a route must not leave it on their own
+BUILTIN_PROFILES = {
+    "default": {},
+    "route": {
+        "auto_lane_change": False,
+        "random_left_lanechange_percentage": 0.0,
+        "random_right_lanechange_percentage": 0.0,
+    },
+}
+
+def freeze_profile(profile):
+    """
+    Returns the profile as a sorted tuple of (setter, value) pairs, hashable and picklable.
+    """
+    return tuple(sorted(profile.items()))
+
+class TrafficManagerProfiles:
+    """
+    Applies Traffic Manager settings per vehicle profile, sending only what deviates.
+
+    For each vehicle, only the profile values that differ from the Traffic Manager
+    defaults are sent, plus its path, so a route vehicle costs a few calls instead of one
+    per setting. Only per-vehicle setters are used: global setters would also change the
+    vehicles the scenario did not spawn. The profile applied to every vehicle is
+    remembered, which also answers "is this vehicle configured by the scenario" without
+    querying the server.
+    """
+
+    def __init__(self, traffic_manager, defaults=None):
+        """
+        Args:
+            traffic_manager (carla.TrafficManager): The TrafficManager instance.
+            defaults (dict): Setter name -> value applied to every vehicle whose profile does
+                not set it, e.g. the scenario's distance_to_leading_vehicle.
+        """
+        self.traffic_manager = traffic_manager
+        self.defaults = dict(defaults or {})
+        self.calls = 0  # Traffic Manager RPCs sent
+        self.applied = {}  # Vehicle id -> profile name
+
+    def apply(self, vehicle, name, profile, path=None):
+        """
+        Sends the settings of one vehicle.
+
+        Args:
+            vehicle (carla.Actor): A vehicle already registered with the Traffic Manager.
+            name (str): Name of the profile, kept for the audit.
+            profile (dict or tuple): Setter name -> value, as in PROFILE_DEFAULTS. Values it
+                leaves out come from the defaults.
+            path (list): carla.Location objects the vehicle must follow, if any.
+        """
+        for setter, value in {**self.defaults, **dict(profile)}.items():
+            if value != PROFILE_DEFAULTS[setter]:
+                self._call(setter, vehicle, value)
+        if path:
+            self._call("set_path", vehicle, path)
+        self.applied[vehicle.id] = name
+
+    def apply_many(self, entries):
+        """
+        Sends the settings of many vehicles.
+
+        Args:
+            entries (list): (vehicle, name, profile, path) tuples.
+
+        Returns:
+            list: (vehicle id, error) for every vehicle that could not be configured.
+        """
+        errors = []
+        for vehicle, name, profile, path in entries:
+            try:
+                self.apply(vehicle, name, profile, path)
+            except Exception as e:
+                errors.append((vehicle.id, e))
+        return errors
+
+    def forget(self, vehicle_ids):
+        for vehicle_id in vehicle_ids:
+            self.applied.pop(vehicle_id, None)
+
+    def summary(self):
+        """
+        Returns vehicle counts per profile and the number of calls sent, without any server call.
+        """
+        counts = {}
+        for name in self.applied.values():
+            counts[name] = counts.get(name, 0) + 1
+        return {"vehicles": len(self.applied), "profiles": counts, "calls": self.calls}
+
+    def _call(self, setter, *args):
+        self.calls += 1
+        getattr(self.traffic_manager, setter)(*args)
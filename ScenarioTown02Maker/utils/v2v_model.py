@@ -0,0 +1,305 @@
+import heapq
+import math
+from collections import namedtuple
+
+import numpy as np
+
+STALE_SECONDS = 20.0  # AWalkerDetectionSensor drops entries older than this
+REFRESH_TTL = 5.0  # AV2VBroadcast resends unchanged entries after this
+
+# What a vehicle knows about one walker: where it was, when, and how many broadcasts it took to get here
+WalkerEntry = namedtuple("WalkerEntry", ["location", "timestamp", "hops"])
+
+class SpatialGrid:
+    """
+    Uniform grid over 2D positions for fixed-radius neighbour queries.
+
+    With the cell size equal to the query radius, the neighbours of a point are in the
+    3 x 3 block of cells around it, so a query costs the number of actors nearby instead
+    of the number of actors in the world.
+    """
+
+    def __init__(self, positions, cell_size):
+        """
+        Args:
+            positions (numpy.ndarray): (N, 2) or (N, 3) positions in meters; z is ignored.
+            cell_size (float): Cell edge in meters, at least the largest query radius.
+        """
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(len(positions), -1)[:, :2]
+        self.cell_size = float(cell_size)
+        self._cells = {}
+        cells = np.floor(self.positions / self.cell_size).astype(np.int64)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        if len(order):
+            sorted_cells = cells[order]
+            breaks = np.flatnonzero(np.any(sorted_cells[1:] != sorted_cells[:-1], axis=1)) + 1
+            for start, end in zip(np.r_[0, breaks], np.r_[breaks, len(order)]):
+                self._cells[tuple(sorted_cells[start])] = order[start:end]
+
+    def query(self, x, y, radius):
+        """
+        Returns the indices of the positions within radius of (x, y).
+        """
+        cx, cy = math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+        reach = max(1, math.ceil(radius / self.cell_size))
+        blocks = [self._cells[cell] for cell in
+                  ((i, j) for i in range(cx - reach, cx + reach + 1) for j in range(cy - reach, cy + reach + 1))
+                  if cell in self._cells]
+        if not blocks:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.concatenate(blocks)
+        offsets = self.positions[candidates] - (x, y)
+        return candidates[np.einsum("ij,ij->i", offsets, offsets) <= radius * radius]
+
+class V2VPropagationModel:
+    """
+    Python model of how walker data spreads through the V2V broadcast sensors.
+
+    It mirrors the ConcludedSensor plugin: every vehicle tracks the walkers within
+    detection range, and every period its broadcast copies its whole tracked map into
+    the tracked map of every vehicle within broadcast radius. Received entries are
+    broadcast again by their receiver, so data travels over several hops; an entry
+    replaces the known one only if it is newer, and entries older than stale_after are
+    dropped. Broadcasts arrive latency seconds after they are sent. With delta_updates,
+    as in the plugin, a vehicle already in range only receives the entries that changed
+    since the sender's previous broadcast or were not sent for refresh_ttl seconds.
+
+    Positions come from world snapshots and neighbours from a SpatialGrid rebuilt on
+    every broadcast tick, so radius and period can be tuned on thousands of vehicles
+    before the sensor is recompiled.
+    """
+
+    def __init__(self, broadcast_radius=10.0, period=1.0, latency=0.0, detection_range=10.0,
+                 stale_after=STALE_SECONDS, max_hops=None, delta_updates=True, refresh_ttl=REFRESH_TTL):
+        """
+        Args:
+            broadcast_radius (float): Radius of the broadcast sphere in meters. The
+                broadcast_radius blueprint attribute is in centimeters.
+            period (float): Seconds between two broadcasts of a vehicle.
+            latency (float): Seconds between a broadcast and its arrival.
+            detection_range (float): Distance in meters at which a vehicle detects a walker itself.
+            stale_after (float): Seconds after which an entry is dropped.
+            max_hops (int): Entries that took this many broadcasts are not relayed further.
+                If None, they are relayed like the plugin does.
+            delta_updates (bool): Send only new, changed or expired entries to known neighbours.
+            refresh_ttl (float): Seconds after which an unchanged entry is sent again.
+
+        Raises:
+            ValueError: If broadcast_radius or period is not positive, or latency is negative.
+        """
+        if broadcast_radius <= 0:
+            raise ValueError(f"V2V broadcast radius must be positive, got {broadcast_radius!r}.")
+        if period <= 0:
+            raise ValueError(f"V2V broadcast period must be positive, got {period!r}.")
+        if latency < 0:
+            raise ValueError(f"V2V latency must not be negative, got {latency!r}.")
+        self.broadcast_radius = float(broadcast_radius)
+        self.period = float(period)
+        self.latency = float(latency)
+        self.detection_range = float(detection_range)
+        self.stale_after = float(stale_after)
+        self.max_hops = max_hops
+        self.delta_updates = delta_updates
+        self.refresh_ttl = float(refresh_ttl)
+        self.views = {}  # Vehicle id -> {walker id -> WalkerEntry}
+        self._next_broadcast = {}  # Vehicle id -> simulation time of its next broadcast
+        self._sent = {}  # Vehicle id -> {walker id -> (timestamp, time) of its last broadcast}
+        self._neighbours = {}  # Vehicle id -> vehicles in range at its last broadcast
+        self._in_flight = []  # Heap of (arrival time, sequence, receiver id, entries)
+        self._sequence = 0
+        self._now = 0.0
+        self._walker_count = 0
+        self.broadcasts = 0
+        self.messages = 0  # Broadcasts received by a neighbour
+        self.entries_sent = 0  # Walker entries copied into a neighbour
+
+    def update(self, snapshot, actor_registry):
+        """
+        Advances the model to a world snapshot.
+
+        Vehicles and walkers are taken from the actor registry, their positions from the
+        snapshot. Usable as a TickScheduler hook once the registry is synced.
+
+        Args:
+            snapshot (carla.WorldSnapshot): Snapshot of the current tick.
+            actor_registry (ActorRegistry): Registry of the world's actors.
+        """
+        vehicles, vehicle_positions = self._positions(snapshot, actor_registry.filter("vehicle.*"))
+        walkers, walker_positions = self._positions(snapshot, actor_registry.filter("walker.pedestrian.*"))
+        self.step(snapshot.timestamp.elapsed_seconds, vehicles, vehicle_positions, walkers, walker_positions)
+
+    def step(self, now, vehicle_ids, vehicle_positions, walker_ids, walker_positions):
+        """
+        Advances the model to simulation time now.
+
+        Args:
+            now (float): Simulation time in seconds.
+            vehicle_ids (list): Ids of the vehicles carrying the sensors.
+            vehicle_positions (numpy.ndarray): (N, 3) positions of those vehicles in meters.
+            walker_ids (list): Ids of the walkers.
+            walker_positions (numpy.ndarray): (M, 3) positions of those walkers in meters.
+        """
+        self._now = now
+        self._walker_count = len(walker_ids)
+        vehicle_positions = np.asarray(vehicle_positions, dtype=np.float64).reshape(len(vehicle_ids), 3)
+        walker_positions = np.asarray(walker_positions, dtype=np.float64).reshape(len(walker_ids), 3)
+
+        alive = set(vehicle_ids)
+        for vehicle_id in [vehicle_id for vehicle_id in self.views if vehicle_id not in alive]:
+            del self.views[vehicle_id]
+            del self._next_broadcast[vehicle_id]
+            del self._sent[vehicle_id]
+            del self._neighbours[vehicle_id]
+        for vehicle_id in vehicle_ids:
+            if vehicle_id not in self.views:
+                # Like the sensor's timer, the first broadcast comes one period after spawning
+                self.views[vehicle_id] = {}
+                self._next_broadcast[vehicle_id] = now + self.period
+                self._sent[vehicle_id] = {}
+                self._neighbours[vehicle_id] = set()
+
+        self._deliver(now)
+        self._detect(now, vehicle_ids, vehicle_positions, walker_ids, walker_positions)
+        self._expire(now)
+        self._broadcast(now, vehicle_ids, vehicle_positions)
+
+    def view(self, vehicle_id):
+        """
+        Returns what a vehicle currently knows, walker id -> WalkerEntry.
+        """
+        return self.views.get(vehicle_id, {})
+
+    def stats(self):
+        """
+        Returns how far and how fresh the walker data is, plus the broadcast volume.
+
+        Returns:
+            dict: coverage is the mean fraction of the walkers a vehicle knows about, age
+                the mean age of the known entries in seconds, hops the number of entries
+                per hop count.
+        """
+        known = [len(view) for view in self.views.values()]
+        ages = [self._now - entry.timestamp for view in self.views.values() for entry in view.values()]
+        hops = {}
+        for view in self.views.values():
+            for entry in view.values():
+                hops[entry.hops] = hops.get(entry.hops, 0) + 1
+        return {
+            "vehicles": len(self.views),
+            "walkers": self._walker_count,
+            "coverage": float(np.mean(known)) / self._walker_count if known and self._walker_count else 0.0,
+            "age": float(np.mean(ages)) if ages else 0.0,
+            "hops": dict(sorted(hops.items())),
+            "broadcasts": self.broadcasts,
+            "messages": self.messages,
+            "entries_sent": self.entries_sent,
+            "in_flight": len(self._in_flight),
+        }
+
+    def _positions(self, snapshot, infos):
+        ids, positions = [], []
+        for info in infos:
+            actor_snapshot = snapshot.find(info.id)
+            if actor_snapshot is None:
+                continue
+            location = actor_snapshot.get_transform().location
+            ids.append(info.id)
+            positions.append((location.x, location.y, location.z))
+        return ids, np.asarray(positions, dtype=np.float64).reshape(len(ids), 3)
+
+    def _detect(self, now, vehicle_ids, vehicle_positions, walker_ids, walker_positions):
+        if not len(walker_ids) or not len(vehicle_ids):
+            return
+        grid = SpatialGrid(walker_positions, max(self.detection_range, 1.0))
+        for vehicle_id, (x, y, _) in zip(vehicle_ids, vehicle_positions):
+            view = self.views[vehicle_id]
+            for i in grid.query(x, y, self.detection_range):
+                view[walker_ids[i]] = WalkerEntry(tuple(walker_positions[i]), now, 0)
+
+    def _expire(self, now):
+        for view in self.views.values():
+            stale = [walker_id for walker_id, entry in view.items() if now - entry.timestamp > self.stale_after]
+            for walker_id in stale:
+                del view[walker_id]
+
+    def _broadcast(self, now, vehicle_ids, vehicle_positions):
+        due = [i for i, vehicle_id in enumerate(vehicle_ids) if self._next_broadcast[vehicle_id] <= now]
+        if not due:
+            return
+        grid = SpatialGrid(vehicle_positions, max(self.broadcast_radius, 1.0))
+        for i in due:
+            sender = vehicle_ids[i]
+            self._next_broadcast[sender] += self.period
+            if self._next_broadcast[sender] <= now:
+                # Ticks longer than the period: one broadcast per tick, as the timer would not catch up either
+                self._next_broadcast[sender] = now + self.period
+            self.broadcasts += 1
+            entries = [(walker_id, entry) for walker_id, entry in self.views[sender].items()
+                       if self.max_hops is None or entry.hops < self.max_hops]
+            if not entries:
+                continue
+            delta = self._delta(sender, entries, now)
+            neighbours = set()
+            x, y, _ = vehicle_positions[i]
+            for j in grid.query(x, y, self.broadcast_radius):
+                receiver = vehicle_ids[j]
+                if receiver == sender:
+                    continue
+                neighbours.add(receiver)
+                shared = delta if self.delta_updates and receiver in self._neighbours[sender] else entries
+                if not shared:
+                    continue
+                self.messages += 1
+                self.entries_sent += len(shared)
+                if self.latency > 0.0:
+                    heapq.heappush(self._in_flight, (now + self.latency, self._sequence, receiver, shared))
+                    self._sequence += 1
+                else:
+                    self._merge(receiver, shared)
+            self._neighbours[sender] = neighbours
+
+    def _delta(self, sender, entries, now):
+        # Entries only change by getting a newer timestamp, which plays the role of the plugin's version
+        sent = self._sent[sender]
+        current = {walker_id for walker_id, _ in entries}
+        for walker_id in [walker_id for walker_id in sent if walker_id not in current]:
+            del sent[walker_id]
+        delta = []
+        for walker_id, entry in entries:
+            timestamp, sent_at = sent.get(walker_id, (None, None))
+            if timestamp != entry.timestamp or now - sent_at >= self.refresh_ttl:
+                delta.append((walker_id, entry))
+                sent[walker_id] = (entry.timestamp, now)
+        return delta
+
+    def _deliver(self, now):
+        while self._in_flight and self._in_flight[0][0] <= now:
+            _, _, receiver, entries = heapq.heappop(self._in_flight)
+            self._merge(receiver, entries)
+
+    def _merge(self, receiver, entries):
+        view = self.views.get(receiver)
+        if view is None:
+            return  # Destroyed while the broadcast was in flight
+        for walker_id, entry in entries:
+            known = view.get(walker_id)
+            if known is None or entry.timestamp > known.timestamp:
+                view[walker_id] = WalkerEntry(entry.location, entry.timestamp, entry.hops + 1)
+
+def parse_model_spec(spec):
+    """
+    Parses a "radius:period[:latency]" command line spec into V2VPropagationModel arguments.
+
+    Raises:
+        ValueError: If the spec is malformed, radius or period is not positive, or latency is negative.
+    """
+    parts = spec.split(":")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Invalid V2V model '{spec}', expected radius:period[:latency].")
+    try:
+        values = [float(part) for part in parts]
+    except ValueError:
+        raise ValueError(f"Invalid number in V2V model '{spec}'.")
+    if values[0] <= 0 or values[1] <= 0 or (len(values) == 3 and values[2] < 0):
+        raise ValueError(f"Invalid V2V model '{spec}', radius and period must be positive and latency not negative.")
+    return dict(zip(("broadcast_radius", "period", "latency"), values))
@@ -1,67 +1,165 @@
-from utils.walker_utils import get_walker_location_from_index, walker_go_to_location
+import numpy as np
+import carla
+from utils.walker_utils import get_walker_spawn_table
 
 class WalkerManager:
-    def __init__(self, world, spawn_points):
+    def __init__(self, world, spawn_points, client=None, heading_tolerance=2.0, actor_registry=None, map_name="Town02"):
+        """
+        Keeps the scripted walkers in flat arrays and steers them along their routes.
+
+        Args:
+            world (carla.World): The CARLA world instance.
+            spawn_points (list): List of carla.Transform objects representing spawn points.
+            client (carla.Client): Used to send walker controls and destroys as one batch. If None,
+                they are applied actor by actor.
+            heading_tolerance (float): Heading change in degrees below which a walker's control
+                is not re-sent.
+            actor_registry (ActorRegistry): Registry told about destroyed walkers, so it does not
+                wait for the next snapshot to evict them.
+            map_name (str): Short name of the map, used to look up walker targets.
+        """
         self.world = world
         self.spawn_points = spawn_points
-        self.walkers = []  # List of walkers and their routes
+        self.spawn_table = get_walker_spawn_table(spawn_points, map_name)
+        self.client = client
+        self.min_heading_cos = np.cos(np.radians(heading_tolerance))
+        self.actor_registry = actor_registry
+
+        self.walkers = []  # Walker actors, row i of every array below belongs to walkers[i]
+        self._routes = []  # Route spawn indices per walker, only used for logging
+        self._route_targets = np.empty((0, 3))  # Target locations of all routes, concatenated
+        self._route_start = np.empty(0, dtype=np.int64)
+        self._route_length = np.empty(0, dtype=np.int64)
+        self._current_index = np.empty(0, dtype=np.int64)
+        self._speed = np.empty(0)
+        self._sent_direction = np.empty((0, 3))
+        self._sent_speed = np.empty(0)
+        self._pending = []  # Walkers added since the last update
 
-    def add_walker(self, walker, route, speed):
+    def add_walker(self, walker, route, speed, route_locations=None):
         """
         Add a walker and its route to the manager.
 
+        Route targets come from the map's walker spawn table, unless the scenario model
+        already resolved them.
+
         Args:
             walker (carla.Actor): The walker actor.
             route (list): List of indices representing the route.
             speed (float): Speed of the walker.
+            route_locations (list): (x, y, z) target of every route point, if already known.
+
+        Raises:
+            IndexError: If a route index is out of range for the spawn points list.
         """
-        self.walkers.append({
-            "walker": walker,
-            "route": route,
-            "current_index": 0,
-            "speed": speed
-        })
+        if route_locations is not None:
+            targets = np.array(route_locations, dtype=np.float64).reshape(len(route), 3)
+        else:
+            targets = self.spawn_table.targets(route)
+        self._pending.append((walker, list(route), targets, float(speed)))
 
     def update_walkers(self):
         """
         Update all walkers in the manager, moving them along their routes.
         Destroy walkers when they reach the last point in their route.
+
+        Walker locations come from one world snapshot and a control is only sent when a
+        walker's heading or speed changed, all in a single batch.
         """
-        walkers_to_remove = []  # Keep track of walkers to remove
-
-        for walker_data in self.walkers:
-            walker = walker_data["walker"]
-            route = walker_data["route"]
-            current_index = walker_data["current_index"]
-            speed = walker_data["speed"]
-
-            # Check if the walker has reached the current target
-            if current_index < len(route):
-                target_index = route[current_index]
-                target_transform = get_walker_location_from_index(self.spawn_points, target_index)
-                target_location = target_transform.location
-
-                # Check distance to target
-                current_location = walker.get_location()
-                distance = current_location.distance(target_location)
-                if distance <= 2.0:  # Deviation threshold
-                    print(f"Walker reached point {target_index}")
-                    walker_data["current_index"] += 1  # Move to the next point
-
-                    # If the walker has reached the last point, mark it for removal
-                    if walker_data["current_index"] >= len(route):
-                        print(f"Walker has completed its route and will be destroyed.")
-                        walkers_to_remove.append(walker)
-                else:
-                    # Move the walker toward the target
-                    walker_go_to_location(walker, self.spawn_points, current_location, target_index, speed)
-            else:
-                # If the walker has no valid route, mark it for removal
-                walkers_to_remove.append(walker)
+        self._flush_pending()
+        if not self.walkers:
+            return
+
+        snapshot = self.world.get_snapshot()
+        positions = np.empty((len(self.walkers), 3))
+        alive = np.ones(len(self.walkers), dtype=bool)
+        for i, walker in enumerate(self.walkers):
+            actor_snapshot = snapshot.find(walker.id)
+            if actor_snapshot is None:
+                alive[i] = False
+                continue
+            location = actor_snapshot.get_transform().location
+            positions[i] = (location.x, location.y, location.z)
 
+        # Rows past the end of a route are clipped here and masked out by has_target
+        has_target = self._current_index < self._route_length
+        if len(self._route_targets):
+            target_rows = np.minimum(self._route_start + self._current_index, len(self._route_targets) - 1)
+            targets = self._route_targets[target_rows]
+        else:
+            targets = np.zeros_like(positions)
+
+        # Check distance to target
+        distance = np.linalg.norm(targets - positions, axis=1)
+        reached = alive & has_target & (distance <= 2.0)  # Deviation threshold
+        for i in np.flatnonzero(reached):
+            print(f"Walker reached point {self._routes[i][self._current_index[i]]}")
+        self._current_index[reached] += 1
+
+        # Walkers that completed their route or have no valid route are removed
+        finished = ~alive | (self._current_index >= self._route_length)
+        for i in np.flatnonzero(finished & alive):
+            if has_target[i]:
+                print(f"Walker has completed its route and will be destroyed.")
+
+        # Move the remaining walkers toward their target, destination on the ground like walker_go_to_location
+        moving = alive & has_target & ~reached & ~finished
+        destinations = targets.copy()
+        destinations[:, 2] = 0.0
+        movement = destinations - positions
+        magnitude = np.linalg.norm(movement, axis=1)
+        direction = np.divide(movement, magnitude[:, None], out=np.zeros_like(movement), where=magnitude[:, None] > 0)
+
+        heading_cos = np.einsum("ij,ij->i", direction, self._sent_direction)
+        changed = moving & ((heading_cos < self.min_heading_cos) | (self._speed != self._sent_speed))
+        self._send_controls(np.flatnonzero(changed), direction)
+
+        if finished.any():
+            self._remove(finished, alive)
+
+    def _flush_pending(self):
+        if not self._pending:
+            return
+        offset = len(self._route_targets)
+        starts = []
+        for walker, route, targets, _ in self._pending:
+            starts.append(offset)
+            offset += len(targets)
+            self.walkers.append(walker)
+            self._routes.append(route)
+        self._route_targets = np.concatenate([self._route_targets] + [p[2] for p in self._pending])
+        self._route_start = np.concatenate((self._route_start, starts))
+        self._route_length = np.concatenate((self._route_length, [len(p[2]) for p in self._pending]))
+        self._current_index = np.concatenate((self._current_index, np.zeros(len(self._pending), dtype=np.int64)))
+        self._speed = np.concatenate((self._speed, [p[3] for p in self._pending]))
+        self._sent_direction = np.concatenate((self._sent_direction, np.zeros((len(self._pending), 3))))
+        self._sent_speed = np.concatenate((self._sent_speed, np.full(len(self._pending), np.nan)))
+        self._pending = []
+
+    def _send_controls(self, rows, direction):
+        if len(rows) == 0:
+            return
+        controls = []
+        for i in rows:
+            x, y, z = direction[i]
+            controls.append((self.walkers[i], carla.WalkerControl(carla.Vector3D(x=float(x), y=float(y), z=float(z)), float(self._speed[i]), False)))
+        if self.client is not None:
+            self.client.apply_batch([carla.command.ApplyWalkerControl(walker.id, control) for walker, control in controls])
+        else:
+            for walker, control in controls:
+                walker.apply_control(control)
+        self._sent_direction[rows] = direction[rows]
+        self._sent_speed[rows] = self._speed[rows]
+
+    def _remove(self, finished, alive):
         # Destroy walkers that have completed their routes
-        for walker in walkers_to_remove:
-            if walker.is_alive:
+        to_destroy = [self.walkers[i] for i in np.flatnonzero(finished & alive)]
+        if self.client is not None and to_destroy:
+            self.client.apply_batch([carla.command.DestroyActor(walker.id) for walker in to_destroy])
+            for walker in to_destroy:
+                print(f"Walker {walker.id} destroyed.")
+        else:
+            for walker in to_destroy:
                 try:
                     walker.destroy()
                     print(f"Walker {walker.id} destroyed.")
@@ -69,4 +167,21 @@ class WalkerManager:
                     print(f"Failed to destroy walker {walker.id}: {e}")
 
         # Remove destroyed walkers from the manager
-        self.walkers = [w for w in self.walkers if w["walker"] not in walkers_to_remove]
\ No newline at end of file
+        if self.actor_registry is not None:
+            self.actor_registry.discard(self.walkers[i].id for i in np.flatnonzero(finished))
+        keep = ~finished
+        self.walkers = [walker for walker, kept in zip(self.walkers, keep) if kept]
+        self._routes = [route for route, kept in zip(self._routes, keep) if kept]
+        self._route_start = self._route_start[keep]
+        self._route_length = self._route_length[keep]
+        self._current_index = self._current_index[keep]
+        self._speed = self._speed[keep]
+        self._sent_direction = self._sent_direction[keep]
+        self._sent_speed = self._sent_speed[keep]
+
+        # Drop the targets of removed walkers once they make up most of the table
+        if self._route_length.sum() * 2 < len(self._route_targets):
+            rows = [np.arange(start, start + length) for start, length in zip(self._route_start, self._route_length)]
+            rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+            self._route_targets = self._route_targets[rows]
+            self._route_start = np.cumsum(self._route_length) - self._route_length
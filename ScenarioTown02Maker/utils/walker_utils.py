@@ -1,3 +1,7 @@
+import re
+from pathlib import Path
+
+import numpy as np
 import carla
 
 # Custom index lists for sidewalk zones
@@ -7,33 +11,184 @@ TOP_SIDEWALK = [23, 21, 19, 13, 15, 80, 82, 76, 78, 72, 74, 11, 9, 85, 7, 5, 99,
 BOTTOM_SIDEWALK = [24, 22, 18, 14, 93, 16, 81, 0, 77, 79, 73, 75, 12, 10, 8, 6, 96, 100, 98, 4]
 UNAVAILABLE_SPAWN_INDEXES = [1, 2, 17, 20, 41, 42, 51, 52, 53, 56, 87]
 
-def get_walker_offset_for_index(index):
+def _offsets_by_index(zones):
+    # Earlier zones win when an index is listed twice, like the original if/elif chain
+    offsets = {}
+    for indices, offset in reversed(zones):
+        offsets.update(dict.fromkeys(indices, offset))
+    return offsets
+
+# Sidewalk layout per map: offset of every listed spawn index and the indices walkers cannot use.
+# Maps without a layout get no offsets and allow every index.
+SIDEWALK_LAYOUTS = {
+    "Town02": {
+        "offsets": _offsets_by_index([
+            (LEFT_SIDEWALK, (0, -4, 0)),
+            (RIGHT_SIDEWALK, (0, 4, 0)),
+            (TOP_SIDEWALK, (4, 0, 0)),
+            (BOTTOM_SIDEWALK, (-4, 0, 0)),
+        ]),
+        "unavailable": UNAVAILABLE_SPAWN_INDEXES,
+    },
+}
+SPAWN_POINT_FILES = {
+    "Town02": Path(__file__).resolve().parent.parent / "Town02SpawnPoints" / "SpawnPointLocation.txt",
+}
+
+_SPAWN_POINT_PATTERN = re.compile(
+    r"x=([-\d.]+), y=([-\d.]+), z=([-\d.]+)\).*pitch=([-\d.]+), yaw=([-\d.]+), roll=([-\d.]+)"
+)
+_walker_tables = {}  # (map name, spawn point poses) -> WalkerSpawnTable
+
+def read_spawn_point_poses(path):
+    """
+    Reads a spawn point dump like Town02SpawnPoints/SpawnPointLocation.txt.
+
+    Returns:
+        list: (x, y, z, pitch, yaw, roll) of every spawn point, in file order.
+    """
+    with open(path) as f:
+        return [tuple(map(float, match.groups())) for match in map(_SPAWN_POINT_PATTERN.search, f) if match]
+
+class WalkerSpawnTable:
+    """
+    Final walker location of every spawn index of a map, sidewalk offset included.
+
+    Locations and rotations are NumPy arrays indexed by spawn index, so looking up a
+    walker spawn or route target is plain array indexing with no carla object created.
+    """
+
+    def __init__(self, map_name, poses):
+        """
+        Args:
+            map_name (str): Short name of the map, e.g. "Town02".
+            poses (numpy.ndarray): (N, 6) spawn points as x, y, z, pitch, yaw, roll.
+        """
+        poses = np.asarray(poses, dtype=np.float64).reshape(-1, 6)
+        layout = SIDEWALK_LAYOUTS.get(map_name, {})
+
+        self.map_name = map_name
+        self.offsets = np.zeros((len(poses), 3))
+        for index, offset in layout.get("offsets", {}).items():
+            if index < len(poses):
+                self.offsets[index] = offset
+        self.locations = poses[:, :3] + self.offsets
+        self.rotations = poses[:, 3:].copy()
+        self.available = np.ones(len(poses), dtype=bool)
+        unavailable = [index for index in layout.get("unavailable", []) if index < len(poses)]
+        self.available[unavailable] = False
+
+    @classmethod
+    def from_spawn_points(cls, spawn_points, map_name="Town02"):
+        """
+        Builds the table from the spawn points of a live map.
+
+        Args:
+            spawn_points (list): List of carla.Transform objects representing spawn points.
+            map_name (str): Short name of the map, used to pick its sidewalk layout.
+        """
+        return cls(map_name, _spawn_point_poses(spawn_points))
+
+    @classmethod
+    def from_file(cls, path=None, map_name="Town02"):
+        """
+        Builds the table from a spawn point dump like Town02SpawnPoints/SpawnPointLocation.txt.
+
+        Args:
+            path (str or Path): The dump. Defaults to the known file of the map.
+            map_name (str): Short name of the map, used to pick its sidewalk layout.
+
+        Raises:
+            FileNotFoundError: If no dump is known or found for the map.
+        """
+        path = path or SPAWN_POINT_FILES.get(map_name)
+        if path is None or not Path(path).exists():
+            raise FileNotFoundError(f"No spawn point file for map '{map_name}'.")
+        return cls(map_name, read_spawn_point_poses(path))
+
+    def __len__(self):
+        return len(self.locations)
+
+    def is_valid(self, index):
+        """
+        Checks if walkers can spawn at an index of this map.
+        """
+        return 0 <= index < len(self.locations) and bool(self.available[index])
+
+    def targets(self, route):
+        """
+        Returns the (len(route), 3) walker locations of a list of spawn indices.
+
+        Raises:
+            IndexError: If an index is out of range for the map.
+        """
+        route = np.asarray(route, dtype=np.int64)
+        if len(route) and (route.min() < 0 or route.max() >= len(self.locations)):
+            raise IndexError("Invalid spawn point index.")
+        return self.locations[route]
+
+    def transform(self, index):
+        """
+        Returns the walker transform of a spawn index, as get_walker_location_from_index does.
+        """
+        x, y, z = self.locations[index]
+        pitch, yaw, roll = self.rotations[index]
+        return carla.Transform(  # type: ignore
+            carla.Location(x=float(x), y=float(y), z=float(z)),  # type: ignore
+            carla.Rotation(pitch=float(pitch), yaw=float(yaw), roll=float(roll)),  # type: ignore
+        )
+
+def get_walker_spawn_table(spawn_points, map_name="Town02"):
+    """
+    Returns the walker spawn table of a map, built once per map and set of spawn points.
+
+    Tables are keyed on the spawn point poses themselves, so two different lists of the
+    same length never share a table. Building the key reads every spawn point: callers
+    that look up many walkers fetch the table once and pass it on.
+
+    Args:
+        spawn_points (list): List of carla.Transform objects representing spawn points.
+        map_name (str): Short name of the map, e.g. "Town02", or the full carla.Map name.
+
+    Returns:
+        WalkerSpawnTable: The shared table.
+    """
+    map_name = map_name.split("/")[-1]
+    poses = _spawn_point_poses(spawn_points)
+    key = (map_name, poses)
+    table = _walker_tables.get(key)
+    if table is None:
+        table = _walker_tables[key] = WalkerSpawnTable(map_name, poses)
+    return table
+
+def _spawn_point_poses(spawn_points):
+    return tuple(
+        (t.location.x, t.location.y, t.location.z, t.rotation.pitch, t.rotation.yaw, t.rotation.roll)
+        for t in spawn_points
+    )
+
+def get_walker_offset_for_index(index, map_name="Town02"):
     """
     Returns an offset for a walker based on its spawn index.
 
     Args:
         index (int): The spawn index of the walker.
+        map_name (str): Short name of the map whose sidewalk layout is used.
 
     Returns:
         tuple: A tuple (x, y, z) representing the offset to apply to the spawn location.
     """
-    if index in LEFT_SIDEWALK:
-        return (0, -4, 0)
-    elif index in RIGHT_SIDEWALK:
-        return (0, 4, 0)
-    elif index in TOP_SIDEWALK:
-        return (4, 0, 0)
-    elif index in BOTTOM_SIDEWALK:
-        return (-4, 0, 0)
-    return (0, 0, 0)  # Default or fallback
+    return SIDEWALK_LAYOUTS.get(map_name, {}).get("offsets", {}).get(index, (0, 0, 0))  # Default or fallback
 
-def get_walker_location_from_index(spawn_points, index):
+def get_walker_location_from_index(spawn_points, index, table=None):
     """
     Calculates the transform for a walker based on its spawn index and offset.
 
     Args:
         spawn_points (list): List of carla.Transform objects representing spawn points.
         index (int): The spawn index of the walker.
+        table (WalkerSpawnTable): Walker spawn table of the map. If None, the Town02 table
+            of spawn_points is used.
 
     Returns:
         carla.Transform: The transform for the walker, including the offset.
@@ -41,37 +196,33 @@ def get_walker_location_from_index(spawn_points, index):
     Raises:
         IndexError: If the index is out of range for the spawn points list.
     """
-    if index >= len(spawn_points):
+    if table is None:
+        table = get_walker_spawn_table(spawn_points)
+    if not 0 <= index < len(table):
         raise IndexError("Invalid spawn point index.")
+    return table.transform(index)
 
-    transform = spawn_points[index]
-    offset = get_walker_offset_for_index(index)
-
-    new_location = carla.Location(  # type: ignore
-        x=transform.location.x + offset[0],
-        y=transform.location.y + offset[1],
-        z=transform.location.z + offset[2],
-    )
-
-    return carla.Transform(new_location, transform.rotation)  # type: ignore
-
-def is_valid_walker_spawn_index(index):
+def is_valid_walker_spawn_index(index, table=None):
     """
     Checks if the given spawn index is valid.
 
     Args:
         index (int): The spawn index to check.
+        table (WalkerSpawnTable): Walker spawn table of the map. If None, the Town02 layout
+            with its 101 spawn points is assumed.
 
     Returns:
         bool: True if the index is valid, False otherwise.
     """
+    if table is not None:
+        return table.is_valid(index)
     if index < 0 or index > 100:  # Check if the index is out of range
         return False
     if index in UNAVAILABLE_SPAWN_INDEXES:  # Check if the index is in the unavailable list
         return False
     return True
 
-def spawn_walker(world, bp_lib, walker_spawn_index):
+def spawn_walker(world, bp_lib, walker_spawn_index, map_name="Town02", spawn_points=None, table=None):
     """
     Spawns a walker at the specified spawn index and assigns a WalkerAIController.
 
@@ -79,6 +230,11 @@ def spawn_walker(world, bp_lib, walker_spawn_index):
         world (carla.World): The CARLA world instance.
         bp_lib (carla.BlueprintLibrary): The blueprint library.
         walker_spawn_index (int): The index of the spawn point.
+        map_name (str): Short name of the map whose sidewalk layout is used.
+        spawn_points (list): Spawn points of the map, e.g. MapContext.spawn_points. If None,
+            they are fetched from the server, which downloads the whole map.
+        table (WalkerSpawnTable): Walker spawn table of the map. If None, it is looked up
+            from spawn_points and map_name.
 
     Returns:
         carla.Actor: The spawned walker actor.
@@ -94,15 +250,16 @@ def spawn_walker(world, bp_lib, walker_spawn_index):
     if walker_spawn_index is None:
         raise ValueError("Walker spawn index must be provided.")
     
-    is_valid_index = is_valid_walker_spawn_index(walker_spawn_index)
-    if not is_valid_index:
+    if table is None:
+        if spawn_points is None:
+            spawn_points = world.get_map().get_spawn_points()
+        if not spawn_points:
+            raise RuntimeError("No spawn points available in the map.")
+        table = get_walker_spawn_table(spawn_points, map_name)
+    if not table.is_valid(walker_spawn_index):
         raise ValueError(f"Invalid walker spawn index: {walker_spawn_index}")
-    
-    spawn_points = world.get_map().get_spawn_points()
-    if not spawn_points:
-        raise RuntimeError("No spawn points available in the map.")
-    
-    transform = get_walker_location_from_index(spawn_points, walker_spawn_index)
+
+    transform = table.transform(walker_spawn_index)
     print(f"Spawning walker with location: {transform.location}")
     
     # Spawn the walker actor
@@ -112,7 +269,36 @@ def spawn_walker(world, bp_lib, walker_spawn_index):
     
     return walker
 
-def walker_go_to_location(walker, spawn_points, walker_location, go_to_index_location, speed):
+def build_walker_spawn_command(bp_lib, walker_spawn_index, spawn_points, map_name="Town02", table=None):
+    """
+    Builds a SpawnActor command for a walker at the specified spawn index.
+
+    Args:
+        bp_lib (carla.BlueprintLibrary): The blueprint library.
+        walker_spawn_index (int): The index of the spawn point.
+        spawn_points (list): List of carla.Transform objects representing spawn points.
+        map_name (str): Short name of the map whose sidewalk layout is used.
+        table (WalkerSpawnTable): Walker spawn table of the map. If None, it is looked up
+            from spawn_points and map_name.
+
+    Returns:
+        carla.command.SpawnActor: The spawn command for the walker.
+
+    Raises:
+        ValueError: If the walker blueprint is not found or the index is invalid.
+    """
+    bp = bp_lib.find('walker.pedestrian.0001')
+    if not bp:
+        raise ValueError("Walker blueprint not found in blueprint library.")
+
+    if table is None:
+        table = get_walker_spawn_table(spawn_points, map_name)
+    if walker_spawn_index is None or not table.is_valid(walker_spawn_index):
+        raise ValueError(f"Invalid walker spawn index: {walker_spawn_index}")
+
+    return carla.command.SpawnActor(bp, table.transform(walker_spawn_index))
+
+def walker_go_to_location(walker, spawn_points, walker_location, go_to_index_location, speed, table=None):
     """
     Assigns a route to a walker in the CARLA simulator, with custom offsets for sidewalks.
 
@@ -122,6 +308,8 @@ def walker_go_to_location(walker, spawn_points, walker_location, go_to_index_loc
         walker_location (carla.Location): The current location of the walker.
         go_to_index_location (int): Index from spawn locations.
         speed (float): Speed of the walker. Default is 1.4 m/s.
+        table (WalkerSpawnTable): Walker spawn table of the map. If None, the Town02 table
+            of spawn_points is used.
 
     Returns:
         carla.Actor: The walker actor with updated control.
@@ -142,7 +330,7 @@ def walker_go_to_location(walker, spawn_points, walker_location, go_to_index_loc
         raise ValueError(f"Index {go_to_index_location} is out of range for the spawn points list.")
 
     # Get the transform for the destination
-    destination_transform = get_walker_location_from_index(spawn_points, go_to_index_location)
+    destination_transform = get_walker_location_from_index(spawn_points, go_to_index_location, table)
     destination_transform.location.z = 0.0
 
     # Calculate the vector between the current location and the destination
@@ -10,10 +10,13 @@ try:
 except IndexError:
     pass
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ScenarioTown02Maker'))
+
 import carla
-import weakref
 import time
 import random
+from utils.actor_registry import ActorRegistry
+from utils.sensor_pipeline import SensorEventPipeline, WALKER_DETECTION
 
 def main():
     try:
@@ -39,6 +42,25 @@ def main():
             print("V2V Broadcast Sensor not found. Ensure it has been added and recompiled.")
             return
 
+        # Sensor callbacks only queue their events; they are decoded and printed from this thread
+        actor_registry = ActorRegistry(world)
+        sensor_pipeline = SensorEventPipeline(world, actor_registry=actor_registry)
+        sensor_labels = {}
+
+        def print_detections(frame, events, summary):
+            for event in events:
+                if event.type_id is None:
+                    continue
+                if event.data and event.data.get("Removed"):
+                    continue  # The sensor stopped tracking this walker, there is nothing to print
+                label = sensor_labels.get(event.sensor_id, "")
+                if event.stream == WALKER_DETECTION:
+                    print(f"{label}Detected walker: {event.type_id} at {event.location}")
+                else:
+                    print(f"{label}Detected vehicle: {event.type_id} at {event.location}")
+
+        sensor_pipeline.add_sink(print_detections)
+
         # Find the spectator (camera) actor
         spectator = world.get_spectator()
 
@@ -61,24 +83,10 @@ def main():
             )
             print("V2V Broadcast Sensor attached to the spectator vehicle.")
 
-            world_ref = weakref.ref(world)
-
-            def walker_detection_callback(event):
-                for walker_id, walker_data in event.items():
-                    walker = world_ref().get_actor(walker_id)
-                    if walker:
-                        print(f"Detected walker: {walker.type_id} at {walker_data['Location']}")
-
-            walker_detection_sensor.listen(walker_detection_callback)
+            sensor_pipeline.attach(walker_detection_sensor)
             print("Listening to Walker Detection events...")
 
-            def v2v_broadcast_callback(event):
-                for vehicle_id, vehicle_data in event.items():
-                    vehicle = world_ref().get_actor(vehicle_id)
-                    if vehicle:
-                        print(f"Detected vehicle: {vehicle.type_id} at {vehicle_data['Location']}")
-            
-            v2v_broadcast_sensor.listen(v2v_broadcast_callback)
+            sensor_pipeline.attach(v2v_broadcast_sensor)
             print("Listening to V2V Broadcast events...")
 
         # Wait for 5 seconds before spawning the walker
@@ -119,28 +127,20 @@ def main():
         )
         print("V2V Broadcast Sensor attached to the extra vehicle.")
 
-        # Define the callback for the extra vehicle's Walker Detection sensor
-        def extra_vehicle_walker_callback(event):
-            for walker_id, walker_data in event.items():
-                walker = world_ref().get_actor(walker_id)
-                if walker:
-                    print(f"Extra vehicle detected a walker: {walker.type_id} at {walker_data['Location']}")
-
-        extra_vehicle_walker_detection_sensor.listen(extra_vehicle_walker_callback)
+        # The extra vehicle's sensors feed the same pipeline
+        sensor_labels[extra_vehicle_walker_detection_sensor.id] = "Extra vehicle: "
+        sensor_labels[extra_vehicle_v2v_broadcast_sensor.id] = "Extra vehicle: "
+        sensor_pipeline.attach(extra_vehicle_walker_detection_sensor)
         print("Extra vehicle listening to Walker Detection events...")
-
-        # Define the callback for the extra vehicle's V2V Broadcast sensor
-        def extra_vehicle_v2v_callback(event):
-            for vehicle_id, vehicle_data in event.items():
-                vehicle = world_ref().get_actor(vehicle_id)
-                if vehicle:
-                    print(f"Extra vehicle detected a vehicle: {vehicle.type_id} at {vehicle_data['Location']}")
-
-        extra_vehicle_v2v_broadcast_sensor.listen(extra_vehicle_v2v_callback)
+        sensor_pipeline.attach(extra_vehicle_v2v_broadcast_sensor)
         print("Extra vehicle listening to V2V Broadcast events...")
 
-        # Let the simulation run for a while
-        time.sleep(90)
+        # Let the simulation run for a while, draining sensor events every tick
+        end_time = time.time() + 90
+        while time.time() < end_time:
+            actor_registry.sync(world.wait_for_tick())
+            sensor_pipeline.drain()
+        print(f"Sensor event counters: {sensor_pipeline.stats()}")
 
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -10,10 +10,13 @@ try:
 except IndexError:
     pass
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ScenarioTown02Maker'))
+
 import carla
-import weakref
 import time
 import random
+from utils.actor_registry import ActorRegistry
+from utils.sensor_pipeline import SensorEventPipeline, SAFE_DISTANCE
 
 def main():
     try:
@@ -33,6 +36,18 @@ def main():
             print("Safe Distance Sensor not found. Ensure it has been added and recompiled.")
             return
 
+        # Sensor callbacks only queue their events; they are decoded and printed from this thread
+        actor_registry = ActorRegistry(world)
+        sensor_pipeline = SensorEventPipeline(world, actor_registry=actor_registry)
+        sensor_labels = {}
+
+        def print_too_close(frame, events, summary):
+            for event in events:
+                if event.stream == SAFE_DISTANCE:
+                    print(f"{sensor_labels.get(event.sensor_id, 'Vehicle too close')}: {event.type_id}")
+
+        sensor_pipeline.add_sink(print_too_close)
+
         # Find the spectator (camera) actor
         spectator = world.get_spectator()
 
@@ -49,17 +64,8 @@ def main():
             )
             print("Safe Distance Sensor attached to the spectator vehicle.")
 
-            # Weak reference to the world to use inside the callback
-            world_ref = weakref.ref(world)
-
-            # Define the callback function
-            def safe_distance_callback(event):
-                for actor_id in event:
-                    vehicle = world_ref().get_actor(actor_id)
-                    print(f"Vehicle too close: {vehicle.type_id}")
-
             # Start listening for Safe Distance events
-            safe_distance_sensor.listen(safe_distance_callback)
+            sensor_pipeline.attach(safe_distance_sensor)
             print("Listening to Safe Distance events...")
 
         # Wait for 5 seconds before spawning the walker
@@ -93,17 +99,16 @@ def main():
         )
         print("Safe Distance Sensor attached to the extra vehicle.")
 
-        # Define the callback for the extra vehicle's sensor
-        def extra_vehicle_callback(event):
-            for actor_id in event:
-                vehicle = world_ref().get_actor(actor_id)
-                print(f"Extra Vehicle detected a vehicle too close: {vehicle.type_id}")
-
         # Start listening for Safe Distance events for the extra vehicle
-        extra_vehicle_sensor.listen(extra_vehicle_callback)
+        sensor_labels[extra_vehicle_sensor.id] = "Extra Vehicle detected a vehicle too close"
+        sensor_pipeline.attach(extra_vehicle_sensor)
         print("Extra vehicle listening to Safe Distance events...")
-        # Let the simulation run for a while
-        time.sleep(90)
+        # Let the simulation run for a while, draining sensor events every tick
+        end_time = time.time() + 90
+        while time.time() < end_time:
+            actor_registry.sync(world.wait_for_tick())
+            sensor_pipeline.drain()
+        print(f"Sensor event counters: {sensor_pipeline.stats()}")
 
     except Exception as e:
         print(f"An error occurred: {e}")